@@ -0,0 +1,320 @@
+# async_models.py
+"""
+Асинхронний варіант моделі (asyncio) для одночасного обслуговування звітів.
+
+Підключення psycopg2 відкриваються в неблокувальному режимі (async_=True); очікування відповіді
+сервера — через add_reader/add_writer циклу подій, тож поки один запит виконується на сервері,
+інші корутини надсилають свої. asyncio.gather над методами AsyncDBModel перекриває запити
+на різних підключеннях невеликого асинхронного пулу.
+
+Методи мають ту саму форму, що й у DBModel (ті самі аргументи й результати), але з await.
+Обмеження асинхронного режиму psycopg2: кожен оператор фіксується одразу (без явних транзакцій),
+COPY і серверні курсори недоступні — масове завантаження й пакетні операції лишаються в DBModel.
+"""
+import asyncio
+import collections
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import sql
+
+import plans
+from catalog import SchemaCatalog
+from config import DB, ASYNC_POOL, CATALOG_CHECK_INTERVAL
+from models import SCHEMA_ERROR_CODES, STUDENT_TASKS_SQL, PROFESSOR_COURSES_SQL, COURSE_REGS_SQL
+
+
+async def wait_ready(conn):
+    """Чекати, поки неблокувальне підключення завершить поточну операцію (conn.poll() == POLL_OK)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        fut = loop.create_future()
+
+        def ready():
+            if not fut.done():
+                fut.set_result(None)
+        fd = conn.fileno()
+        if state == psycopg2.extensions.POLL_READ:
+            loop.add_reader(fd, ready)
+            remove = loop.remove_reader
+        elif state == psycopg2.extensions.POLL_WRITE:
+            loop.add_writer(fd, ready)
+            remove = loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"Несподіваний стан poll(): {state}")
+        try:
+            await fut
+        finally:
+            remove(fd)
+
+
+class AsyncConnectionPool:
+    """Пул неблокувальних підключень: до maxconn одночасно, нові відкриваються за потреби."""
+
+    def __init__(self, minconn: int, maxconn: int, dsn: Dict[str, Any], acquire_timeout: Optional[float] = None):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self._dsn = dsn
+        self._acquire_timeout = acquire_timeout
+        self._idle: Deque[Any] = collections.deque()
+        self._slots = asyncio.Semaphore(maxconn)
+        self.opened = 0
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.broken = 0
+
+    async def _connect(self):
+        conn = psycopg2.connect(async_=True, **self._dsn)
+        await wait_ready(conn)
+        self.opened += 1
+        return conn
+
+    async def open(self):
+        for _ in range(self.minconn - len(self._idle)):
+            self._idle.append(await self._connect())
+
+    async def getconn(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._acquire_timeout)
+        except asyncio.TimeoutError:
+            raise psycopg2.OperationalError("Вичерпано пул підключень: немає вільного підключення") from None
+        waited = time.perf_counter() - started
+        try:
+            conn = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.closed == 0:
+                    conn = candidate
+                    break
+                self.broken += 1
+            if conn is None:
+                conn = await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.checkouts += 1
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        # Скасована корутина могла залишити запит незавершеним — таке підключення не повертаємо
+        if broken or conn.closed != 0 or conn.isexecuting():
+            self.broken += 1
+            if conn.closed == 0:
+                conn.close()
+        else:
+            self._idle.append(conn)
+        self.in_use -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, broken)
+
+    def closeall(self):
+        while self._idle:
+            self._idle.pop().close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "minconn": self.minconn,
+            "maxconn": self.maxconn,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "checkouts": self.checkouts,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+            "broken": self.broken,
+            "opened": self.opened,
+        }
+
+
+def _dict_rows(cur) -> List[Dict[str, Any]]:
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+class AsyncDBModel:
+    def __init__(self):
+        self.pool = AsyncConnectionPool(
+            ASYNC_POOL["minconn"], ASYNC_POOL["maxconn"], DB,
+            acquire_timeout=ASYNC_POOL.get("acquire_timeout"),
+        )
+        # Метадані схеми кешуються так само, як у DBModel; рідкі перезавантаження каталогу
+        # йдуть окремим звичайним підключенням у потоці виконавця, щоб не блокувати цикл подій.
+        self._catalog_conn = None
+        self.catalog = SchemaCatalog(self._sync_conn, CATALOG_CHECK_INTERVAL)
+
+    @classmethod
+    async def create(cls) -> "AsyncDBModel":
+        model = cls()
+        try:
+            await model.pool.open()
+        except Exception as e:
+            raise RuntimeError("Не вдалося підключитися до бази даних. Перевірте налаштування в config.py") from e
+        return model
+
+    async def close(self):
+        self.pool.closeall()
+        if self._catalog_conn is not None:
+            self._catalog_conn.close()
+
+    @contextmanager
+    def _sync_conn(self):
+        if self._catalog_conn is None or self._catalog_conn.closed:
+            self._catalog_conn = psycopg2.connect(**DB)
+            self._catalog_conn.autocommit = True
+        yield self._catalog_conn
+
+    async def _schema(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self.pool.stats()
+
+    def _note_error(self, e: psycopg2.Error):
+        if e.pgcode in SCHEMA_ERROR_CODES:
+            self.catalog.invalidate()
+
+    async def _execute(self, query, params=None, fetch: bool = True):
+        """Виконати один оператор на підключенні з пулу. fetch=True — повернути рядки-словники."""
+        async with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(query, params)
+                await wait_ready(conn)
+                return _dict_rows(cur) if fetch and cur.description else None
+            finally:
+                cur.close()
+
+    # --- Інспекція схеми ---
+    async def list_tables(self) -> List[str]:
+        return await self._schema(self.catalog.tables)
+
+    async def columns_info(self, table: str) -> List[Dict[str, Any]]:
+        return await self._schema(self.catalog.columns, table)
+
+    async def primary_key(self, table: str) -> Optional[str]:
+        return await self._schema(self.catalog.primary_key, table)
+
+    async def foreign_keys(self, table: str) -> List[tuple]:
+        return await self._schema(self.catalog.foreign_keys, table)
+
+    async def referencing_keys(self, table: str, column: Optional[str] = None) -> List[tuple]:
+        return await self._schema(self.catalog.referencing, table, column)
+
+    # --- CRUD ---
+    async def select_all(self, table: str, limit: int = 200) -> List[Dict[str, Any]]:
+        return await self._execute(
+            sql.SQL('SELECT * FROM {} ORDER BY 1 LIMIT %s').format(sql.Identifier(table)), (limit,))
+
+    async def select_by_pk(self, table: str, pk: str, pk_value: Any) -> Optional[Dict[str, Any]]:
+        rows = await self._execute(
+            sql.SQL('SELECT * FROM {} WHERE {}=%s').format(sql.Identifier(table), sql.Identifier(pk)), (pk_value,))
+        return rows[0] if rows else None
+
+    async def _write(self, query, params) -> Tuple[bool, Optional[str]]:
+        try:
+            await self._execute(query, params, fetch=False)
+            return True, None
+        except psycopg2.Error as e:
+            self._note_error(e)
+            return False, e.pgerror or str(e)
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        cols = list(data.keys())
+        query = sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(map(sql.Identifier, cols)),
+            sql.SQL(', ').join(sql.Placeholder() * len(cols))
+        )
+        return await self._write(query, [data[c] for c in cols])
+
+    async def update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        cols = list(data.keys())
+        query = sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(sql.Composed([sql.Identifier(c), sql.SQL(' = '), sql.Placeholder()]) for c in cols),
+            sql.Identifier(pk)
+        )
+        return await self._write(query, [data[c] for c in cols] + [pk_value])
+
+    async def delete(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, Optional[str]]:
+        query = sql.SQL('DELETE FROM {} WHERE {} = %s').format(sql.Identifier(table), sql.Identifier(pk))
+        return await self._write(query, (pk_value,))
+
+    # --- FK ---
+    async def has_child_rows(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
+        fks = await self._schema(self.catalog.referencing, parent_table, parent_pk)
+        if not fks:
+            return False
+        query = sql.SQL('SELECT {} AS has_children').format(sql.SQL(' OR ').join(
+            sql.SQL('EXISTS (SELECT 1 FROM {} WHERE {} = %s)').format(sql.Identifier(e[1]), sql.Identifier(e[2]))
+            for e in fks
+        ))
+        rows = await self._execute(query, (pk_value,) * len(fks))
+        return rows[0]["has_children"]
+
+    async def parent_exists(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
+        rows = await self._execute(sql.SQL('SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %s) AS found').format(
+            sql.Identifier(parent_table), sql.Identifier(parent_pk)), (pk_value,))
+        return rows[0]["found"]
+
+    # --- Складні запити: ті самі тексти й параметри, що в DBModel; повертають (rows, timing, plan, err) ---
+    async def query_student_tasks_by_name(self, student_name_pattern: str, explain: bool = False):
+        return await self._run_timed_query(STUDENT_TASKS_SQL, (f"%{student_name_pattern}%",), explain)
+
+    async def query_professor_course_counts(self, min_experience: int, explain: bool = False):
+        return await self._run_timed_query(PROFESSOR_COURSES_SQL, (min_experience,), explain)
+
+    async def query_course_regs_in_period(self, start_date: str, end_date: str, explain: bool = False):
+        return await self._run_timed_query(COURSE_REGS_SQL, (start_date, end_date), explain)
+
+    async def _run_timed_query(self, sql_text: str, params: tuple, explain: bool = False):
+        timing: Dict[str, Any] = {"wall_ms": None, "execute_ms": None, "fetch_ms": None, "rows": 0, "cached": False}
+        async with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                t0 = time.perf_counter()
+                cur.execute(sql_text, params)
+                await wait_ready(conn)
+                t1 = time.perf_counter()
+                rows = _dict_rows(cur)
+                t2 = time.perf_counter()
+            except psycopg2.Error as e:
+                self._note_error(e)
+                return [], timing, None, e.pgerror or str(e)
+            finally:
+                cur.close()
+        timing.update(wall_ms=(t2 - t0) * 1000, execute_ms=(t1 - t0) * 1000,
+                      fetch_ms=(t2 - t1) * 1000, rows=len(rows))
+        plan = await self.explain_plan(sql_text, params) if explain else None
+        return rows, timing, plan, None
+
+    async def explain_plan(self, sql_text: str, params: tuple) -> Optional[Dict[str, Any]]:
+        try:
+            rows = await self._execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql_text, params)
+        except psycopg2.Error:
+            return None
+        return plans.parse_explain_json(next(iter(rows[0].values())))
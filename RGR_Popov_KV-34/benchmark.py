@@ -0,0 +1,498 @@
+# benchmark.py
+"""
+Відтворюваний бенчмарк трьох аналітичних запитів DBModel на різних обсягах Registration.
+
+Приклади:
+    python benchmark.py run --scales 10000,100000,1000000 --repeat 30 --out run_a.json
+    python benchmark.py run --scales 100000,1000000 --profile skewed.json --out run_skew.json
+    python benchmark.py compare run_a.json run_b.json --threshold 10
+    python benchmark.py concurrency --rounds 10 --lookups 20
+    python benchmark.py pruning --periods 5
+    python benchmark.py rowmem --rows 1000000
+    python benchmark.py generation --rows 2000000 --processes 1,2,4,8
+    python benchmark.py snapshot --repeat 20
+
+run: доводить базу до кожного масштабу (кількість реєстрацій; решта таблиць пропорційно)
+наявними генераторами, робить ANALYZE і прогрів, потім виконує кожен запит N разів
+з різними параметрами і пише p50/p95/p99 та пропускну здатність у JSON.
+З --profile дані для кожного масштабу генеруються заново (TRUNCATE!) профілем з перекосами
+(workload.py: Ципф для курсів і викладачів, сплески на початку семестрів, fan-out на студента) —
+той самий профіль і зерно дають ті самі дані в кожному запуску.
+compare: порівнює два такі файли і позначає регресії (код виходу 1, якщо вони є).
+concurrency: на наявних даних виконує набір "три звіти + N пошуків за PK" через AsyncDBModel
+спершу послідовно, потім через asyncio.gather, і порівнює час набору.
+pruning: для секціонованої Registration показує з EXPLAIN, скільки секцій читає звіт за період.
+generation: час паралельної генерації (scheduler.py) для різної кількості процесів-працівників;
+перед кожним виміром таблиці очищаються (TRUNCATE!).
+snapshot: знімає стовпцевий знімок (snapshot.py, numpy) і виконує звіти з тими самими параметрами
+на сервері та на знімку: порівнює результати (код виходу 1, якщо вони різні) і затримки.
+rowmem: пам'ять і час fetchall() N рядків у вигляді словників RealDictCursor, компактних рядків
+(rows.py) і звичайних кортежів; дані генерує сам сервер (generate_series), таблиці не потрібні.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+import psycopg2.extensions
+import psycopg2.extras
+
+from config import SNAPSHOT_PATH
+from models import DBModel
+from queries import QUERIES, percentile, period_param
+from rows import CompactRowCursor
+from scheduler import GenerationScheduler
+from workload import WorkloadGenerator, WorkloadProfile
+
+TABLES = ["Student", "Professor", "Course", "Task", "Registration"]
+
+# Скільки рядків кожної таблиці на одну реєстрацію (мінімум — щоб на малих масштабах було з чого вибирати)
+SCALE_RATIOS = {
+    "Student": (0.1, 10),
+    "Professor": (0.001, 10),
+    "Course": (0.01, 10),
+    "Task": (0.05, 10),
+    "Registration": (1.0, 1),
+}
+
+
+def summarize(latencies_ms: List[float], total_s: float) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "runs": len(values),
+        "min_ms": values[0] if values else 0.0,
+        "mean_ms": sum(values) / len(values) if values else 0.0,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else 0.0,
+        "throughput_qps": len(values) / total_s if total_s > 0 else 0.0,
+    }
+
+
+# --- Підготовка даних ---
+def table_counts(model: DBModel) -> Dict[str, int]:
+    counts = {}
+    with model.connection() as conn, conn.cursor() as cur:
+        for t in TABLES:
+            cur.execute(f'SELECT count(*) FROM "{t}"')
+            counts[t] = cur.fetchone()[0]
+    return counts
+
+
+def reset_tables(model: DBModel):
+    with model.connection() as conn, conn.cursor() as cur:
+        cur.execute('TRUNCATE ' + ", ".join(f'"{t}"' for t in reversed(TABLES)) + ' RESTART IDENTITY CASCADE')
+    model.result_cache.invalidate(*TABLES)
+    model.ids.forget()
+
+
+def seed_to_scale(model: DBModel, scale: int, log=print):
+    """Догенерувати рядки, щоб кожна таблиця мала не менше цільової кількості для масштабу."""
+    generators = {
+        "Student": model.generate_students,
+        "Professor": model.generate_professors,
+        "Course": model.generate_courses,
+        "Task": model.generate_tasks,
+        "Registration": model.generate_registrations,
+    }
+    counts = table_counts(model)
+    for table in TABLES:
+        ratio, minimum = SCALE_RATIOS[table]
+        missing = max(int(scale * ratio), minimum) - counts[table]
+        if missing <= 0:
+            continue
+        ok, err = generators[table](missing)
+        if not ok:
+            raise RuntimeError(f"{table}: не вдалося згенерувати дані: {err}")
+        stats = model.load_stats.get(table)
+        if stats:
+            log(f"  {table}: +{stats['rows']} рядків ({stats['rows_per_sec']:.0f} рядків/с)")
+    with model.connection() as conn, conn.cursor() as cur:
+        cur.execute("ANALYZE")
+
+
+# --- Вимірювання ---
+def run_query_set(model: DBModel, repeat: int, warmup: int, seed: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with model.result_cache.disabled():  # міряємо сам запит, а не кеш результатів
+        for name, (method_name, param_fn) in QUERIES.items():
+            method = getattr(model, method_name)
+            rnd = random.Random(f"{seed}:{name}")
+            for _ in range(warmup):
+                method(*param_fn(rnd))
+            rnd = random.Random(f"{seed}:{name}")
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(repeat):
+                _, timing, _, err = method(*param_fn(rnd))
+                if err:
+                    raise RuntimeError(f"{name}: {err}")
+                latencies.append(timing["wall_ms"])
+            results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+
+def seed_workload(model: DBModel, generator: WorkloadGenerator, scale: int, log=print):
+    """Очистити таблиці й заповнити їх профілем навантаження (≈ scale реєстрацій)."""
+    reset_tables(model)
+    generator.populate(generator.counts_for_scale(scale, SCALE_RATIOS), log=log)
+    with model.connection() as conn, conn.cursor() as cur:
+        cur.execute("ANALYZE")
+
+
+def cmd_run(args) -> int:
+    scales = sorted(int(s) for s in args.scales.split(","))
+    profile = WorkloadProfile.load(args.profile) if args.profile is not None else None
+    model = DBModel()
+    generator = WorkloadGenerator(model, profile) if profile else None
+    try:
+        if args.reset:
+            reset_tables(model)
+        with model.connection() as conn:
+            server_version = conn.server_version
+        report: Dict[str, Any] = {
+            "meta": {
+                "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "scales": scales,
+                "repeat": args.repeat,
+                "warmup": args.warmup,
+                "seed": args.seed,
+                "server_version": server_version,
+                "workload": profile.as_dict() if profile else None,
+            },
+            "results": {},
+        }
+        for scale in scales:
+            print(f"Масштаб {scale}: підготовка даних...")
+            if generator:
+                seed_workload(model, generator, scale)
+            else:
+                random.seed(args.seed + scale)
+                seed_to_scale(model, scale)
+            report["results"][str(scale)] = {
+                "counts": table_counts(model),
+                "queries": run_query_set(model, args.repeat, args.warmup, args.seed),
+            }
+            for name, s in report["results"][str(scale)]["queries"].items():
+                print(f"  {name}: p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, "
+                      f"p99 {s['p99_ms']:.2f} ms, {s['throughput_qps']:.1f} q/s")
+    finally:
+        model.close()
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Результат записано у {args.out}")
+    else:
+        print(text)
+    return 0
+
+
+def compare_reports(base: Dict[str, Any], new: Dict[str, Any], threshold_pct: float) -> List[Dict[str, Any]]:
+    rows = []
+    for scale, base_scale in base["results"].items():
+        new_scale = new["results"].get(scale)
+        if not new_scale:
+            continue
+        for name, b in base_scale["queries"].items():
+            n = new_scale["queries"].get(name)
+            if not n:
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms"):
+                delta = (n[metric] - b[metric]) / b[metric] * 100 if b[metric] else 0.0
+                rows.append({
+                    "scale": scale, "query": name, "metric": metric,
+                    "base": round(b[metric], 3), "new": round(n[metric], 3),
+                    "delta_pct": round(delta, 1),
+                    "status": "REGRESSION" if delta > threshold_pct else ("faster" if delta < -threshold_pct else ""),
+                })
+    return rows
+
+
+# --- Послідовно чи одночасно (AsyncDBModel) ---
+def _workload(rnd: random.Random, student_ids: List[int], lookups: int) -> List[Tuple[str, tuple]]:
+    """Один набір: кожен звіт з випадковими параметрами і lookups пошуків студента за PK."""
+    calls = [(method_name, param_fn(rnd)) for method_name, param_fn in QUERIES.values()]
+    calls += [("select_by_pk", ("Student", "Student_ID", rnd.choice(student_ids))) for _ in range(lookups)]
+    return calls
+
+
+async def _run_concurrency(args) -> Dict[str, Any]:
+    from async_models import AsyncDBModel
+    model = await AsyncDBModel.create()
+    try:
+        ids = await model.select_all("Student", limit=1000)
+        student_ids = [r["Student_ID"] for r in ids] or [1]
+        rnd = random.Random(args.seed)
+        rounds = [_workload(rnd, student_ids, args.lookups) for _ in range(args.rounds + args.warmup)]
+
+        async def one(method_name, params):
+            await getattr(model, method_name)(*params)
+
+        timings = {"sequential": [], "gather": []}
+        for i, calls in enumerate(rounds):
+            t0 = time.perf_counter()
+            for method_name, params in calls:
+                await one(method_name, params)
+            t1 = time.perf_counter()
+            await asyncio.gather(*(one(m, p) for m, p in calls))
+            t2 = time.perf_counter()
+            if i >= args.warmup:
+                timings["sequential"].append((t1 - t0) * 1000)
+                timings["gather"].append((t2 - t1) * 1000)
+        report = {mode: summarize(values, sum(values) / 1000) for mode, values in timings.items()}
+        for s in report.values():
+            s["throughput_sets_per_s"] = s.pop("throughput_qps")
+        report["calls_per_set"] = len(rounds[0])
+        report["speedup_p50"] = (report["sequential"]["p50_ms"] / report["gather"]["p50_ms"]
+                                 if report["gather"]["p50_ms"] else 0.0)
+        report["pool"] = model.pool_stats()
+        return report
+    finally:
+        await model.close()
+
+
+def cmd_concurrency(args) -> int:
+    report = asyncio.run(_run_concurrency(args))
+    for mode in ("sequential", "gather"):
+        s = report[mode]
+        print(f"{mode}: p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms на набір з {report['calls_per_set']} запитів")
+    print(f"Прискорення (p50): x{report['speedup_p50']:.2f}, пік підключень: {report['pool']['max_in_use']}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"Результат записано у {args.out}")
+    return 0
+
+
+# --- Відсікання секцій (partition pruning) ---
+def cmd_pruning(args) -> int:
+    from tabulate import tabulate
+    model = DBModel()
+    try:
+        if not model.partitions.is_partitioned():
+            print("Registration не секціонована — спершу перетворіть її (меню 12 або PartitionManager.convert).")
+            return 1
+        total = len(model.partitions.partitions())
+        rnd = random.Random(args.seed)
+        rows = []
+        for _ in range(args.periods):
+            start, end = period_param(rnd)
+            _, _, plan, err = model.query_course_regs_in_period(start, end, explain=True)
+            if err or not plan:
+                raise RuntimeError(f"course_regs_in_period: {err or 'EXPLAIN не вдався'}")
+            nodes = list(plan["root"].walk())
+            scanned = sorted({n.relation for n in nodes if n.relation and n.relation.startswith("Registration")})
+            rows.append({
+                "period": f"{start}..{end}",
+                "scanned": len(scanned),
+                "total": total,
+                "removed_at_runtime": sum(n.subplans_removed for n in nodes),
+                "partitions": f"{scanned[0]}..{scanned[-1]}" if scanned else "",
+                "execution_ms": plan["execution_ms"],
+            })
+    finally:
+        model.close()
+    print(tabulate(rows, headers="keys", tablefmt="psql"))
+    return 0
+
+
+# --- Паралельна генерація ---
+def cmd_generation(args) -> int:
+    from tabulate import tabulate
+    model = DBModel(pooled=True)   # потокам таблиць потрібні окремі підключення
+    # пропорції таблиць — як у seed_to_scale
+    counts = {t: max(int(args.rows * SCALE_RATIOS[t][0]), SCALE_RATIOS[t][1]) for t in TABLES}
+    rows = []
+    try:
+        for processes in sorted(int(p) for p in args.processes.split(",")):
+            reset_tables(model)
+            scheduler = GenerationScheduler(model, processes=processes, min_rows_per_worker=args.min_rows)
+            started = time.perf_counter()
+            results = scheduler.run(counts)
+            seconds = time.perf_counter() - started
+            failed = {t: err for t, (ok, err) in results.items() if not ok}
+            if failed:
+                raise RuntimeError(f"Генерація не вдалася: {failed}")
+            rows.append({"processes": processes, "rows": sum(counts.values()), "seconds": seconds,
+                         "rows_per_sec": sum(counts.values()) / seconds})
+    finally:
+        model.close()
+    base = rows[0]["seconds"]
+    for r in rows:
+        r["speedup"] = base / r["seconds"]
+    print(tabulate(rows, headers="keys", tablefmt="psql", floatfmt=".2f"))
+    return 0
+
+
+# --- Стовпцевий знімок проти SQL ---
+def cmd_snapshot(args) -> int:
+    from tabulate import tabulate
+    import snapshot
+    model = DBModel()
+    rows = []
+    mismatches = 0
+    try:
+        if args.reuse and snapshot.Snapshot.exists(args.path):
+            snap = snapshot.Snapshot.open(args.path)
+        else:
+            snap = snapshot.Snapshot.build(model, args.path)
+        print(f"Знімок: {snap.meta['rows']}, знято за {snap.meta['build_seconds']:.2f} с")
+        with model.result_cache.disabled():
+            for name, (method_name, param_fn) in QUERIES.items():
+                rnd = random.Random(f"{args.seed}:{name}")
+                latencies: Dict[str, List[float]] = {"sql": [], "snapshot": []}
+                for _ in range(args.repeat):
+                    params = param_fn(rnd)
+                    expected, timing, _, err = getattr(model, method_name)(*params)
+                    if err:
+                        raise RuntimeError(f"{name}: {err}")
+                    actual, snap_timing, _, _ = getattr(snap, method_name)(*params)
+                    latencies["sql"].append(timing["wall_ms"])
+                    latencies["snapshot"].append(snap_timing["wall_ms"])
+                    if not snapshot.same_result(expected, actual):
+                        mismatches += 1
+                        print(f"  {name}{params}: результат знімка відрізняється від SQL")
+                sql_s = summarize(latencies["sql"], sum(latencies["sql"]) / 1000)
+                snap_s = summarize(latencies["snapshot"], sum(latencies["snapshot"]) / 1000)
+                rows.append({"query": name, "sql_p50_ms": sql_s["p50_ms"], "snapshot_p50_ms": snap_s["p50_ms"],
+                             "snapshot_p95_ms": snap_s["p95_ms"],
+                             "speedup": sql_s["p50_ms"] / snap_s["p50_ms"] if snap_s["p50_ms"] else 0.0})
+    finally:
+        model.close()
+    print(tabulate(rows, headers="keys", tablefmt="psql", floatfmt=".3f"))
+    if mismatches:
+        print(f"\nРозбіжностей: {mismatches}")
+        return 1
+    return 0
+
+
+# --- Пам'ять рядків результату ---
+ROWMEM_SQL = """
+SELECT g AS "Registration_ID", g % 50000 + 1 AS "Student_ID", g % 500 + 1 AS "Course_ID",
+       g % 100 + 1 AS "Professor_ID", DATE '2024-01-01' + g % 1000 AS "Date", 'Студент ' || g % 1000 AS note
+FROM generate_series(1, %s) g
+"""
+
+ROW_FACTORIES = {
+    "dict (RealDictCursor)": psycopg2.extras.RealDictCursor,
+    "compact (rows.py)": CompactRowCursor,
+    "tuple": psycopg2.extensions.cursor,
+}
+
+
+def cmd_rowmem(args) -> int:
+    from tabulate import tabulate
+    model = DBModel()
+    results = []
+    try:
+        with model.connection() as conn:
+            for label, factory in ROW_FACTORIES.items():
+                # час — без tracemalloc (він сповільнює кожне виділення), пам'ять — окремим проходом
+                with conn.cursor(cursor_factory=factory) as cur:
+                    started = time.perf_counter()
+                    cur.execute(ROWMEM_SQL, (args.rows,))
+                    fetched = cur.fetchall()
+                    seconds = time.perf_counter() - started
+                del fetched
+                tracemalloc.start()
+                with conn.cursor(cursor_factory=factory) as cur:
+                    cur.execute(ROWMEM_SQL, (args.rows,))
+                    fetched = cur.fetchall()
+                retained, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del fetched
+                results.append({
+                    "rows": label,
+                    "retained_mb": retained / 2 ** 20,
+                    "peak_mb": peak / 2 ** 20,
+                    "bytes_per_row": retained / args.rows,
+                    "fetch_s": seconds,
+                })
+    finally:
+        model.close()
+    print(tabulate(results, headers="keys", tablefmt="psql", floatfmt=".2f"))
+    return 0
+
+
+def cmd_compare(args) -> int:
+    from tabulate import tabulate
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare_reports(base, new, args.threshold)
+    print(tabulate(rows, headers="keys", tablefmt="psql"))
+    regressions = [r for r in rows if r["status"] == "REGRESSION"]
+    if regressions:
+        print(f"\nРегресій: {len(regressions)} (поріг {args.threshold}%)")
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Бенчмарк аналітичних запитів DBModel")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="заповнити базу до масштабів і виміряти запити")
+    run.add_argument("--scales", default="10000,100000,1000000", help="кількості реєстрацій через кому")
+    run.add_argument("--repeat", type=int, default=20, help="скільки разів виконувати кожен запит")
+    run.add_argument("--warmup", type=int, default=3, help="скільки прогрівальних запусків")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--reset", action="store_true", help="спершу очистити всі таблиці (TRUNCATE!)")
+    run.add_argument("--profile", nargs="?", const="",
+                     help="дані з перекосами за профілем (JSON; без файлу — config.WORKLOAD); TRUNCATE!")
+    run.add_argument("--out", help="файл для JSON-звіту")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="порівняти два JSON-звіти")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=10.0, help="поріг регресії у відсотках")
+    cmp_.set_defaults(func=cmd_compare)
+
+    conc = sub.add_parser("concurrency", help="послідовне виконання набору запитів проти asyncio.gather")
+    conc.add_argument("--rounds", type=int, default=10, help="скільки наборів виміряти")
+    conc.add_argument("--warmup", type=int, default=2, help="скільки прогрівальних наборів")
+    conc.add_argument("--lookups", type=int, default=20, help="пошуків за PK у кожному наборі")
+    conc.add_argument("--seed", type=int, default=42)
+    conc.add_argument("--out", help="файл для JSON-звіту")
+    conc.set_defaults(func=cmd_concurrency)
+
+    prune = sub.add_parser("pruning", help="скільки секцій Registration читає звіт за період (EXPLAIN)")
+    prune.add_argument("--periods", type=int, default=5, help="скільки випадкових періодів перевірити")
+    prune.add_argument("--seed", type=int, default=42)
+    prune.set_defaults(func=cmd_pruning)
+
+    gen = sub.add_parser("generation", help="масштабування паралельної генерації за кількістю процесів (TRUNCATE!)")
+    gen.add_argument("--rows", type=int, default=2_000_000, help="кількість реєстрацій (решта таблиць пропорційно)")
+    gen.add_argument("--processes", default="1,2,4", help="кількості процесів через кому")
+    gen.add_argument("--min-rows", type=int, default=50_000, help="мінімум рядків на одну частину")
+    gen.set_defaults(func=cmd_generation)
+
+    snap = sub.add_parser("snapshot", help="звіти на стовпцевому знімку (numpy) проти SQL: збіг і затримки")
+    snap.add_argument("--path", default=SNAPSHOT_PATH, help="каталог знімка")
+    snap.add_argument("--reuse", action="store_true", help="не знімати заново, якщо знімок уже є")
+    snap.add_argument("--repeat", type=int, default=20, help="скільки наборів параметрів на запит")
+    snap.add_argument("--seed", type=int, default=42)
+    snap.set_defaults(func=cmd_snapshot)
+
+    rowmem = sub.add_parser("rowmem", help="пам'ять рядків результату: словники проти компактних рядків")
+    rowmem.add_argument("--rows", type=int, default=1_000_000, help="скільки рядків отримати")
+    rowmem.set_defaults(func=cmd_rowmem)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
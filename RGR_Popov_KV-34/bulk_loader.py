@@ -0,0 +1,115 @@
+# bulk_loader.py
+"""
+Масове завантаження рядків через COPY ... FROM STDIN.
+
+Рядки беруться з генератора і перетворюються на текстовий формат COPY "на льоту",
+тому в пам'яті клієнта одночасно лежить лише один блок буфера, а не вся вибірка.
+"""
+import io
+import time
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from psycopg2 import sql
+
+
+def copy_escape(value: Any) -> str:
+    """Перетворити значення на поле текстового формату COPY (NULL -> \\N)."""
+    if value is None:
+        return "\\N"
+    s = str(value)
+    if "\\" in s or "\t" in s or "\n" in s or "\r" in s:
+        s = s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return s
+
+
+class RowStream(io.TextIOBase):
+    """
+    Файлоподібний об'єкт для cursor.copy_expert: читає кортежі з генератора
+    і віддає їх блоками у форматі COPY. Рахує кількість переданих рядків.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        super().__init__()
+        self._rows = iter(rows)
+        self._buf = ""
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int):
+        parts = [self._buf]
+        n = len(self._buf)
+        while size < 0 or n < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = "\t".join(map(copy_escape, row)) + "\n"
+            parts.append(line)
+            n += len(line)
+            self.count += 1
+        self._buf = "".join(parts)
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            self._fill(-1)
+            out, self._buf = self._buf, ""
+            return out
+        self._fill(size)
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        while "\n" not in self._buf:
+            before = len(self._buf)
+            self._fill(before + 1)
+            if len(self._buf) == before:
+                break
+        idx = self._buf.find("\n")
+        end = len(self._buf) if idx < 0 else idx + 1
+        if size is not None and 0 <= size < end:
+            end = size
+        out, self._buf = self._buf[:end], self._buf[end:]
+        return out
+
+
+def _chunks(rows: Iterable[Sequence[Any]], chunk_rows: int) -> Iterator[Iterator[Sequence[Any]]]:
+    it = iter(rows)
+    while True:
+        first = next(it, None)
+        if first is None:
+            return
+        yield chain((first,), islice(it, chunk_rows - 1))
+
+
+def copy_rows(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+              chunk_rows: int, buffer_size: int = 8192) -> Dict[str, Any]:
+    """
+    Завантажити рядки в таблицю порціями по chunk_rows: кожна порція — окремий COPY
+    і окремий коміт (в autocommit кожен COPY і так є окремою транзакцією).
+    Повертає статистику {"table", "rows", "seconds", "rows_per_sec"}.
+    """
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    total = 0
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        for chunk in _chunks(rows, max(1, chunk_rows)):
+            stream = RowStream(chunk)
+            cur.copy_expert(query, stream, size=buffer_size)
+            if not conn.autocommit:
+                conn.commit()
+            total += stream.count
+    return make_stats(table, total, time.perf_counter() - started)
+
+
+def make_stats(table: str, rows: int, seconds: float) -> Dict[str, Any]:
+    return {
+        "table": table,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,107 @@
+# cascade.py
+"""
+Планувальник каскадного видалення за графом FK з каталогу.
+
+Від кореневої таблиці обходимо зворотні FK і для кожної досяжної таблиці будуємо CTE з рядками,
+що підлягають видаленню (у множинній формі: WHERE fk IN (SELECT ... FROM cte_батька)).
+Далі один оператор з data-modifying CTE видаляє їх від листків до кореня. Усі частини оператора
+бачать один знімок даних, а перевірки FK (NO ACTION) виконуються в кінці оператора,
+тому тисячі батьківських рядків видаляються без жодного запиту на рядок.
+Рядки ідентифікуються парою (tableoid, ctid): у секціонованій таблиці (Registration) ctid
+унікальний лише в межах однієї секції.
+"""
+from typing import Dict, List, Tuple
+
+from psycopg2 import sql
+
+
+class CascadeCycleError(ValueError):
+    """Граф FK від цієї таблиці містить цикл — каскад не будується."""
+
+
+class CascadePlan:
+    def __init__(self, tables: List[str], select_ctes: List[sql.Composable], delete_ctes: List[sql.Composable]):
+        self.tables = tables              # у порядку "батьки -> діти"; видалення йде у зворотному
+        self.select_ctes = select_ctes    # sN AS (SELECT ...) — рядки кожної таблиці, які зачепить каскад
+        self.delete_ctes = delete_ctes    # dN AS (DELETE ... RETURNING 1), від листків до кореня
+
+    def preview_query(self) -> sql.Composed:
+        counts = sql.SQL(' UNION ALL ').join(
+            sql.SQL('SELECT {}, count(*) FROM {}').format(sql.Literal(t), sql.Identifier(f"s{i}"))
+            for i, t in enumerate(self.tables)
+        )
+        return sql.SQL('WITH {} {}').format(sql.SQL(', ').join(self.select_ctes), counts)
+
+    def delete_query(self) -> sql.Composed:
+        counts = sql.SQL(' UNION ALL ').join(
+            sql.SQL('SELECT {}, count(*) FROM {}').format(sql.Literal(t), sql.Identifier(f"d{i}"))
+            for i, t in enumerate(self.tables)
+        )
+        return sql.SQL('WITH {}, {} {}').format(
+            sql.SQL(', ').join(self.select_ctes), sql.SQL(', ').join(self.delete_ctes), counts)
+
+
+def _reachable(catalog, root: str) -> Dict[str, List[Tuple[str, str, str]]]:
+    """{таблиця: [(стовпець_FK, батьківська_таблиця, батьківський_стовпець)]} для всіх досяжних від root."""
+    incoming: Dict[str, List[Tuple[str, str, str]]] = {root: []}
+    stack = [root]
+    while stack:
+        parent = stack.pop()
+        for _, child, child_col, _, parent_col in catalog.referencing(parent):
+            if child == root or child == parent:
+                raise CascadeCycleError(f"Цикл FK: {child}.{child_col} -> {parent}")
+            if child not in incoming:
+                incoming[child] = []
+                stack.append(child)
+            incoming[child].append((child_col, parent, parent_col))
+    return incoming
+
+
+def _topological(incoming: Dict[str, List[Tuple[str, str, str]]], root: str) -> List[str]:
+    order: List[str] = []
+    state: Dict[str, int] = {}   # 1 — у обробці, 2 — готово
+
+    def visit(table: str):
+        if state.get(table) == 2:
+            return
+        if state.get(table) == 1:
+            raise CascadeCycleError(f"Цикл FK через таблицю {table}")
+        state[table] = 1
+        for _, parent, _ in incoming[table]:
+            visit(parent)
+        state[table] = 2
+        order.append(table)
+
+    visit(root)
+    for table in sorted(incoming):
+        visit(table)
+    return order
+
+
+def build_plan(catalog, root: str, root_pk: str, pk_type: str) -> CascadePlan:
+    """
+    Побудувати план для root WHERE root_pk = ANY(%s::pk_type[]). Єдиний параметр запиту — масив ключів.
+    """
+    incoming = _reachable(catalog, root)
+    tables = _topological(incoming, root)
+    index = {t: i for i, t in enumerate(tables)}
+    select_ctes = []
+    for i, table in enumerate(tables):
+        if table == root:
+            where = sql.SQL('t.{} = ANY(%s::{}[])').format(sql.Identifier(root_pk), sql.SQL(pk_type))
+        else:
+            where = sql.SQL(' OR ').join(
+                sql.SQL('t.{} IN (SELECT p.{} FROM {} p)').format(
+                    sql.Identifier(col), sql.Identifier(pcol), sql.Identifier(f"s{index[parent]}"))
+                for col, parent, pcol in incoming[table]
+            )
+        select_ctes.append(sql.SQL('{} AS (SELECT t.tableoid AS row_tableoid, t.ctid AS row_ctid, t.* FROM {} t WHERE {})').format(
+            sql.Identifier(f"s{i}"), sql.Identifier(table), where))
+    delete_ctes = []
+    for i in reversed(range(len(tables))):
+        # ctid = ANY(ARRAY(...)) лишає TID Scan, пара з tableoid відсікає однакові ctid з інших секцій
+        delete_ctes.append(sql.SQL(
+            '{d} AS (DELETE FROM {t} t WHERE t.ctid = ANY(ARRAY(SELECT row_ctid FROM {s})) '
+            'AND (t.tableoid, t.ctid) IN (SELECT row_tableoid, row_ctid FROM {s}) RETURNING 1)'
+        ).format(d=sql.Identifier(f"d{i}"), t=sql.Identifier(tables[i]), s=sql.Identifier(f"s{i}")))
+    return CascadePlan(tables, select_ctes, delete_ctes)
@@ -0,0 +1,201 @@
+# catalog.py
+"""
+Кеш метаданих схеми public: таблиці, стовпці, первинні ключі та граф зовнішніх ключів.
+
+Усе читається з pg_catalog одним заходом і далі віддається з пам'яті.
+Кеш скидається явно (invalidate) або коли змінюється "відбиток" каталогу (DDL),
+який перевіряється не частіше ніж раз на CATALOG_CHECK_INTERVAL секунд.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TABLES_Q = """
+SELECT c.oid, c.relname
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+ORDER BY c.relname;
+"""
+
+COLUMNS_Q = """
+SELECT a.attrelid, a.attname, format_type(a.atttypid, NULL), NOT a.attnotnull
+FROM pg_attribute a
+WHERE a.attrelid = ANY(%s) AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attrelid, a.attnum;
+"""
+
+PK_Q = """
+SELECT i.indrelid, a.attname
+FROM pg_index i
+CROSS JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+WHERE i.indisprimary AND i.indrelid = ANY(%s)
+ORDER BY i.indrelid, k.ord;
+"""
+
+FK_Q = """
+SELECT con.conname, ch.relname, cha.attname, pa.relname, paa.attname
+FROM pg_constraint con
+JOIN pg_class ch ON ch.oid = con.conrelid
+JOIN pg_class pa ON pa.oid = con.confrelid
+CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(child_att, parent_att)
+JOIN pg_attribute cha ON cha.attrelid = con.conrelid AND cha.attnum = k.child_att
+JOIN pg_attribute paa ON paa.attrelid = con.confrelid AND paa.attnum = k.parent_att
+WHERE con.contype = 'f' AND con.conrelid = ANY(%s)
+ORDER BY ch.relname, con.conname;
+"""
+
+# Відбиток DDL: xmin рядків pg_class/pg_attribute/pg_constraint змінюється при ALTER/CREATE/DROP
+FINGERPRINT_Q = """
+SELECT md5(string_agg(x, ',' ORDER BY x)) FROM (
+    SELECT c.oid::text || ':' || c.xmin::text AS x
+    FROM pg_class c
+    WHERE c.relnamespace = 'public'::regnamespace AND c.relkind IN ('r', 'p')
+    UNION ALL
+    SELECT a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text
+    FROM pg_attribute a
+    JOIN pg_class c ON c.oid = a.attrelid
+    WHERE c.relnamespace = 'public'::regnamespace AND c.relkind IN ('r', 'p') AND a.attnum > 0
+    UNION ALL
+    SELECT 'k' || con.oid::text || ':' || con.xmin::text
+    FROM pg_constraint con
+    WHERE con.connamespace = 'public'::regnamespace
+) s;
+"""
+
+# Ребро графа FK: (constraint, child_table, child_col, parent_table, parent_col)
+FKEdge = Tuple[str, str, str, str, str]
+
+
+class SchemaCatalog:
+    def __init__(self, conn_factory: Callable, check_interval: float = 5.0):
+        """
+        conn_factory — функція без аргументів, що повертає контекстний менеджер з підключенням.
+        """
+        self._conn_factory = conn_factory
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._fingerprint: Optional[str] = None
+        self._checked_at = 0.0
+        self._tables: List[str] = []
+        self._columns: Dict[str, List[Dict[str, Any]]] = {}
+        self._pk: Dict[str, List[str]] = {}
+        self._fks: List[FKEdge] = []
+        self._fks_out: Dict[str, List[FKEdge]] = {}
+        self._fks_in: Dict[str, List[FKEdge]] = {}
+        # Лічильник версій: зростає при кожному перезавантаженні (для залежних кешів)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.checks = 0
+
+    # --- Керування кешем ---
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "checks": self.checks,
+            "version": self.version,
+            "tables": len(self._tables),
+        }
+
+    def _ensure(self):
+        if self._loaded and time.monotonic() - self._checked_at < self._check_interval:
+            self.hits += 1
+            return
+        with self._lock:
+            if not self._loaded:
+                self.misses += 1
+                self._load()
+            elif time.monotonic() - self._checked_at >= self._check_interval:
+                # кеш є, але давно не звіряли відбиток — перевіримо, чи не було DDL
+                self.checks += 1
+                if self._read_fingerprint() != self._fingerprint:
+                    self.misses += 1
+                    self._load()
+                else:
+                    self.hits += 1
+                    self._checked_at = time.monotonic()
+            else:
+                self.hits += 1
+
+    def _read_fingerprint(self) -> Optional[str]:
+        with self._conn_factory() as conn, conn.cursor() as cur:
+            cur.execute(FINGERPRINT_Q)
+            return cur.fetchone()[0]
+
+    def _load(self):
+        with self._conn_factory() as conn, conn.cursor() as cur:
+            cur.execute(FINGERPRINT_Q)
+            fingerprint = cur.fetchone()[0]
+            cur.execute(TABLES_Q)
+            names = {oid: name for oid, name in cur.fetchall()}
+            oids = list(names)
+            columns: Dict[str, List[Dict[str, Any]]] = {name: [] for name in names.values()}
+            pk: Dict[str, List[str]] = {}
+            cur.execute(COLUMNS_Q, (oids,))
+            for oid, col, dtype, nullable in cur.fetchall():
+                columns[names[oid]].append({"name": col, "type": dtype, "nullable": nullable})
+            cur.execute(PK_Q, (oids,))
+            for oid, col in cur.fetchall():
+                pk.setdefault(names[oid], []).append(col)
+            cur.execute(FK_Q, (oids,))
+            fks = [tuple(r) for r in cur.fetchall()]
+        fks_out: Dict[str, List[FKEdge]] = {}
+        fks_in: Dict[str, List[FKEdge]] = {}
+        for edge in fks:
+            fks_out.setdefault(edge[1], []).append(edge)
+            fks_in.setdefault(edge[3], []).append(edge)
+        self._tables = sorted(columns)
+        self._columns = columns
+        self._pk = pk
+        self._fks = fks
+        self._fks_out = fks_out
+        self._fks_in = fks_in
+        self._fingerprint = fingerprint
+        self._checked_at = time.monotonic()
+        self._loaded = True
+        self.loads += 1
+        self.version += 1
+
+    # --- Доступ до метаданих (повертаються кешовані об'єкти — не змінювати їх) ---
+    def tables(self) -> List[str]:
+        self._ensure()
+        return self._tables
+
+    def columns(self, table: str) -> List[Dict[str, Any]]:
+        self._ensure()
+        return self._columns.get(table, [])
+
+    def primary_key_columns(self, table: str) -> List[str]:
+        self._ensure()
+        return self._pk.get(table, [])
+
+    def primary_key(self, table: str) -> Optional[str]:
+        cols = self.primary_key_columns(table)
+        return cols[0] if cols else None
+
+    def foreign_keys(self, table: str) -> List[FKEdge]:
+        """FK, що виходять із таблиці (таблиця — дочірня)."""
+        self._ensure()
+        return self._fks_out.get(table, [])
+
+    def referencing(self, table: str, column: Optional[str] = None) -> List[FKEdge]:
+        """FK інших таблиць, що посилаються на дану (таблиця — батьківська)."""
+        self._ensure()
+        edges = self._fks_in.get(table, [])
+        if column is not None:
+            edges = [e for e in edges if e[4] == column]
+        return edges
+
+    def all_foreign_keys(self) -> List[FKEdge]:
+        self._ensure()
+        return self._fks
@@ -5,3 +5,87 @@ DB = {
     "user": "postgres",
     "password": "egor13524"
 }
+
+# --- Масове завантаження (COPY ... FROM STDIN) ---
+BULK_CHUNK_ROWS = 100_000      # скільки рядків іде в один COPY (і один коміт)
+COPY_BUFFER_SIZE = 64 * 1024   # розмір блоку, який psycopg2 читає з потоку за раз
+ID_BLOCK_SIZE = 1000           # скільки ID резервувати з послідовності за раз для одиночних insert (id_alloc.py)
+
+# --- Кеш метаданих схеми ---
+CATALOG_CHECK_INTERVAL = 5.0   # як часто (с) звіряти відбиток каталогу, щоб помітити DDL
+
+# --- Пул підключень ---
+POOL = {
+    "enabled": True,          # False — одне підключення на весь DBModel (як раніше)
+    "minconn": 2,             # скільки підключень тримати відкритими постійно
+    "maxconn": 10,            # максимум одночасно виданих підключень
+    "acquire_timeout": 30.0,  # скільки чекати вільного підключення (с); None — без обмеження
+    "health_check_idle": 30.0,  # підключення, що простоювало довше (с), перевіряємо SELECT 1
+}
+
+# --- Перегляд таблиць ---
+BROWSE_PAGE_SIZE = 50     # рядків на сторінку при перегляді таблиці
+STREAM_ITERSIZE = 2000    # скільки рядків серверний курсор віддає за один FETCH
+COMPACT_ROWS = True       # рядки-кортежі з доступом за іменем (rows.py); False — словники RealDictCursor
+RENDER_SAMPLE_ROWS = 100  # за скількома першими рядками визначати ширину стовпців
+RENDER_MAX_WIDTH = 40     # ширші клітинки обрізаються ("…")
+
+# --- Стовпцевий знімок для звітів без бази (snapshot.py, потрібен numpy) ---
+SNAPSHOT_PATH = "snapshot"   # каталог зі стовпцями .npy і meta.json
+
+# --- Пошук студентів за іменем (namesearch.py) ---
+NAME_SEARCH = {
+    "in_process": True,   # n-грамний індекс у пам'яті; False — кожен пошук іде на сервер (trigram-індекс)
+    "limit": 20,          # скільки збігів показувати
+}
+
+# --- Паралельна генерація даних (scheduler.py) ---
+PARALLEL_GENERATION = {
+    "processes": None,              # процесів-працівників для частин таблиці; None — кількість ядер
+    "min_rows_per_worker": 50_000,  # менші таблиці генеруються одним викликом
+}
+
+# --- Синтетичне навантаження з перекосами (workload.py, benchmark.py run --profile) ---
+WORKLOAD = {
+    "seed": 42,                 # те саме зерно — ті самі дані
+    "course_zipf": 1.1,         # показник Ципфа популярності курсів (0 — рівномірно)
+    "professor_zipf": 0.8,      # показник Ципфа для викладачів реєстрацій
+    "fanout_min": 1,            # реєстрацій на студента: від min до max,
+    "fanout_max": 20,
+    "fanout_skew": 2.0,         # більше 1 — більшість студентів ближче до min
+    "days": 1000,               # реєстрації за стільки днів до end_date
+    "end_date": None,           # "YYYY-MM-DD"; None — сьогодні (для відтворення між днями задайте дату)
+    "semester_starts": [[9, 1], [2, 1]],  # [місяць, день] початку семестрів
+    "peak_share": 0.6,          # частка реєстрацій у сплесках на початку семестру
+    "spike_days": 21,           # скільки днів триває сплеск
+}
+
+# --- Пакетні операції (insert_many / update_many / delete_many) ---
+BATCH_PAGE_SIZE = 1000    # рядків в одному SQL-операторі
+
+# --- Підготовлені оператори (PREPARE / EXECUTE) ---
+PREPARED_STATEMENTS = True  # False — CRUD і звіти надсилають повний текст SQL щоразу
+
+# --- Кеш результатів аналітичних запитів ---
+RESULT_CACHE = {
+    "enabled": True,
+    "max_entries": 256,               # скільки різних (запит, параметри) тримати
+    "max_bytes": 64 * 1024 * 1024,    # оцінка пам'яті, після якої витісняємо найстаріші (LRU)
+    "ttl": 60.0,                      # скільки секунд результат вважається свіжим
+}
+
+# --- Асинхронний пул (AsyncDBModel) ---
+ASYNC_POOL = {
+    "minconn": 1,
+    "maxconn": 10,            # скільки запитів можуть виконуватися на сервері одночасно
+    "acquire_timeout": 30.0,
+}
+
+# --- Агрегатні таблиці звітів (summaries.py) ---
+SUMMARY_DEFER_ROWS = 100_000   # від скількох рядків генерації вимикати тригери агрегатів (потім rebuild)
+
+# --- Метрики методів моделі (metrics.py) ---
+METRICS = {
+    "enabled": True,          # False — методи не обгортаються, курсори не рахують звернення
+    "top_n": 10,              # скільки найповільніших операцій показувати в меню
+}
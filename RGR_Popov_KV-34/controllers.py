@@ -1,12 +1,23 @@
 # controllers.py
 from models import DBModel
+from index_advisor import IndexAdvisor
+from scheduler import GenerationScheduler
+import transfer
+from config import BROWSE_PAGE_SIZE, METRICS, PARALLEL_GENERATION, SNAPSHOT_PATH, NAME_SEARCH
 import views
 from typing import Dict, Any
+import datetime
+from contextlib import closing
+try:
+    import readline   # автодоповнення імен за Tab (у Windows модуля може не бути)
+except ImportError:
+    readline = None
 
 class Controller:
     def __init__(self):
         self.model = DBModel()
         self.tables = ["Student", "Professor", "Course", "Task", "Registration"]
+        self.snapshot = None   # відкритий snapshot.Snapshot (меню 15)
 
     def close(self):
         self.model.close()
@@ -34,6 +45,20 @@ class Controller:
                 self.action_complex_queries()
             elif choice == "9":
                 self.action_demo_check_children()
+            elif choice == "10":
+                self.action_index_advisor()
+            elif choice == "11":
+                self.action_transfer()
+            elif choice == "12":
+                self.action_partitions()
+            elif choice == "13":
+                self.action_summaries()
+            elif choice == "14":
+                self.action_metrics()
+            elif choice == "15":
+                self.action_snapshot()
+            elif choice == "16":
+                self.action_name_search()
             elif choice == "0":
                 print("До побачення!")
                 break
@@ -44,6 +69,12 @@ class Controller:
         try:
             tables = self.model.list_tables()
             views.print_tables(tables)
+            views.show_catalog_stats(self.model.catalog_stats())
+            pool_stats = self.model.pool_stats()
+            if pool_stats:
+                views.show_pool_stats(pool_stats)
+            views.show_prepared_stats(self.model.prepared_stats())
+            views.show_cache_stats(self.model.cache_stats())
         except Exception as e:
             views.show_error(str(e))
 
@@ -52,11 +83,45 @@ class Controller:
         if table not in self.tables:
             views.show_error("Невідома таблиця. Приклад: Student")
             return
+        pk = self.model.primary_key(table)
+        if not pk:
+            views.show_error("PK не знайдено для таблиці")
+            return
+        # Посторінковий перегляд: keyset по PK, тому кожна сторінка однаково дешева
+        page_no = 1
         try:
-            rows = self.model.select_all(table, limit=500)
-            views.print_rows(rows)
-        except Exception as e:
+            rows = self.model.browse_page(table, BROWSE_PAGE_SIZE)
+        except Exception:
             views.show_error("Не вдалося отримати записи.")
+            return
+        while True:
+            views.print_page(rows, page_no)
+            if not rows:
+                return
+            cmd = views.prompt("n — наступна сторінка, p — попередня, a — уся таблиця потоком, q — вихід").lower()
+            try:
+                if cmd in ("a", "ф"):
+                    # серверний курсор + потоковий вивід: друк починається одразу, пам'ять стала
+                    with closing(self.model.iter_rows(table)) as stream:
+                        views.print_rows(stream, max_rows=None)
+                    return
+                if cmd in ("n", "т"):
+                    nxt = self.model.browse_page(table, BROWSE_PAGE_SIZE, after=rows[-1][pk])
+                    if not nxt:
+                        views.show_message("Це остання сторінка.")
+                        continue
+                    rows, page_no = nxt, page_no + 1
+                elif cmd in ("p", "з"):
+                    prev = self.model.browse_page(table, BROWSE_PAGE_SIZE, before=rows[0][pk])
+                    if not prev:
+                        views.show_message("Це перша сторінка.")
+                        continue
+                    rows, page_no = prev, page_no - 1
+                else:
+                    return
+            except Exception:
+                views.show_error("Не вдалося отримати записи.")
+                return
 
     def action_show_by_pk(self):
         table = views.prompt("Назва таблиці")
@@ -107,54 +172,34 @@ class Controller:
                 else:
                     data[name] = None
                     continue
-            # валідація типів за базовими правилами
-            if 'integer' in dtype or dtype in ('smallint','bigint'):
-                try:
-                    data[name] = int(raw)
-                except Exception:
-                    views.show_error(f"Невірний формат для {name}: очікується ціле число")
-                    return self._input_and_validate_for_table(table, skip_pk)
-            elif dtype in ('real', 'double precision', 'numeric', 'decimal'):
-                try:
-                    data[name] = float(raw)
-                except Exception:
-                    views.show_error(f"Невірний формат для {name}: очікується число")
-                    return self._input_and_validate_for_table(table, skip_pk)
-            elif dtype == 'date':
-                parsed = self.model.parse_date(raw)
-                if parsed is None:
-                    views.show_error(f"Невірний формат дати для {name}. Використайте YYYY-MM-DD")
-                    return self._input_and_validate_for_table(table, skip_pk)
-                data[name] = parsed
-            else:
-                # рядки, текст, timestamps — зберігаємо як є
-                data[name] = raw
+            # валідація типів за базовими правилами (ті самі, що й при імпорті файлів)
+            try:
+                data[name] = self.model.coerce_value(dtype, raw)
+            except ValueError as e:
+                views.show_error(f"Невірний формат для {name}: {e}")
+                return self._input_and_validate_for_table(table, skip_pk)
         return data
 
+    def _check_parents(self, table: str, data: Dict[str, Any]) -> bool:
+        """Перевірити всі FK рядка за графом каталогу; показати порушення і повернути False, якщо вони є."""
+        try:
+            violations = self.model.validate_parents(table, [data])
+        except Exception:
+            views.show_error("Не вдалося перевірити зовнішні ключі.")
+            return False
+        for col, val, parent_table in violations.get(0, []):
+            views.show_error(f"Вказаний {col} ({val}) не знайдено у таблиці {parent_table}")
+        return not violations
+
     def action_insert(self):
         table = views.prompt("Назва таблиці для вставки")
         if table not in self.tables:
             views.show_error("Невідома таблиця")
             return
-        # Для дочірньої таблиці переконатися, що батьківська існує (якщо потрібно)
         data = self._input_and_validate_for_table(table, skip_pk=True)
-        # Якщо таблиця - Registration або Task — перевіряємо існування FK-рядків
-        if table == "Task":
-            # перевірити, що Course_ID існує
-            cid = data.get("Course_ID")
-            if cid is None or not self.model.parent_exists("Course", "Course_ID", cid):
-                views.show_error("Вказаний Course_ID не знайдено в Course")
-                return
-        if table == "Registration":
-            # Course_ID, Professor_ID, Student_ID повинні існувати
-            ok = True
-            for parent_table, col in [("Course","Course_ID"), ("Professor","Professor_ID"), ("Student","Student_ID")]:
-                val = data.get(col)
-                if val is None or not self.model.parent_exists(parent_table, col, val):
-                    views.show_error(f"Вказаний {col} ({val}) не знайдено у таблиці {parent_table}")
-                    ok = False
-            if not ok:
-                return
+        # Для дочірньої таблиці переконатися, що батьківські рядки існують (усі FK — одним запитом)
+        if not self._check_parents(table, data):
+            return
         # Виконати вставку
         success, err = self.model.insert(table, data)
         if success:
@@ -190,9 +235,8 @@ class Controller:
             return
         # Показати і попросити нові значення (порожнє — залишити)
         views.show_message("Введіть нові значення. Порожній ввод — залишити поточне значення.")
-        cols_info = self.model.columns_info(table)
         updates = {}
-        for c in cols_info:
+        for c in cols:
             name = c['name']
             if name == pk:
                 continue
@@ -201,41 +245,17 @@ class Controller:
             if raw is None:
                 continue
             # валідація як при вставці
-            dtype = c['type']
-            if 'integer' in dtype:
-                try:
-                    updates[name] = int(raw)
-                except Exception:
-                    views.show_error(f"Невірний формат для {name}. Очікується integer.")
-                    return
-            elif dtype in ('real','double precision','numeric','decimal'):
-                try:
-                    updates[name] = float(raw)
-                except Exception:
-                    views.show_error(f"Невірний формат для {name}. Очікується число.")
-                    return
-            elif dtype == 'date':
-                parsed = self.model.parse_date(raw)
-                if parsed is None:
-                    views.show_error("Невірний формат дати.")
-                    return
-                updates[name] = parsed
-            else:
-                updates[name] = raw
+            try:
+                updates[name] = self.model.coerce_value(c['type'], raw)
+            except ValueError as e:
+                views.show_error(f"Невірний формат для {name}: {e}")
+                return
         if not updates:
             views.show_message("Нічого не змінилося.")
             return
         # Якщо це дочірня таблиця — перевіримо батьків на існування при зміні FK
-        if table == "Task" and "Course_ID" in updates:
-            if not self.model.parent_exists("Course", "Course_ID", updates["Course_ID"]):
-                views.show_error("Вказаний Course_ID не знайдено.")
-                return
-        if table == "Registration":
-            for parent_col, parent_table in [("Course_ID","Course"), ("Professor_ID","Professor"), ("Student_ID","Student")]:
-                if parent_col in updates:
-                    if not self.model.parent_exists(parent_table, parent_col, updates[parent_col]):
-                        views.show_error(f"Вказаний {parent_col} не знайдено у {parent_table}")
-                        return
+        if not self._check_parents(table, updates):
+            return
         success, err = self.model.update(table, pk, pk_val, updates)
         if success:
             views.show_success("Запис оновлено.")
@@ -251,38 +271,65 @@ class Controller:
         if not pk:
             views.show_error("PK не знайдено")
             return
-        pk_val_raw = views.prompt(f"Значення PK ({pk}) для видалення")
+        pk_val_raw = views.prompt(f"Значення PK ({pk}) для видалення (кілька — через кому)")
         # парсимо pk тип
         pk_col = next((c for c in self.model.columns_info(table) if c['name']==pk), None)
+        raw_values = [v.strip() for v in pk_val_raw.split(",") if v.strip()]
+        if not raw_values:
+            views.show_error("Не вказано жодного значення PK")
+            return
         if pk_col and 'integer' in pk_col['type']:
             try:
-                pk_val = int(pk_val_raw)
+                pk_values = [int(v) for v in raw_values]
             except Exception:
                 views.show_error("PK має бути числом")
                 return
         else:
-            pk_val = pk_val_raw
-        # Перевірка на наявність дочірніх рядків
+            pk_values = raw_values
+        # Перевірка на наявність дочірніх рядків (для всіх ключів одним запитом)
         try:
-            if self.model.has_child_rows(table, pk, pk_val):
-                views.show_error("Не можна видалити: існують рядки у підлеглих таблицях, що посилаються на цей запис.")
-                return
+            has_children = bool(self.model.child_counts(table, pk_values, pk))
         except Exception as e:
             views.show_error("Не вдалося перевірити залежності.")
             return
+        if has_children:
+            views.show_message("Існують рядки у підлеглих таблицях, що посилаються на ці записи.")
+            preview, err = self.model.plan_cascade_delete(table, pk_values, pk)
+            if err:
+                views.show_error(f"Каскадне видалення неможливе: {err}")
+                return
+            views.show_cascade_counts(preview, "Буде видалено каскадно")
+            confirm = views.prompt("Видалити разом з усіма залежними рядками? (так/ні)").lower()
+            if confirm not in ('так','yes','y','t'):
+                views.show_message("Видалення скасовано")
+                return
+            success, err, deleted = self.model.cascade_delete(table, pk_values, pk)
+            if success:
+                views.show_cascade_counts(deleted, "Видалено")
+                views.show_success("Записи видалено каскадно.")
+            else:
+                views.show_error(f"Не вдалося видалити: {err}")
+            return
         confirm = views.prompt("Підтвердіть видалення (так/ні)").lower()
         if confirm not in ('так','yes','y','t'):
             views.show_message("Видалення скасовано")
             return
-        success, err = self.model.delete(table, pk, pk_val)
+        if len(pk_values) == 1:
+            success, err = self.model.delete(table, pk, pk_values[0])
+            message = "Запис видалено."
+        else:
+            success, errors = self.model.delete_many(table, pk_values, pk, atomic=True)
+            err = errors[0][1] if errors else None
+            deleted = self.model.batch_rows.get(table, 0)
+            message = f"Видалено записів: {deleted} з {len(pk_values)}." if deleted else "Нічого не видалено."
         if success:
-            views.show_success("Запис видалено.")
+            views.show_success(message)
         else:
             views.show_error(f"Не вдалося видалити: {err}")
 
     def action_generate(self):
         """
-        Запускає SQL-генерацію великої кількості рядків на сервері.
+        Запускає генерацію великої кількості рядків (COPY або generate_series на сервері).
         Користувач вводить кількість.
         Генеруємо батьківські таблиці перед дочірніми.
         """
@@ -295,35 +342,49 @@ class Controller:
             views.show_error("Введіть позитивне ціле число")
             return
         views.show_message(f"Генеруємо {count} записів...")
-        # Рекомендовано: генерувати в порядку батьки -> діти:
-        tasks = [
-            ("Student", self.model.generate_students),
-            ("Professor", self.model.generate_professors),
-            ("Course", self.model.generate_courses),
-            # tasks and registrations require courses/prof/students to exist
-            ("Task", self.model.generate_tasks),
-            ("Registration", self.model.generate_registrations),
-        ]
-        for name, func in tasks:
-            success, err = func(count)
-            if success:
-                views.show_success(f"{name}: згенеровано (або додано) {count} рядків (якщо можливо).")
-            else:
-                # для дочірніх таблиць може бути помилка коли немає батьків — відобразимо дружнє повідомлення
-                views.show_error(f"{name}: не вдалося згенерувати: {err}")
+        # Незалежні таблиці — паралельно, дочірні — щойно згенеровано всіх їхніх батьків (граф FK)
+        scheduler = GenerationScheduler(
+            self.model,
+            processes=PARALLEL_GENERATION.get("processes"),
+            min_rows_per_worker=PARALLEL_GENERATION.get("min_rows_per_worker", 50_000),
+        )
+        started = datetime.datetime.now()
+        scheduler.run({name: count for name in self.tables}, on_done=self._show_generated)
+        views.show_message(f"Генерацію завершено за {(datetime.datetime.now() - started).total_seconds():.1f} с.")
+
+    def _show_generated(self, name: str, success: bool, err, seconds: float):
+        if success:
+            views.show_success(f"{name}: згенеровано за {seconds:.1f} с.")
+            stats = self.model.load_stats.get(name)
+            if stats:
+                views.show_load_stats(stats)
+                if stats.get("summaries_deferred"):
+                    views.show_message("Агрегатні таблиці застаріли (тригери вимикались на час завантаження) — "
+                                       "перебудуйте їх у меню 13.")
+        else:
+            # для дочірніх таблиць може бути помилка коли немає батьків — відобразимо дружнє повідомлення
+            views.show_error(f"{name}: не вдалося згенерувати: {err}")
 
-    def action_complex_queries(self):
+    def action_complex_queries(self, source=None):
+        """source — об'єкт з методами query_* (DBModel за замовчуванням або знімок snapshot.Snapshot)."""
+        source = source or self.model
         views.show_message("1) Завдання студентів за іменем (JOIN, GROUP BY)")
         views.show_message("2) Кількість курсів на професора (GROUP BY, WHERE)")
         views.show_message("3) Кількість реєстрацій по курсах за період (BETWEEN)")
         choice = views.prompt("Який запит виконати (1/2/3)?")
+        if choice not in ("1", "2", "3"):
+            views.show_error("Невірний вибір")
+            return
+        # План EXPLAIN ANALYZE — лише на вимогу: він виконує запит ще раз
+        explain = source is self.model and views.prompt(
+            "Показати план EXPLAIN (ANALYZE, BUFFERS)? (так/ні)").lower() in ('так', 'yes', 'y', 't')
         if choice == "1":
-            pat = views.prompt("Введіть частину імені студента для фільтра (LIKE)")
-            rows, time_ms, explain, err = self.model.query_student_tasks_by_name(pat)
+            pat = self._prompt_student_name("Введіть частину імені студента для фільтра (LIKE)")
+            rows, timing, plan, err = source.query_student_tasks_by_name(pat, explain=explain)
             if err:
                 views.show_error(f"Помилка виконання: {err}")
                 return
-            views.show_query_result(rows, time_ms, explain)
+            views.show_query_result(rows, timing, plan)
         elif choice == "2":
             exp_raw = views.prompt("Мінімальний досвід (ціле число)")
             try:
@@ -331,11 +392,11 @@ class Controller:
             except Exception:
                 views.show_error("Потрібно ціле число")
                 return
-            rows, time_ms, explain, err = self.model.query_professor_course_counts(exp)
+            rows, timing, plan, err = source.query_professor_course_counts(exp, explain=explain)
             if err:
                 views.show_error(f"Помилка виконання: {err}")
                 return
-            views.show_query_result(rows, time_ms, explain)
+            views.show_query_result(rows, timing, plan)
         elif choice == "3":
             start = views.prompt("Початкова дата (YYYY-MM-DD)")
             end = views.prompt("Кінцева дата (YYYY-MM-DD)")
@@ -344,13 +405,11 @@ class Controller:
             if not start_p or not end_p:
                 views.show_error("Невірний формат дати")
                 return
-            rows, time_ms, explain, err = self.model.query_course_regs_in_period(start_p, end_p)
+            rows, timing, plan, err = source.query_course_regs_in_period(start_p, end_p, explain=explain)
             if err:
                 views.show_error(f"Помилка виконання: {err}")
                 return
-            views.show_query_result(rows, time_ms, explain)
-        else:
-            views.show_error("Невірний вибір")
+            views.show_query_result(rows, timing, plan)
 
     def action_demo_check_children(self):
         # Проста демонстрація перевірки перед видаленням
@@ -370,11 +429,207 @@ class Controller:
         else:
             val = val_raw
         try:
-            has_children = self.model.has_child_rows(table, pk, val)
+            counts = self.model.child_counts(table, [val], pk).get(val)
         except Exception:
             views.show_error("Не вдалося перевірити залежності")
             return
-        if has_children:
-            views.show_message("Існують рядки в підлеглих таблицях, що посилаються на цей запис.")
+        if counts:
+            views.show_message("Існують рядки в підлеглих таблицях, що посилаються на цей запис:")
+            for child, cnt in counts.items():
+                views.show_message(f"  {child}: {cnt}")
         else:
             views.show_message("Підлеглих рядків не знайдено. Видалення дозволено (якщо потрібно).")
+
+    def action_index_advisor(self):
+        views.show_message("Порадник запропонує індекси для аналітичних запитів, побудує їх (CONCURRENTLY),")
+        views.show_message("виміряє запити до і після та залишить лише ті, що справді допомагають.")
+        confirm = views.prompt("Продовжити? (так/ні)").lower()
+        if confirm not in ('так', 'yes', 'y', 't'):
+            views.show_message("Скасовано")
+            return
+        try:
+            results = IndexAdvisor(self.model, log=views.show_message).run()
+        except Exception as e:
+            views.show_error(f"Порадник індексів завершився з помилкою: {e}")
+            return
+        views.show_index_advice(results)
+
+    def action_transfer(self):
+        """Імпорт/експорт таблиці у CSV або JSONL (.gz — зі стисненням) потоково через COPY."""
+        table = views.prompt("Назва таблиці")
+        if table not in self.tables:
+            views.show_error("Невідома таблиця")
+            return
+        direction = views.prompt("e — експорт у файл, i — імпорт з файлу").lower()
+        if direction not in ("e", "i"):
+            views.show_error("Невірний вибір")
+            return
+        path = views.prompt("Шлях до файлу (.csv, .jsonl, можна з .gz)")
+        try:
+            if direction == "e":
+                stats = transfer.export_table(self.model, table, path, progress=views.show_progress)
+            else:
+                stats = transfer.import_table(self.model, table, path, progress=views.show_progress)
+        except (OSError, ValueError) as e:
+            views.show_error(str(e))
+            return
+        except Exception as e:
+            views.show_error(f"Не вдалося виконати перенесення даних: {e}")
+            return
+        views.show_transfer_result(stats)
+
+    def action_summaries(self):
+        """Агрегатні таблиці звітів: стан, встановлення / перебудова, видалення."""
+        try:
+            views.show_summary_status(self.model.summaries.status())
+        except Exception as e:
+            views.show_error(f"Не вдалося прочитати стан агрегатів: {e}")
+            return
+        cmd = views.prompt("r — встановити / перебудувати з нуля, u — видалити агрегати, q — вихід").lower()
+        if cmd == "r":
+            views.show_message("Перераховуємо агрегати...")
+            ok, err = self.model.summaries.rebuild()
+        elif cmd == "u":
+            ok, err = self.model.summaries.uninstall()
+        else:
+            return
+        if ok:
+            views.show_success("Готово.")
+            views.show_summary_status(self.model.summaries.status())
+        else:
+            views.show_error(f"Операція не вдалася: {err}")
+
+    def _prompt_student_name(self, msg: str) -> str:
+        """Запит імені студента з автодоповненням за Tab (імена з NameSearch.complete)."""
+        if readline is None:
+            return views.prompt(msg)
+        matches = []
+
+        def completer(text, state):
+            if state == 0:
+                try:
+                    matches[:] = self.model.names.complete(readline.get_line_buffer(), 20)
+                except Exception:
+                    matches[:] = []
+            # readline підставляє лише останнє слово — віддаємо хвіст імені, що відповідає йому
+            start = len(readline.get_line_buffer()) - len(text)
+            return matches[state][start:] if state < len(matches) else None
+
+        old_completer, old_delims = readline.get_completer(), readline.get_completer_delims()
+        readline.set_completer(completer)
+        readline.set_completer_delims(" ")
+        readline.parse_and_bind("tab: complete")
+        try:
+            return views.prompt(msg)
+        finally:
+            readline.set_completer(old_completer)
+            readline.set_completer_delims(old_delims)
+
+    def action_name_search(self):
+        """Пошук студентів за частиною імені; s — встановити trigram-індекси на сервері."""
+        query = self._prompt_student_name("Частина імені (Tab — доповнити, s — встановити серверні індекси)")
+        if query == "s":
+            views.show_message("Створюємо pg_trgm та індекси...")
+            ok, err = self.model.names.install()
+            if ok:
+                views.show_success("Індекси для пошуку створено.")
+            else:
+                views.show_error(f"Не вдалося створити індекси: {err}")
+            return
+        if not query:
+            return
+        try:
+            rows, timing = self.model.names.search(query, NAME_SEARCH.get("limit", 20))
+        except Exception as e:
+            views.show_error(f"Пошук не вдався: {e}")
+            return
+        views.show_name_matches(rows, timing)
+
+    def action_snapshot(self):
+        """Стовпцевий знімок: зняти / оновити з бази і виконувати звіти по ньому без звернень до сервера."""
+        try:
+            import snapshot
+        except ImportError:
+            views.show_error("Для знімка потрібен numpy: pip install numpy")
+            return
+        if self.snapshot is None and snapshot.Snapshot.exists(SNAPSHOT_PATH):
+            try:
+                self.snapshot = snapshot.Snapshot.open(SNAPSHOT_PATH)
+            except (OSError, ValueError) as e:
+                views.show_error(f"Не вдалося відкрити знімок: {e}")
+        views.show_snapshot_info(self.snapshot.info() if self.snapshot else None)
+        cmd = views.prompt("b — зняти / оновити знімок, r — звіт зі знімка, q — вихід").lower()
+        if cmd == "b":
+            views.show_message("Знімаємо дані...")
+            try:
+                self.snapshot = snapshot.Snapshot.build(self.model, SNAPSHOT_PATH)
+            except Exception as e:
+                views.show_error(f"Не вдалося зняти знімок: {e}")
+                return
+            views.show_snapshot_info(self.snapshot.info())
+        elif cmd == "r":
+            if self.snapshot is None:
+                views.show_error("Спершу зніміть знімок (b)")
+                return
+            self.action_complex_queries(self.snapshot)
+
+    def action_metrics(self):
+        """Найповільніші операції моделі; експорт у Prometheus text або JSON."""
+        n = self.model.parse_int(views.prompt(f"Скільки операцій показати [{METRICS.get('top_n', 10)}]") or
+                                 str(METRICS.get("top_n", 10)))
+        views.show_metrics_top(self.model.metrics_top(n if n and n > 0 else METRICS.get("top_n", 10)))
+        cmd = views.prompt("p — зберегти у форматі Prometheus, j — JSON-знімок, r — скинути, q — вихід").lower()
+        if cmd == "r":
+            self.model.metrics.reset()
+            views.show_success("Метрики скинуто.")
+            return
+        if cmd not in ("p", "j"):
+            return
+        path = views.prompt("Шлях до файлу") or ("metrics.prom" if cmd == "p" else "metrics.json")
+        text = self.model.metrics.prometheus_text() if cmd == "p" else self.model.metrics.snapshot_json()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            views.show_error(f"Не вдалося записати файл: {e}")
+            return
+        views.show_success(f"Метрики збережено у {path}")
+
+    def action_partitions(self):
+        """Секціонування Registration за місяцями: перетворення, секції наперед, архівування старих."""
+        manager = self.model.partitions
+        try:
+            partitioned = manager.is_partitioned()
+            if partitioned:
+                views.show_partitions(manager.partitions())
+            else:
+                views.show_message("Таблиця Registration не секціонована.")
+        except Exception as e:
+            views.show_error(f"Не вдалося прочитати секції: {e}")
+            return
+        if not partitioned:
+            if views.prompt("Перетворити Registration на секціоновану за місяцями? (так/ні)").lower() not in ('так', 'yes', 'y', 't'):
+                return
+            months = self.model.parse_int(views.prompt("На скільки місяців уперед створити секції") or "3")
+            ok, err = manager.convert(months if months is not None else 3)
+            if ok:
+                views.show_success("Таблицю перетворено.")
+                views.show_partitions(manager.partitions())
+            else:
+                views.show_error(f"Не вдалося перетворити: {err}")
+            return
+        cmd = views.prompt("f — створити секції наперед, a — архівувати старі, d — видалити старі, q — вихід").lower()
+        try:
+            if cmd == "f":
+                months = self.model.parse_int(views.prompt("На скільки місяців уперед") or "3")
+                created = manager.maintain(months if months is not None else 3)
+                views.show_success(f"Створено секцій: {len(created)}")
+            elif cmd in ("a", "d"):
+                cutoff = self.model.parse_date(views.prompt("Обробити секції з датами до (YYYY-MM-DD)"))
+                if cutoff is None:
+                    views.show_error("Невірна дата")
+                    return
+                done = manager.archive_before(datetime.date.fromisoformat(cutoff), drop=(cmd == "d"))
+                views.show_success(f"Оброблено секцій: {len(done)}" + (f" ({', '.join(done)})" if done else ""))
+        except Exception as e:
+            views.show_error(f"Операція з секціями не вдалася: {e}")
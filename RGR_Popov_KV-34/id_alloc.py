@@ -0,0 +1,162 @@
+# id_alloc.py
+"""
+Видача ID блоками з послідовностей PostgreSQL замість COALESCE(MAX(id), 0) + 1.
+
+Для кожної таблиці, PK якої містить рівно один цілочисловий стовпець (Registration після секціонування
+має PK (Registration_ID, Date) — ID видається для Registration_ID), береться послідовність:
+  - власна послідовність стовпця (serial / identity), якщо вона є, — її nextval бере і DEFAULT
+    звичайних INSERT, тому блок резервується лише викликами nextval (без setval), і діапазон
+    може виявитися кількома шматками, якщо паралельно хтось вставляє рядки;
+  - інакше — окрема послідовність "<таблиця>_<pk>_idalloc_seq" (не прив'язана до стовпця, тож
+    переживає перестворення таблиці). Її змінює лише цей модуль: резервування n ID — nextval і setval
+    під advisory-блокуванням, тобто один суцільний діапазон за одне звернення незалежно від n.
+При першому зверненні в процесі послідовність доводиться щонайменше до MAX(pk) — рядки, вставлені
+в обхід неї, не спричинять колізій. Послідовності зберігаються в базі, тож після перезапуску видача
+продовжується з того самого місця; невикористаний залишок блоку в пам'яті стає просто пропуском у нумерації.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+
+INTEGER_TYPES = ("smallint", "integer", "bigint")
+ADVISORY_CLASS = 0x1d_a1        # перший ключ pg_advisory_xact_lock(int, int) для цього модуля
+
+Range = Tuple[int, int]          # (перший ID, кількість)
+
+SERIAL_SEQ_Q = "SELECT pg_get_serial_sequence(%s, %s)"
+
+# count викликів nextval, згрупованих у суцільні діапазони (паралельні INSERT можуть "розірвати" блок)
+NEXTVALS_Q = """
+SELECT min(v), count(*)
+FROM (SELECT v, v - row_number() OVER (ORDER BY v) AS grp
+      FROM (SELECT nextval(%s::regclass) AS v FROM generate_series(1, %s)) s) t
+GROUP BY grp
+ORDER BY 1
+"""
+
+
+class IdAllocator:
+    def __init__(self, model, block_size: int = 1000):
+        self.model = model
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._sequences: Dict[str, Tuple[str, bool]] = {}   # table -> (послідовність, власна стовпця)
+        self._blocks: Dict[str, List[List[int]]] = {}       # table -> [[наступний, кінець), ...]
+        self._version = None
+        self.reservations = 0
+        self.issued = 0
+
+    # --- Послідовності ---
+    def _pk(self, table: str) -> str:
+        # складений PK секціонованої таблиці = сурогатний ID + ключ секціонування (дата)
+        cols = self.model.catalog.primary_key_columns(table)
+        types = {c["name"]: c["type"] for c in self.model.catalog.columns(table)}
+        ints = [c for c in cols if types.get(c) in INTEGER_TYPES]
+        if len(ints) != 1:
+            raise ValueError(f"Таблиця {table}: видача ID потребує рівно одного цілочислового стовпця в PK "
+                             f"(PK: {', '.join(cols) or 'немає'})")
+        return ints[0]
+
+    def _sequence(self, table: str) -> Tuple[str, bool]:
+        # зміна схеми (перестворення таблиці, секціонування) — знайти послідовності заново
+        if self._version != self.model.catalog.version:
+            self._sequences.clear()
+            self._version = self.model.catalog.version
+        found = self._sequences.get(table)
+        if found is not None:
+            return found
+        pk = self._pk(table)
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            cur.execute(SERIAL_SEQ_Q, (f'public."{table}"', pk))
+            owned = cur.fetchone()[0]
+            seq = owned or sql.Identifier(f"{table}_{pk}_idalloc_seq").as_string(conn)
+            self._lock_sequence(cur, seq)
+            if not owned:
+                cur.execute(sql.SQL('CREATE SEQUENCE IF NOT EXISTS {} AS bigint').format(sql.SQL(seq)))
+            # довести до MAX(pk): рядки могли вставити в обхід послідовності
+            cur.execute(sql.SQL('SELECT last_value, is_called FROM {}').format(sql.SQL(seq)))
+            last_value, is_called = cur.fetchone()
+            cur.execute(sql.SQL('SELECT max({}) FROM {}').format(sql.Identifier(pk), sql.Identifier(table)))
+            max_id = cur.fetchone()[0] or 0
+            issued = last_value if is_called else last_value - 1
+            if max_id > issued:
+                cur.execute("SELECT setval(%s::regclass, %s, true)", (seq, max_id))
+        found = self._sequences[table] = (seq, bool(owned))
+        return found
+
+    @staticmethod
+    def _lock_sequence(cur, seq: str):
+        cur.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (ADVISORY_CLASS, seq))
+
+    # --- Резервування ---
+    def reserve(self, table: str, count: int) -> List[Range]:
+        """Зарезервувати count нових ID таблиці одним зверненням; повертає діапазони [(перший, кількість)]."""
+        if count <= 0:
+            return []
+        seq, owned = self._sequence(table)
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            if owned:
+                cur.execute(NEXTVALS_Q, (seq, count))
+                ranges = [(int(lo), int(n)) for lo, n in cur.fetchall()]
+            else:
+                self._lock_sequence(cur, seq)
+                cur.execute("SELECT nextval(%s::regclass)", (seq,))
+                first = cur.fetchone()[0]
+                if count > 1:
+                    cur.execute("SELECT setval(%s::regclass, %s, true)", (seq, first + count - 1))
+                ranges = [(first, count)]
+        with self._lock:
+            self.reservations += 1
+            self.issued += count
+        return ranges
+
+    def _take(self, table: str) -> Optional[int]:
+        # викликається під self._lock
+        blocks = self._blocks.get(table)
+        if not blocks:
+            return None
+        block = blocks[0]
+        value = block[0]
+        block[0] += 1
+        if block[0] >= block[1]:
+            blocks.pop(0)
+        return value
+
+    def next_id(self, table: str) -> int:
+        """Один ID з блоку в пам'яті; блок із block_size ID резервується, коли попередній вичерпано."""
+        with self._lock:
+            value = self._take(table)
+        if value is not None:
+            return value
+        ranges = self.reserve(table, self.block_size)
+        with self._lock:
+            self._blocks.setdefault(table, []).extend([lo, lo + n] for lo, n in ranges)
+            return self._take(table)
+
+    def needs_id(self, table: str) -> Optional[str]:
+        """
+        Стовпець ID, якщо його треба заповнювати з аллокатора (без serial/identity), або None, якщо його
+        заповнить DEFAULT. ValueError, якщо в PK таблиці немає стовпця, для якого аллокатор може видати ID.
+        """
+        pk = self._pk(table)
+        _, owned = self._sequence(table)
+        return None if owned else pk
+
+    def forget(self, table: Optional[str] = None):
+        """Скинути блоки в пам'яті (наприклад, після TRUNCATE ... RESTART IDENTITY)."""
+        with self._lock:
+            if table is None:
+                self._blocks.clear()
+                self._sequences.clear()
+            else:
+                self._blocks.pop(table, None)
+                self._sequences.pop(table, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "reservations": self.reservations,
+                "issued": self.issued,
+                "cached": sum(end - start for blocks in self._blocks.values() for start, end in blocks),
+            }
@@ -0,0 +1,211 @@
+# index_advisor.py
+"""
+Порадник індексів для аналітичних запитів.
+
+1. Міряє зареєстровані запити (queries.QUERIES) і знімає їхні плани EXPLAIN.
+2. Пропонує кандидатів: btree на FK-стовпці та стовпці з фільтрами (дати, числа)
+   у Seq Scan-ах, trigram (GIN, gin_trgm_ops) на стовпці, що фільтруються ILIKE/LIKE.
+3. Кожного кандидата будує CREATE INDEX CONCURRENTLY, робить ANALYZE і міряє знову.
+   Індекс залишається лише тоді, коли якийсь запит помітно прискорився і жоден не сповільнився.
+"""
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+from psycopg2 import sql
+
+from queries import QUERIES, percentile
+
+EXISTING_INDEXES_Q = """
+SELECT t.relname, a.attname, am.amname, opc.opcname
+FROM pg_index i
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ix ON ix.oid = i.indexrelid
+JOIN pg_am am ON am.oid = ix.relam
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+WHERE t.relnamespace = 'public'::regnamespace AND i.indisvalid;
+"""
+
+# Стовпець і оператор з умови Filter: (s."Student_Name")::text ~~* '...'  /  (p."Experience" >= 5)
+FILTER_COLUMN_RE = re.compile(
+    r'(?:\w+\.)?("(?:[^"]|"")+"|[a-z_][a-z0-9_]*)\)?(?:::[a-z ]+)?\s*(~~\*|~~|>=|<=|<>|=|<|>)'
+)
+
+TRGM_OPERATORS = ("~~*", "~~")
+
+
+class Candidate:
+    def __init__(self, table: str, column: str, kind: str, reason: str):
+        self.table = table
+        self.column = column
+        self.kind = kind          # "btree" або "trgm"
+        self.reason = reason
+
+    @property
+    def name(self) -> str:
+        raw = f"adv_{self.table}_{self.column}_{self.kind}".lower()
+        return re.sub(r"[^a-z0-9_]", "_", raw)[:63]
+
+    def key(self) -> Tuple[str, str, str]:
+        return self.table, self.column, self.kind
+
+    def create_sql(self) -> sql.Composed:
+        if self.kind == "trgm":
+            return sql.SQL("CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} USING gin ({} gin_trgm_ops)").format(
+                sql.Identifier(self.name), sql.Identifier(self.table), sql.Identifier(self.column))
+        return sql.SQL("CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({})").format(
+            sql.Identifier(self.name), sql.Identifier(self.table), sql.Identifier(self.column))
+
+    def drop_sql(self) -> sql.Composed:
+        return sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(self.name))
+
+
+def filter_columns(filter_text: str) -> List[Tuple[str, str]]:
+    """[(стовпець, оператор)] з тексту умови Filter."""
+    res = []
+    for ident, op in FILTER_COLUMN_RE.findall(filter_text or ""):
+        if ident.startswith('"'):
+            ident = ident[1:-1].replace('""', '"')
+        res.append((ident, op))
+    return res
+
+
+class IndexAdvisor:
+    def __init__(self, model, runs: int = 5, min_gain_pct: float = 10.0,
+                 max_loss_pct: float = 5.0, seed: int = 42, log: Callable[[str], None] = print):
+        self.model = model
+        self.runs = runs
+        self.min_gain_pct = min_gain_pct
+        self.max_loss_pct = max_loss_pct
+        self.seed = seed
+        self.log = log
+
+    # --- Вимірювання ---
+    def measure(self) -> Dict[str, float]:
+        """Медіана часу (ms) кожного зареєстрованого запиту на однаковому наборі параметрів."""
+        result = {}
+        with self.model.result_cache.disabled():  # новий індекс не інвалідує кеш — міряємо сервер
+            for name, (method_name, param_fn) in QUERIES.items():
+                method = getattr(self.model, method_name)
+                rnd = random.Random(f"{self.seed}:{name}")
+                params = [param_fn(rnd) for _ in range(self.runs)]
+                method(*params[0])  # прогрів
+                latencies = []
+                for p in params:
+                    _, timing, _, err = method(*p)
+                    if err:
+                        raise RuntimeError(f"{name}: {err}")
+                    latencies.append(timing["wall_ms"])
+                result[name] = percentile(sorted(latencies), 50)
+        return result
+
+    def collect_plans(self) -> Dict[str, Any]:
+        plans_by_query = {}
+        for name, (method_name, param_fn) in QUERIES.items():
+            rnd = random.Random(f"{self.seed}:{name}")
+            _, _, plan, _ = getattr(self.model, method_name)(*param_fn(rnd), explain=True)
+            if plan:
+                plans_by_query[name] = plan
+        return plans_by_query
+
+    # --- Кандидати ---
+    def existing_indexes(self) -> Set[Tuple[str, str, str]]:
+        existing = set()
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute(EXISTING_INDEXES_Q)
+            for table, column, am, opclass in cur.fetchall():
+                if am == "btree":
+                    existing.add((table, column, "btree"))
+                elif am == "gin" and opclass == "gin_trgm_ops":
+                    existing.add((table, column, "trgm"))
+        return existing
+
+    def candidates(self, plans_by_query: Dict[str, Any]) -> List[Candidate]:
+        found: Dict[Tuple[str, str, str], Candidate] = {}
+        # 1) FK-стовпці: по них з'єднуються всі три звіти
+        for _, child, child_col, parent, _ in self.model.catalog.all_foreign_keys():
+            c = Candidate(child, child_col, "btree", f"FK на {parent}")
+            found.setdefault(c.key(), c)
+        # 2) Стовпці з фільтрами у послідовних скануваннях
+        for query_name, plan in plans_by_query.items():
+            for node in plan["root"].walk():
+                if not node.relation or not node.filter or "Seq Scan" not in node.node_type:
+                    continue
+                table_cols = {c["name"]: c["type"] for c in self.model.columns_info(node.relation)}
+                for column, op in filter_columns(node.filter):
+                    if column not in table_cols:
+                        continue
+                    kind = "trgm" if op in TRGM_OPERATORS else "btree"
+                    c = Candidate(node.relation, column, kind, f"фільтр {op} у Seq Scan ({query_name})")
+                    found.setdefault(c.key(), c)
+        existing = self.existing_indexes()
+        return [c for key, c in found.items() if key not in existing]
+
+    def _ensure_trgm(self) -> bool:
+        try:
+            with self.model.connection() as conn, conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            return True
+        except psycopg2.Error as e:
+            self.log(f"pg_trgm недоступне, trigram-індекси пропускаємо: {e.pgerror or e}")
+            return False
+
+    def _execute(self, query, table: Optional[str] = None):
+        # CONCURRENTLY не працює всередині транзакції — підключення з пулу в autocommit
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute(query)
+            if table:
+                cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+
+    # --- Основний цикл ---
+    def run(self) -> List[Dict[str, Any]]:
+        baseline = self.measure()
+        self.log("Базовий час (медіана, ms): " + ", ".join(f"{k}={v:.2f}" for k, v in baseline.items()))
+        candidates = self.candidates(self.collect_plans())
+        if any(c.kind == "trgm" for c in candidates) and not self._ensure_trgm():
+            candidates = [c for c in candidates if c.kind != "trgm"]
+        results = []
+        for cand in candidates:
+            self.log(f"Пробуємо {cand.name} ({cand.reason})...")
+            try:
+                self._execute(cand.create_sql(), cand.table)
+            except psycopg2.Error as e:
+                # невдалий CONCURRENTLY залишає INVALID-індекс — прибираємо його
+                self._drop_quietly(cand)
+                results.append(self._result(cand, baseline, None, False, e.pgerror or str(e)))
+                continue
+            before, after = baseline, self.measure()
+            keep = self._helps(before, after)
+            if keep:
+                baseline = after
+            else:
+                self._drop_quietly(cand)
+            results.append(self._result(cand, before, after, keep))
+        return results
+
+    def _helps(self, before: Dict[str, float], after: Dict[str, float]) -> bool:
+        gains = [(before[q] - after[q]) / before[q] * 100 for q in before if before[q] > 0]
+        return bool(gains) and max(gains) >= self.min_gain_pct and min(gains) >= -self.max_loss_pct
+
+    def _drop_quietly(self, cand: Candidate):
+        try:
+            self._execute(cand.drop_sql())
+        except psycopg2.Error:
+            pass
+
+    @staticmethod
+    def _result(cand: Candidate, before: Dict[str, float], after: Optional[Dict[str, float]],
+                kept: bool, error: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "index": cand.name,
+            "table": cand.table,
+            "column": cand.column,
+            "kind": cand.kind,
+            "reason": cand.reason,
+            "before_ms": {k: round(v, 2) for k, v in before.items()},
+            "after_ms": {k: round(v, 2) for k, v in after.items()} if after else None,
+            "kept": kept,
+            "error": error,
+        }
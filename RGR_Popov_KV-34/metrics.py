@@ -0,0 +1,286 @@
+# metrics.py
+"""
+Інструментування методів DBModel: кількість викликів, гістограма часу, рядки, звернення до сервера, помилки.
+
+instrument(model, metrics) підміняє публічні методи екземпляра обгортками. Обгортка міряє час
+(perf_counter), а рядки й звернення до сервера (round trips) рахує курсор: CountingConnection видає
+курсори з лічильниками у змінних потоку, а обгортка бере їх різницю до і після виклику.
+Помилка — виняток або результат у стилі моделі (ok=False, err не None).
+Експорт: Prometheus text exposition (prometheus_text) і JSON-знімок (snapshot).
+Накладні витрати — кілька мікросекунд на виклик (два perf_counter, bisect і одне захоплення блокування).
+"""
+import bisect
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+import psycopg2.extensions
+
+# Межі кошиків гістограми, секунди (як у клієнтів Prometheus; останній кошик — +Inf)
+BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Методи, які не є операціями з БД або повертають контекстні менеджери
+SKIP = frozenset({"close", "connection", "transaction", "invalidate_schema", "pool_stats", "catalog_stats",
+                  "prepared_stats", "cache_stats", "metrics_top", "row_class"})
+
+_counters = threading.local()
+
+
+def _counts() -> List[int]:
+    """[звернень до сервера, рядків] поточного потоку — накопичувальні, обгортка бере різницю."""
+    try:
+        return _counters.c
+    except AttributeError:
+        c = _counters.c = [0, 0]
+        return c
+
+
+def _add(trips: int = 0, rows: int = 0):
+    c = _counts()
+    c[0] += trips
+    c[1] += rows
+
+
+# --- Курсори, що рахують звернення до сервера і рядки ---
+class CountingCursorMixin:
+    def execute(self, query, vars=None):
+        _add(trips=1)
+        result = super().execute(query, vars)
+        if not self.name and self.rowcount > 0:
+            _add(rows=self.rowcount)
+        return result
+
+    def executemany(self, query, vars_list):
+        _add(trips=1)
+        result = super().executemany(query, vars_list)
+        if self.rowcount > 0:
+            _add(rows=self.rowcount)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        _add(trips=1)
+        result = super().copy_expert(sql, file, size)
+        if self.rowcount > 0:
+            _add(rows=self.rowcount)
+        return result
+
+    def __iter__(self):
+        # серверний (іменований) курсор: рядки приходять порціями по itersize — кожна порція окремий FETCH
+        if not self.name:
+            return super().__iter__()
+        return self._counted_iter()
+
+    def _counted_iter(self):
+        n = 0
+        for row in super().__iter__():
+            if n % self.itersize == 0:
+                _add(trips=1)
+            n += 1
+            _add(rows=1)
+            yield row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        if self.name:
+            _add(trips=1, rows=len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self.name:
+            _add(trips=1, rows=len(rows))
+        return rows
+
+
+_cursor_classes: Dict[type, type] = {}
+
+
+def counting_cursor(base: type) -> type:
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = type("Counting" + base.__name__, (CountingCursorMixin, base), {})
+        _cursor_classes[base] = cls
+    return cls
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """Підключення, чиї курсори (будь-якого cursor_factory) рахують звернення до сервера і рядки."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = counting_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+
+# --- Збір метрик ---
+class _OpStats:
+    __slots__ = ("calls", "errors", "rows", "round_trips", "total", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.round_trips = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+def _is_error_result(result: Any) -> bool:
+    # (False, err), (False, err, ...) або (rows, timing, plan, err) з err
+    if type(result) is tuple and result:
+        if result[0] is False:
+            return True
+        if len(result) == 4 and isinstance(result[0], list) and result[3] is not None:
+            return True
+    return False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ops: Dict[str, _OpStats] = {}
+        self.started_at = time.time()
+
+    def record(self, name: str, seconds: float, rows: int, trips: int, error: bool):
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = _OpStats()
+            op.calls += 1
+            op.rows += rows
+            op.round_trips += trips
+            op.total += seconds
+            if seconds > op.max:
+                op.max = seconds
+            op.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            if error:
+                op.errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+            self.started_at = time.time()
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        perf = time.perf_counter
+        isgenerator = inspect.isgenerator
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            c = _counts()
+            trips0, rows0 = c[0], c[1]
+            t0 = perf()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.record(name, perf() - t0, c[1] - rows0, c[0] - trips0, True)
+                raise
+            except BaseException:
+                # KeyboardInterrupt / SystemExit — перервали ззовні, це не помилка операції
+                self.record(name, perf() - t0, c[1] - rows0, c[0] - trips0, False)
+                raise
+            if isgenerator(result):
+                return self._wrap_generator(name, result, t0)
+            self.record(name, perf() - t0, c[1] - rows0, c[0] - trips0, _is_error_result(result))
+            return result
+        return wrapper
+
+    def _wrap_generator(self, name: str, gen, t0: float):
+        # ітератор (iter_rows): операція триває, доки його не дочитали або не закрили
+        c = _counts()
+        trips0, rows0 = c[0], c[1]
+        error = False
+        try:
+            yield from gen
+        # GeneratorExit (close() — споживач зупинився раніше), KeyboardInterrupt, SystemExit — не помилки
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - t0, c[1] - rows0, c[0] - trips0, error)
+
+    # --- Звіти ---
+    @staticmethod
+    def _quantile(op: _OpStats, q: float) -> float:
+        """Оцінка квантиля з гістограми (лінійна інтерполяція всередині кошика), секунди."""
+        if not op.calls:
+            return 0.0
+        rank = q * op.calls
+        seen = 0
+        for i, count in enumerate(op.buckets):
+            if count and seen + count >= rank:
+                lo = BUCKETS[i - 1] if i > 0 else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else op.max
+                return min(lo + (hi - lo) * (rank - seen) / count, op.max)
+            seen += count
+        return op.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            ops = {}
+            for name, op in self._ops.items():
+                ops[name] = {
+                    "calls": op.calls,
+                    "errors": op.errors,
+                    "rows": op.rows,
+                    "round_trips": op.round_trips,
+                    "total_ms": op.total * 1000,
+                    "mean_ms": op.total / op.calls * 1000 if op.calls else 0.0,
+                    "p50_ms": self._quantile(op, 0.50) * 1000,
+                    "p95_ms": self._quantile(op, 0.95) * 1000,
+                    "max_ms": op.max * 1000,
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], op.buckets)),
+                }
+            return {"started_at": self.started_at, "taken_at": time.time(), "operations": ops}
+
+    def snapshot_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def top(self, n: int = 10, key: str = "mean_ms") -> List[Dict[str, Any]]:
+        ops = self.snapshot()["operations"]
+        rows = [dict(operation=name, **{k: v for k, v in s.items() if k != "buckets"}) for name, s in ops.items()]
+        return sorted(rows, key=lambda r: r[key], reverse=True)[:n]
+
+    def prometheus_text(self, prefix: str = "dbmodel") -> str:
+        """Prometheus text exposition format 0.0.4."""
+        with self._lock:
+            ops = sorted(self._ops.items())
+            lines = []
+            for metric, attr, help_text in (
+                ("calls_total", "calls", "Кількість викликів методу"),
+                ("errors_total", "errors", "Кількість викликів, що завершились помилкою"),
+                ("rows_total", "rows", "Рядків повернуто або змінено"),
+                ("round_trips_total", "round_trips", "Звернень до сервера"),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                lines.extend(f'{prefix}_{metric}{{method="{name}"}} {getattr(op, attr)}' for name, op in ops)
+            hist = f"{prefix}_call_duration_seconds"
+            lines.append(f"# HELP {hist} Тривалість виклику методу")
+            lines.append(f"# TYPE {hist} histogram")
+            for name, op in ops:
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS) + ["+Inf"], op.buckets):
+                    cumulative += count
+                    lines.append(f'{hist}_bucket{{method="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{hist}_sum{{method="{name}"}} {op.total:.9f}')
+                lines.append(f'{hist}_count{{method="{name}"}} {op.calls}')
+        return "\n".join(lines) + "\n"
+
+
+def instrument(obj: Any, metrics: Metrics, skip: Sequence[str] = SKIP) -> Any:
+    """Обгорнути публічні методи екземпляра (крім статичних і skip) обгортками з метриками."""
+    for name, attr in inspect.getmembers(type(obj)):
+        if name.startswith("_") or name in skip or isinstance(inspect.getattr_static(type(obj), name), staticmethod):
+            continue
+        if callable(attr):
+            setattr(obj, name, metrics.wrap(name, getattr(obj, name)))
+    return obj
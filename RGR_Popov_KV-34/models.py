@@ -1,351 +1,966 @@
 # models.py
-from typing import Tuple, List, Dict, Any, Optional
+from typing import Tuple, List, Dict, Any, Optional, Iterable, Iterator, Callable
 import psycopg2
 import psycopg2.extras
 from psycopg2 import sql
-from config import DB
+from config import (DB, POOL, BULK_CHUNK_ROWS, COPY_BUFFER_SIZE, CATALOG_CHECK_INTERVAL, STREAM_ITERSIZE,
+                    BATCH_PAGE_SIZE, PREPARED_STATEMENTS, RESULT_CACHE, SUMMARY_DEFER_ROWS, METRICS,
+                    COMPACT_ROWS, ID_BLOCK_SIZE, NAME_SEARCH)
+from contextlib import contextmanager
 from dateutil import parser as date_parser
+import datetime
+import itertools
 import random
+import threading
+import time
+import bulk_loader
+import cascade
+import plans
+import rows as compact_rows
+from metrics import CountingConnection, Metrics, instrument
+from catalog import SchemaCatalog
+from id_alloc import IdAllocator
+from namesearch import NameSearch
+from pool import ConnectionPool
+from prepared import PreparedConnection, StatementRegistry
+from result_cache import ResultCache
+from partitions import PartitionManager
+from summaries import SummaryManager, COURSE_REGS_SUMMARY_SQL, PROFESSOR_COURSES_SUMMARY_SQL
+
+# Коди помилок, після яких кеш схеми вважаємо застарілим (таблицю/стовпець змінили DDL-ом)
+SCHEMA_ERROR_CODES = ("42P01", "42703")  # undefined_table, undefined_column
+
+# З яких таблиць читає кожен аналітичний запит (запис у них викидає результат з кешу)
+QUERY_TABLES = {
+    "student_tasks_by_name": ("Student", "Registration", "Course", "Task"),
+    "professor_course_counts": ("Professor", "Registration"),
+    "course_regs_in_period": ("Course", "Registration"),
+    "professor_course_counts_summary": ("Professor", "Registration"),
+    "course_regs_in_period_summary": ("Course", "Registration"),
+}
+
+
+class _CountingPreparedConnection(CountingConnection, PreparedConnection):
+    pass
+
+
+# Клас підключення за (PREPARED_STATEMENTS, METRICS["enabled"])
+CONNECTION_FACTORIES = {
+    (True, True): _CountingPreparedConnection,
+    (True, False): PreparedConnection,
+    (False, True): CountingConnection,
+    (False, False): None,
+}
+
+# Тексти аналітичних запитів (спільні для DBModel і AsyncDBModel)
+STUDENT_TASKS_SQL = """
+SELECT s."Student_Name" AS student, c."Name" AS course, COUNT(t."Task_ID") AS tasks_count
+FROM "Student" s
+JOIN "Registration" r ON s."Student_ID" = r."Student_ID"
+JOIN "Course" c ON r."Course_ID" = c."Course_ID"
+LEFT JOIN "Task" t ON c."Course_ID" = t."Course_ID"
+WHERE s."Student_Name" ILIKE %s
+GROUP BY s."Student_Name", c."Name"
+ORDER BY tasks_count DESC
+LIMIT 100;
+"""
+PROFESSOR_COURSES_SQL = """
+SELECT p."Professor_Name" AS professor, p."Experience", COUNT(DISTINCT r."Course_ID") AS courses_count
+FROM "Professor" p
+LEFT JOIN "Registration" r ON p."Professor_ID" = r."Professor_ID"
+WHERE p."Experience" >= %s
+GROUP BY p."Professor_Name", p."Experience"
+ORDER BY courses_count DESC
+LIMIT 100;
+"""
+COURSE_REGS_SQL = """
+SELECT c."Name" AS course, COUNT(r."Registration_ID") AS regs_count
+FROM "Course" c
+JOIN "Registration" r ON c."Course_ID" = r."Course_ID"
+WHERE r."Date" BETWEEN %s AND %s
+GROUP BY c."Name"
+ORDER BY regs_count DESC
+LIMIT 100;
+"""
+
+# --- Генератори рядків для масового завантаження (ледачі, по одному кортежу) ---
+STUDENT_FIRST_NAMES = [
+    "Олександр", "Марія", "Дмитро", "Ірина", "Максим",
+    "Катерина", "Андрій", "Ольга", "Сергій", "Наталія"
+]
+STUDENT_LAST_NAMES = [
+    "Попов", "Шевченко", "Коваленко", "Бойко", "Мельник",
+    "Ткаченко", "Кравченко", "Поліщук", "Лисенко", "Савченко"
+]
+PROFESSOR_FIRST_NAMES = ["Іван", "Людмила", "Володимир", "Оксана", "Юрій", "Світлана", "Петро", "Галина"]
+PROFESSOR_LAST_NAMES = ["Сидоренко", "Петренко", "Гончаренко", "Клименко", "Романенко", "Федоренко"]
+COURSE_SUBJECTS = ["Математика", "Програмування", "Фізика", "Моделювання", "Бази даних", "Комп’ютерні мережі", "Операційні системи", "Штучний інтелект"]
+TASK_TITLES = ["Лабораторна", "Контрольна", "Домашнє завдання", "Проєкт", "Тест"]
+TASK_COMPLEXITIES = ["Low", "Medium", "High"]
+
+
+def _student_rows(count: int) -> Iterator[tuple]:
+    for _ in range(count):
+        name = f"{random.choice(STUDENT_FIRST_NAMES)} {random.choice(STUDENT_LAST_NAMES)}"
+        yield name, random.randint(31, 35)  # числові групи
+
+
+def _professor_rows(start_id: int, count: int) -> Iterator[tuple]:
+    for i in range(count):
+        name = f"{random.choice(PROFESSOR_FIRST_NAMES)} {random.choice(PROFESSOR_LAST_NAMES)}"
+        yield start_id + i, name, random.randint(1, 40)
+
+
+def _course_rows(start_id: int, count: int) -> Iterator[tuple]:
+    for i in range(count):
+        subj = random.choice(COURSE_SUBJECTS)
+        yield start_id + i, f"{subj} {random.randint(1,5)}", f"Курс із дисципліни {subj}"
+
+
+def _task_rows(start_id: int, count: int, course_ids: List[int]) -> Iterator[tuple]:
+    for i in range(count):
+        task_name = f"{random.choice(TASK_TITLES)} №{random.randint(1,10)}"
+        yield start_id + i, task_name, random.choice(TASK_COMPLEXITIES), random.choice(course_ids)
+
+
+# Таблиці, рядки яких генерує клієнт: (стовпець ID або None для serial, стовпці COPY)
+GENERATED_COLUMNS = {
+    "Student": (None, ["Student_Name", "Group"]),
+    "Professor": ("Professor_ID", ["Professor_ID", "Professor_Name", "Experience"]),
+    "Course": ("Course_ID", ["Course_ID", "Name", "describe"]),
+    "Task": ("Task_ID", ["Task_ID", "Task_Name", "Complexity", "Course_ID"]),
+}
+
+
+def generated_rows(table: str, start_id: int, count: int, course_ids: Optional[List[int]] = None) -> Iterator[tuple]:
+    if table == "Student":
+        return _student_rows(count)
+    if table == "Professor":
+        return _professor_rows(start_id, count)
+    if table == "Course":
+        return _course_rows(start_id, count)
+    if table == "Task":
+        return _task_rows(start_id, count, course_ids or [1])
+    raise ValueError(f"Таблиця {table} не генерується на клієнті")
+
+
+def copy_generated_range(table: str, start_id: int, count: int, course_ids: Optional[List[int]] = None,
+                         seed: Optional[int] = None) -> int:
+    """
+    Згенерувати й завантажити через COPY рядки з ID start_id..start_id+count-1 на власному підключенні.
+    Виконується в процесі-працівнику (scheduler.py), тому не залежить від стану DBModel;
+    seed=None — випадковий стан, як раніше.
+    """
+    random.seed(seed)  # стан генератора працівника задає seed частини
+    conn = psycopg2.connect(**DB)
+    try:
+        stats = bulk_loader.copy_rows(conn, table, GENERATED_COLUMNS[table][1],
+                                      generated_rows(table, start_id, count, course_ids),
+                                      BULK_CHUNK_ROWS, COPY_BUFFER_SIZE)
+    finally:
+        conn.close()
+    return stats["rows"]
+
+
+# ID рядків — start..start+count-1, діапазон заздалегідь зарезервовано в IdAllocator.
+# Значення — не random() (його стан не задати з клієнта), а хеш порядкового номера рядка (offset + gs)
+# і seed, як у workload.py: той самий seed дає ті самі рядки незалежно від ID і поділу на частини.
+_U = "(hashint8extended(o + gs, seed + {}) & 9007199254740991)::double precision / 9007199254740992"
+REGISTRATIONS_SQL = """
+WITH G AS (
+  SELECT %(start)s::bigint AS s, %(offset)s::bigint AS o, %(seed)s::bigint AS seed,
+         COALESCE((SELECT MAX("Course_ID") FROM "Course"),0) AS max_course,
+         COALESCE((SELECT MAX("Professor_ID") FROM "Professor"),0) AS max_prof,
+         COALESCE((SELECT MAX("Student_ID") FROM "Student"),0) AS max_student
+)
+INSERT INTO "Registration"("Registration_ID","Course_ID","Professor_ID","Student_ID","Date")
+SELECT s + gs - 1,
+       (floor({u1}*G.max_course)+1)::int,
+       (floor({u2}*G.max_prof)+1)::int,
+       (floor({u3}*G.max_student)+1)::int,
+       (now() - (floor({u4}*1000))::int * interval '1 day')::date
+FROM G, generate_series(1, %(count)s) gs
+WHERE G.max_course > 0 AND G.max_prof > 0 AND G.max_student > 0;
+""".format(u1=_U.format(1), u2=_U.format(2), u3=_U.format(3), u4=_U.format(4))
+
+
+def registration_params(start_id: int, count: int, seed: int, offset: int = 0) -> Dict[str, int]:
+    """Параметри REGISTRATIONS_SQL; offset — порядковий номер першого рядка частини в усьому завантаженні."""
+    return {"start": start_id, "count": count, "seed": seed, "offset": offset}
+
+
+def generation_seed() -> int:
+    """Seed для серверної генерації з модуля random: random.seed(...) робить і її відтворюваною."""
+    return random.getrandbits(48)
+
 
 class DBModel:
-    def __init__(self):
+    def __init__(self, pooled: Optional[bool] = None):
+        """
+        pooled=True — кожна операція бере підключення з пулу і повертає його (можна працювати з кількох потоків);
+        pooled=False — одне спільне підключення. За замовчуванням — POOL["enabled"] з config.py.
+        """
+        if pooled is None:
+            pooled = POOL.get("enabled", False)
+        self.pool: Optional[ConnectionPool] = None
+        self.conn = None
+        # Підключення, видане поточному потоку (щоб вкладені виклики методів не брали друге з пулу)
+        self._local = threading.local()
+        self._cursor_seq = itertools.count(1)
+        # Підключення, що пам'ятають підготовлені оператори (PREPARE робиться раз на підключення)
+        # і, якщо ввімкнено метрики, рахують звернення до сервера та рядки
+        metrics_enabled = METRICS.get("enabled", True)
+        factory = CONNECTION_FACTORIES[(bool(PREPARED_STATEMENTS), bool(metrics_enabled))]
         try:
-            self.conn = psycopg2.connect(**DB)
-            self.conn.autocommit = True
+            if pooled:
+                self.pool = ConnectionPool(
+                    POOL["minconn"], POOL["maxconn"], DB,
+                    acquire_timeout=POOL.get("acquire_timeout"),
+                    health_check_idle=POOL.get("health_check_idle", 30.0),
+                    connection_factory=factory,
+                )
+            else:
+                self.conn = psycopg2.connect(connection_factory=factory, **DB)
+                self.conn.autocommit = True
         except Exception as e:
             # Не виводимо сирий traceback — кидаємо зрозуміле повідомлення
             raise RuntimeError("Не вдалося підключитися до бази даних. Перевірте налаштування в config.py") from e
+        # Статистика останнього масового завантаження по таблицях: {table: {"rows", "seconds", "rows_per_sec"}}
+        self.load_stats: Dict[str, Dict[str, Any]] = {}
+        self.batch_rows: Dict[str, int] = {}   # таблиця -> рядків, зачеплених останньою пакетною операцією
+        # Метадані схеми читаються з pg_catalog один раз і далі віддаються з пам'яті
+        self.catalog = SchemaCatalog(self._conn, CATALOG_CHECK_INTERVAL)
+        # Нові ID — блоками з послідовностей PostgreSQL, а не COALESCE(MAX(id), 0) + 1
+        self.ids = IdAllocator(self, ID_BLOCK_SIZE)
+        # Оператори перепідготовлюються, коли каталог помітив зміну схеми (зросла версія)
+        self.statements = StatementRegistry(lambda: self.catalog.version)
+        # Кеш результатів аналітичних запитів; будь-який запис через модель викидає залежні записи
+        self.result_cache = ResultCache(
+            max_entries=RESULT_CACHE.get("max_entries", 256),
+            max_bytes=RESULT_CACHE.get("max_bytes", 64 * 1024 * 1024),
+            ttl=RESULT_CACHE.get("ttl", 60.0),
+            enabled=RESULT_CACHE.get("enabled", True),
+        )
+        # Секції Registration за місяцями (якщо таблицю перетворено на секціоновану)
+        self.partitions = PartitionManager(self)
+        # Агрегатні таблиці для звітів (summaries.py), що підтримуються тригерами на Registration
+        self.summaries = SummaryManager(self, SUMMARY_DEFER_ROWS)
+        # Пошук студентів за іменем; insert/update/delete нижче повідомляють індекс про зміни
+        self.names = NameSearch(self, NAME_SEARCH.get("in_process", True))
+        # Рядки результатів: компактні кортежі з доступом за іменем (rows.py) або словники RealDictCursor
+        self.row_cursor = compact_rows.CompactRowCursor if COMPACT_ROWS else psycopg2.extras.RealDictCursor
+        # Метрики: публічні методи екземпляра обгортаються останніми, коли модель уже зібрана
+        self.metrics = Metrics(metrics_enabled)
+        if metrics_enabled:
+            instrument(self, self.metrics)
 
     def close(self):
-        self.conn.close()
+        if self.pool is not None:
+            self.pool.closeall()
+        else:
+            self.conn.close()
 
-    # --- Інспекція схеми (корисно для View/Controller) ---
-    def list_tables(self) -> List[str]:
-        q = """
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema='public' AND table_type='BASE TABLE'
-        ORDER BY table_name;
+    @contextmanager
+    def _conn(self, exclusive: bool = False):
+        """
+        Видати підключення на час однієї операції (checkout/checkin у пулі).
+        exclusive=True — окреме підключення, яке не ділиться з вкладеними викликами
+        (потрібно, коли на ньому відкрита довга транзакція, наприклад серверний курсор).
+        """
+        if self.pool is None:
+            yield self.conn
+            return
+        held = getattr(self._local, "conn", None)
+        if held is not None and not exclusive:
+            yield held
+            return
+        conn = self.pool.getconn()
+        if not exclusive:
+            self._local.conn = conn
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if not exclusive:
+                self._local.conn = None
+            self.pool.putconn(conn, broken=broken or conn.closed != 0)
+
+    def connection(self, exclusive: bool = False):
+        """Підключення на час блоку with — для службових скриптів (бенчмарк, обслуговування схеми)."""
+        return self._conn(exclusive)
+
+    def transaction(self):
+        """Явна транзакція на час блоку with — для службових модулів (секціонування тощо)."""
+        return self._transaction()
+
+    @contextmanager
+    def _transaction(self):
         """
-        with self.conn.cursor() as cur:
-            cur.execute(q)
-            return [r[0] for r in cur.fetchall()]
+        Явна транзакція на підключенні поточної операції: COMMIT при успіху, ROLLBACK при винятку.
+        Вкладені виклики методів моделі в тому ж потоці виконуються в цій же транзакції.
+        """
+        with self._conn() as conn:
+            if not conn.autocommit:
+                # уже всередині транзакції — просто приєднуємось до неї
+                yield conn
+                return
+            conn.autocommit = False
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                if conn.closed == 0:
+                    conn.rollback()
+                raise
+            finally:
+                if conn.closed == 0:
+                    conn.autocommit = True
+
+    @contextmanager
+    def _server_cursor(self, cursor_factory=None, itersize: int = STREAM_ITERSIZE):
+        """
+        Іменований (серверний) курсор: рядки приходять з сервера порціями по itersize,
+        а не всі одразу. Такий курсор живе лише всередині транзакції, тому на час роботи
+        вимикаємо autocommit, а наприкінці відкочуємо (курсор лише читає).
+        """
+        with self._conn(exclusive=True) as conn:
+            autocommit = conn.autocommit
+            conn.autocommit = False
+            try:
+                with conn.cursor(name=f"dbmodel_cur_{next(self._cursor_seq)}", cursor_factory=cursor_factory) as cur:
+                    cur.itersize = itersize
+                    yield cur
+            finally:
+                if conn.closed == 0:
+                    conn.rollback()
+                    conn.autocommit = autocommit
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        return self.pool.stats() if self.pool is not None else None
+
+    def prepared_stats(self) -> Dict[str, Any]:
+        """
+        Лічильники реєстру підготовлених операторів і, для підключення, яке видав пул,
+        кількість виконань з generic/custom планом по кожному оператору.
+        """
+        with self._conn() as conn:
+            return dict(self.statements.stats(), plans=self.statements.plan_usage(conn))
+
+    def metrics_top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Найповільніші операції за середнім часом виклику."""
+        return self.metrics.top(n)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.result_cache.stats()
+
+    def _note_error(self, e: psycopg2.Error):
+        # Таблицю або стовпець не знайдено — схоже, схему змінили, перечитаємо каталог
+        if e.pgcode in SCHEMA_ERROR_CODES:
+            self.catalog.invalidate()
+
+    # --- Інспекція схеми (корисно для View/Controller), з кешу каталогу ---
+    def list_tables(self) -> List[str]:
+        return list(self.catalog.tables())
 
     def columns_info(self, table: str) -> List[Dict[str, Any]]:
-        q = """
-        SELECT column_name, data_type, is_nullable
-        FROM information_schema.columns
-        WHERE table_schema='public' AND table_name=%s
-        ORDER BY ordinal_position;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q, (table,))
-            res = []
-            for r in cur.fetchall():
-                res.append({"name": r[0], "type": r[1], "nullable": (r[2] == 'YES')})
-            return res
+        return self.catalog.columns(table)
 
     def primary_key(self, table: str) -> Optional[str]:
-        q = """
-        SELECT a.attname
-        FROM pg_index i
-        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-        WHERE i.indrelid = quote_ident(%s)::regclass AND i.indisprimary;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q, (table,))
-            row = cur.fetchone()
-            return row[0] if row else None
+        return self.catalog.primary_key(table)
+
+    def foreign_keys(self, table: str) -> List[tuple]:
+        """FK таблиці: [(constraint, child_table, child_col, parent_table, parent_col)]"""
+        return self.catalog.foreign_keys(table)
+
+    def referencing_keys(self, table: str, column: Optional[str] = None) -> List[tuple]:
+        """FK інших таблиць, що посилаються на дану: [(constraint, child_table, child_col, parent_table, parent_col)]"""
+        return self.catalog.referencing(table, column)
+
+    def invalidate_schema(self):
+        """Явно скинути кеш метаданих (наприклад, після ручного DDL)."""
+        self.catalog.invalidate()
+
+    def catalog_stats(self) -> Dict[str, Any]:
+        return self.catalog.stats()
+
+    def row_class(self, table: str) -> type:
+        """Клас компактного рядка таблиці за метаданими каталогу (SELECT * дає рядки саме цього класу)."""
+        return compact_rows.row_class([c["name"] for c in self.catalog.columns(table)], table)
 
     # --- Generic CRUD (всі назви таблиць/стовпців як Identifier) ---
     def select_all(self, table: str, limit: int = 200) -> List[Dict[str, Any]]:
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        self.row_class(table)  # клас рядків з іменем таблиці (кешується за стовпцями)
+        with self._conn() as conn, conn.cursor(cursor_factory=self.row_cursor) as cur:
             cur.execute(sql.SQL('SELECT * FROM {} ORDER BY 1 LIMIT %s').format(sql.Identifier(table)), (limit,))
             return cur.fetchall()
 
+    def browse_page(self, table: str, page_size: int, after: Any = None,
+                    before: Any = None) -> List[Dict[str, Any]]:
+        """
+        Сторінка таблиці з keyset-пагінацією по PK: WHERE pk > after ORDER BY pk LIMIT n
+        (або pk < before у зворотному порядку для попередньої сторінки). Завдяки індексу PK
+        сторінка N коштує стільки ж, скільки перша, — OFFSET не використовується.
+        """
+        pk = self.catalog.primary_key(table)
+        if pk is None:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        self.row_class(table)  # клас рядків з іменем таблиці (кешується за стовпцями)
+        t, k = sql.Identifier(table), sql.Identifier(pk)
+        if before is not None:
+            query = sql.SQL('SELECT * FROM {} WHERE {} < %s ORDER BY {} DESC LIMIT %s').format(t, k, k)
+            params = (before, page_size)
+        elif after is not None:
+            query = sql.SQL('SELECT * FROM {} WHERE {} > %s ORDER BY {} LIMIT %s').format(t, k, k)
+            params = (after, page_size)
+        else:
+            query = sql.SQL('SELECT * FROM {} ORDER BY {} LIMIT %s').format(t, k)
+            params = (page_size,)
+        with self._server_cursor(self.row_cursor, itersize=page_size) as cur:
+            cur.execute(query, params)
+            rows = cur.fetchmany(page_size)
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    def iter_rows(self, table: str, itersize: int = STREAM_ITERSIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Потоково пройти всю таблицю в порядку PK; у пам'яті одночасно не більше itersize рядків.
+        Серверний курсор і підключення звільняються, коли ітератор дочитано або закрито: хто може
+        зупинитися раніше, бере його через with contextlib.closing(model.iter_rows(...)).
+        """
+        self.row_class(table)  # клас рядків з іменем таблиці (кешується за стовпцями)
+        pk = self.catalog.primary_key(table)
+        order = sql.Identifier(pk) if pk else sql.SQL('1')
+        with self._server_cursor(self.row_cursor, itersize=itersize) as cur:
+            cur.execute(sql.SQL('SELECT * FROM {} ORDER BY {}').format(sql.Identifier(table), order))
+            for row in cur:
+                yield row
+
     def select_by_pk(self, table: str, pk: str, pk_value: Any) -> Optional[Dict[str, Any]]:
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(sql.SQL('SELECT * FROM {} WHERE {}=%s').format(sql.Identifier(table), sql.Identifier(pk)), (pk_value,))
+        self.row_class(table)  # клас рядків з іменем таблиці (кешується за стовпцями)
+        with self._conn() as conn, conn.cursor(cursor_factory=self.row_cursor) as cur:
+            self.statements.execute(
+                cur, ("select_by_pk", table, pk),
+                lambda: sql.SQL('SELECT * FROM {} WHERE {}=%s').format(sql.Identifier(table), sql.Identifier(pk)),
+                (pk_value,))
             return cur.fetchone()
 
+    def _fill_id(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Якщо PK не заданий і таблиця не має serial/identity — взяти ID з аллокатора."""
+        if all(data.get(c) is not None for c in self.catalog.primary_key_columns(table)):
+            return data
+        pk = self.ids.needs_id(table)
+        if pk is None or data.get(pk) is not None:
+            return data
+        return dict(data, **{pk: self.ids.next_id(table)})
+
     def insert(self, table: str, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        try:
+            data = self._fill_id(table, data)
+        except psycopg2.Error as e:
+            self._note_error(e)
+            return False, e.pgerror or str(e)
+        except ValueError as e:
+            return False, str(e)
         cols = list(data.keys())
         vals = [data[c] for c in cols]
-        query = sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+        build = lambda: sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
             sql.Identifier(table),
             sql.SQL(', ').join(map(sql.Identifier, cols)),
             sql.SQL(', ').join(sql.Placeholder() * len(cols))
         )
-        with self.conn.cursor() as cur:
+        with self._conn() as conn, conn.cursor() as cur:
             try:
-                cur.execute(query, vals)
+                self.statements.execute(cur, ("insert", table, tuple(cols)), build, vals)
+                self.result_cache.invalidate(table)
+                self.names.note_insert(table, data)
                 return True, None
             except psycopg2.Error as e:
+                self._note_error(e)
                 return False, e.pgerror or str(e)
 
     def update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         cols = list(data.keys())
         vals = [data[c] for c in cols] + [pk_value]
-        set_clause = sql.SQL(', ').join(
-            sql.Composed([sql.Identifier(c), sql.SQL(' = '), sql.Placeholder()]) for c in cols
-        )
-        query = sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
+        build = lambda: sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
             sql.Identifier(table),
-            set_clause,
+            sql.SQL(', ').join(
+                sql.Composed([sql.Identifier(c), sql.SQL(' = '), sql.Placeholder()]) for c in cols
+            ),
             sql.Identifier(pk)
         )
-        with self.conn.cursor() as cur:
+        with self._conn() as conn, conn.cursor() as cur:
             try:
-                cur.execute(query, vals)
+                self.statements.execute(cur, ("update", table, pk, tuple(cols)), build, vals)
+                self.result_cache.invalidate(table)
+                self.names.note_update(table, pk, pk_value, data)
                 return True, None
             except psycopg2.Error as e:
+                self._note_error(e)
                 return False, e.pgerror or str(e)
 
     def delete(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, Optional[str]]:
         query = sql.SQL('DELETE FROM {} WHERE {} = %s').format(sql.Identifier(table), sql.Identifier(pk))
-        with self.conn.cursor() as cur:
+        with self._conn() as conn, conn.cursor() as cur:
             try:
                 cur.execute(query, (pk_value,))
+                self.result_cache.invalidate(table)
+                self.names.note_delete(table, pk, pk_value)
                 return True, None
             except psycopg2.Error as e:
+                self._note_error(e)
                 return False, e.pgerror or str(e)
 
+    # --- Пакетний CRUD: багато рядків в одному операторі, усе в одній транзакції ---
+    # Вхід ділиться на сторінки по page_size рядків; кожна сторінка — один оператор під власним SAVEPOINT,
+    # тож невдала сторінка відкочується окремо, а решта фіксується разом (atomic=True — відкотити все).
+    # Повертають (ok, errors), де errors — [(номер_сторінки, текст_помилки)]; скільки рядків зачеплено
+    # зафіксованими сторінками — у self.batch_rows[table].
+    def _column_types(self, table: str) -> Dict[str, str]:
+        return {c["name"]: c["type"] for c in self.catalog.columns(table)}
+
+    def _run_batches(self, table: str, pages: Iterable[Callable], atomic: bool) -> Tuple[bool, List[Tuple[int, str]]]:
+        """pages — послідовність функцій run(cur), кожна виконує один оператор для своєї сторінки."""
+        errors: List[Tuple[int, str]] = []
+        affected = 0
+        try:
+            with self._transaction() as conn, conn.cursor() as cur:
+                for page_no, run_page in enumerate(pages):
+                    cur.execute("SAVEPOINT dbmodel_batch")
+                    try:
+                        run_page(cur)
+                        page_rows = max(cur.rowcount, 0)
+                        cur.execute("RELEASE SAVEPOINT dbmodel_batch")
+                        affected += page_rows
+                    except psycopg2.Error as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT dbmodel_batch")
+                        self._note_error(e)
+                        errors.append((page_no, e.pgerror or str(e)))
+                        if atomic:
+                            raise
+        except psycopg2.Error as e:
+            affected = 0   # транзакцію відкочено повністю
+            if not errors:
+                errors.append((-1, e.pgerror or str(e)))
+        self.batch_rows[table] = affected
+        self.result_cache.invalidate(table)
+        return not errors, errors
+
+    def insert_many(self, table: str, rows: List[Dict[str, Any]], page_size: int = BATCH_PAGE_SIZE,
+                    atomic: bool = False) -> Tuple[bool, List[Tuple[int, str]]]:
+        """
+        INSERT ... VALUES (...), (...), ... сторінками. Відсутні в рядку стовпці стають NULL;
+        рядкам без PK (якщо таблиця без serial) ID видаються одним резервуванням на весь пакет.
+        """
+        if not rows:
+            return True, []
+        pk_cols = self.catalog.primary_key_columns(table)
+        missing = [i for i, r in enumerate(rows) if any(r.get(c) is None for c in pk_cols)]
+        if missing:
+            try:
+                pk = self.ids.needs_id(table)
+                if pk is None:
+                    missing = []
+                else:
+                    missing = [i for i in missing if rows[i].get(pk) is None]
+                ids = [v for lo, n in self.ids.reserve(table, len(missing)) for v in range(lo, lo + n)]
+            except psycopg2.Error as e:
+                self._note_error(e)
+                return False, [(-1, e.pgerror or str(e))]
+            except ValueError as e:
+                return False, [(-1, str(e))]
+            rows = list(rows)
+            for i, value in zip(missing, ids):
+                rows[i] = dict(rows[i], **{pk: value})
+        cols = list(dict.fromkeys(c for r in rows for c in r))
+        types = self._column_types(table)
+        query = sql.SQL('INSERT INTO {} ({}) VALUES %s').format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, cols)))
+        template = '(' + ', '.join(f'%s::{types.get(c, "text")}' for c in cols) + ')'
+
+        def pages():
+            for start in range(0, len(rows), page_size):
+                batch = [tuple(r.get(c) for c in cols) for r in rows[start:start + page_size]]
+                yield lambda cur, batch=batch: psycopg2.extras.execute_values(
+                    cur, query, batch, template=template, page_size=len(batch))
+        return self._run_batches(table, pages(), atomic)
+
+    def update_many(self, table: str, rows: List[Dict[str, Any]], pk: Optional[str] = None,
+                    page_size: int = BATCH_PAGE_SIZE, atomic: bool = False) -> Tuple[bool, List[Tuple[int, str]]]:
+        """
+        UPDATE ... FROM (VALUES ...) по PK. Кожен рядок містить PK і стовпці, які треба змінити;
+        рядки з різним набором стовпців ідуть окремими операторами.
+        """
+        pk = pk or self.catalog.primary_key(table)
+        if pk is None:
+            return False, [(-1, f"Таблиця {table} не має первинного ключа")]
+        types = self._column_types(table)
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for r in rows:
+            groups.setdefault(tuple(c for c in r if c != pk), []).append(r)
+
+        def pages():
+            for cols, group in groups.items():
+                if not cols:
+                    continue
+                all_cols = (pk,) + cols
+                query = sql.SQL('UPDATE {} AS t SET {} FROM (VALUES %s) AS v ({}) WHERE t.{} = v.{}').format(
+                    sql.Identifier(table),
+                    sql.SQL(', ').join(
+                        sql.SQL('{} = v.{}').format(sql.Identifier(c), sql.Identifier(c)) for c in cols),
+                    sql.SQL(', ').join(map(sql.Identifier, all_cols)),
+                    sql.Identifier(pk), sql.Identifier(pk))
+                template = '(' + ', '.join(f'%s::{types.get(c, "text")}' for c in all_cols) + ')'
+                for start in range(0, len(group), page_size):
+                    batch = [tuple(r[c] for c in all_cols) for r in group[start:start + page_size]]
+                    yield lambda cur, batch=batch, query=query, template=template: psycopg2.extras.execute_values(
+                        cur, query, batch, template=template, page_size=len(batch))
+        return self._run_batches(table, pages(), atomic)
+
+    def delete_many(self, table: str, pk_values: List[Any], pk: Optional[str] = None,
+                    page_size: int = BATCH_PAGE_SIZE, atomic: bool = False) -> Tuple[bool, List[Tuple[int, str]]]:
+        """DELETE ... WHERE pk = ANY(%s) сторінками."""
+        pk = pk or self.catalog.primary_key(table)
+        if pk is None:
+            return False, [(-1, f"Таблиця {table} не має первинного ключа")]
+        pk_type = self._column_types(table).get(pk, "text")
+        query = sql.SQL('DELETE FROM {} WHERE {} = ANY(%s::{}[])').format(
+            sql.Identifier(table), sql.Identifier(pk), sql.SQL(pk_type))
+
+        def pages():
+            for start in range(0, len(pk_values), page_size):
+                keys = list(pk_values[start:start + page_size])
+                yield lambda cur, keys=keys: cur.execute(query, (keys,))
+        return self._run_batches(table, pages(), atomic)
+
+    # --- Каскадне видалення: один оператор з data-modifying CTE за графом FK (див. cascade.py) ---
+    def _cascade_plan(self, table: str, pk: Optional[str]):
+        pk = pk or self.catalog.primary_key(table)
+        if pk is None:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        return cascade.build_plan(self.catalog, table, pk, self._column_types(table).get(pk, "text"))
+
+    def plan_cascade_delete(self, table: str, pk_values: List[Any],
+                            pk: Optional[str] = None) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+        """Попередній перегляд: скільки рядків кожної таблиці буде видалено. Повертає ([(таблиця, кількість)], err)."""
+        try:
+            plan = self._cascade_plan(table, pk)
+        except ValueError as e:
+            return [], str(e)
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute(plan.preview_query(), (list(pk_values),))
+                return [tuple(r) for r in cur.fetchall()], None
+        except psycopg2.Error as e:
+            self._note_error(e)
+            return [], e.pgerror or str(e)
+
+    def cascade_delete(self, table: str, pk_values: List[Any],
+                       pk: Optional[str] = None) -> Tuple[bool, Optional[str], List[Tuple[str, int]]]:
+        """
+        Видалити рядки таблиці разом з усіма залежними (від листків до кореня) одним оператором
+        в одній транзакції. Повертає (ok, err, [(таблиця, видалено рядків)]).
+        """
+        try:
+            plan = self._cascade_plan(table, pk)
+        except ValueError as e:
+            return False, str(e), []
+        try:
+            with self._transaction() as conn, conn.cursor() as cur:
+                cur.execute(plan.delete_query(), (list(pk_values),))
+                deleted = [tuple(r) for r in cur.fetchall()]
+        except psycopg2.Error as e:
+            self._note_error(e)
+            return False, e.pgerror or str(e), []
+        self.result_cache.invalidate(*plan.tables)
+        return True, None, deleted
+
     # --- Helpers щодо FK контролю ---
     def has_child_rows(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
         """
         Перевірити, чи існують рядки в інших таблицях, що посилаються на даний батьківський PK.
-        Шукаємо у information_schema.constraint_column_usage / key_column_usage.
-        """
-        q = """
-        SELECT c.table_name, kcu.column_name
-        FROM information_schema.table_constraints c
-        JOIN information_schema.key_column_usage kcu
-          ON c.constraint_name = kcu.constraint_name AND c.table_schema = kcu.table_schema
-        JOIN information_schema.constraint_column_usage ccu
-          ON c.constraint_name = ccu.constraint_name AND c.table_schema = ccu.constraint_schema
-        WHERE c.constraint_type = 'FOREIGN KEY' AND ccu.table_name = %s AND ccu.column_name = %s;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q, (parent_table, parent_pk))
-            fks = cur.fetchall()
-            for fk_table, fk_col in fks:
-                # build and run existence check
-                check_q = sql.SQL('SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %s LIMIT 1)').format(
-                    sql.Identifier(fk_table), sql.Identifier(fk_col)
-                )
-                cur.execute(check_q, (pk_value,))
-                exists = cur.fetchone()[0]
-                if exists:
-                    return True
-        return False
+        Зворотна карта FK береться з кешу каталогу, а всі дочірні таблиці перевіряються
+        одним оператором: EXISTS (...) OR EXISTS (...) ...
+        """
+        fks = self.catalog.referencing(parent_table, parent_pk)
+        if not fks:
+            return False
+        query = sql.SQL('SELECT {}').format(sql.SQL(' OR ').join(
+            sql.SQL('EXISTS (SELECT 1 FROM {} WHERE {} = %s)').format(sql.Identifier(e[1]), sql.Identifier(e[2]))
+            for e in fks
+        ))
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(query, (pk_value,) * len(fks))
+            return cur.fetchone()[0]
+
+    def child_counts(self, parent_table: str, pk_values: List[Any],
+                     parent_pk: Optional[str] = None) -> Dict[Any, Dict[str, int]]:
+        """
+        Пакетна перевірка залежностей: для багатьох батьківських ключів одним запитом (UNION ALL по всіх
+        дочірніх таблицях) рахує, скільки рядків у кожній дочірній таблиці на них посилається.
+        Повертає {ключ: {дочірня_таблиця: кількість}} лише для ключів, що мають залежні рядки.
+        """
+        parent_pk = parent_pk or self.catalog.primary_key(parent_table)
+        fks = self.catalog.referencing(parent_table, parent_pk)
+        if not fks or not pk_values:
+            return {}
+        pk_type = next((c["type"] for c in self.catalog.columns(parent_table) if c["name"] == parent_pk), "text")
+        child_tables = [e[1] for e in fks]
+        # якщо одна таблиця посилається кількома стовпцями — розрізняємо їх як "Таблиця.Стовпець"
+        labels = [e[1] if child_tables.count(e[1]) == 1 else f"{e[1]}.{e[2]}" for e in fks]
+        query = sql.SQL(' UNION ALL ').join(
+            sql.SQL('SELECT %s, {col}, count(*) FROM {tbl} WHERE {col} = ANY(%s::{typ}[]) GROUP BY {col}').format(
+                col=sql.Identifier(e[2]), tbl=sql.Identifier(e[1]), typ=sql.SQL(pk_type))
+            for e in fks
+        )
+        keys = list(dict.fromkeys(pk_values))
+        params: List[Any] = []
+        for i in range(len(fks)):
+            params += [i, keys]
+        result: Dict[Any, Dict[str, int]] = {}
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            for label_no, key, cnt in cur.fetchall():
+                result.setdefault(key, {})[labels[label_no]] = cnt
+        return result
 
     def parent_exists(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
-        with self.conn.cursor() as cur:
+        with self._conn() as conn, conn.cursor() as cur:
             cur.execute(sql.SQL('SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %s LIMIT 1)').format(
                 sql.Identifier(parent_table), sql.Identifier(parent_pk)
             ), (pk_value,))
             return cur.fetchone()[0]
 
-    # --- SQL-генерація великих обсягів даних (generate_series на сервері) ---
-    # Логіка: для кожної таблиці беремо максимальний ID і додаємо записи з новими ID, щоб не порушити PK.
+    def validate_parents(self, table: str, rows: List[Dict[str, Any]]) -> Dict[int, List[Tuple[str, Any, str]]]:
+        """
+        Пакетна перевірка FK для одного чи тисяч рядків одним запитом.
+        FK беруться з графа каталогу; для кожного FK-стовпця на сервер іде масив унікальних значень,
+        який з'єднується (unnest) з батьківською таблицею. Перевіряються лише стовпці, присутні в рядку,
+        NULL пропускається. Повертає порушення по рядках: {індекс_рядка: [(стовпець, значення, батьківська_таблиця)]}.
+        """
+        checks = []   # (стовпець, батьківська таблиця, унікальні значення)
+        parts = []
+        params: List[Any] = []
+        for _, _, col, parent_table, parent_col in self.catalog.foreign_keys(table):
+            values = list(dict.fromkeys(r[col] for r in rows if r.get(col) is not None))
+            if not values:
+                continue
+            parent_type = next((c["type"] for c in self.catalog.columns(parent_table) if c["name"] == parent_col), "text")
+            parts.append(sql.SQL(
+                'SELECT %s, v.ord FROM unnest(%s::{}[]) WITH ORDINALITY AS v(val, ord) '
+                'WHERE NOT EXISTS (SELECT 1 FROM {} p WHERE p.{} = v.val)'
+            ).format(sql.SQL(parent_type), sql.Identifier(parent_table), sql.Identifier(parent_col)))
+            params += [len(checks), values]
+            checks.append((col, parent_table, values))
+        if not parts:
+            return {}
+        missing: Dict[str, set] = {}
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL(' UNION ALL ').join(parts), params)
+            for check_no, ord_ in cur.fetchall():
+                col, parent_table, values = checks[check_no]
+                missing.setdefault(col, set()).add(values[ord_ - 1])
+        violations: Dict[int, List[Tuple[str, Any, str]]] = {}
+        for col, parent_table, _ in checks:
+            bad = missing.get(col)
+            if not bad:
+                continue
+            for i, r in enumerate(rows):
+                if r.get(col) in bad:
+                    violations.setdefault(i, []).append((col, r[col], parent_table))
+        return violations
+
+    # --- Генерація великих обсягів даних ---
+    # Логіка: для кожної таблиці резервуємо в IdAllocator діапазон нових ID (послідовність, не MAX()),
+    # тому кілька завантажувачів одночасно не отримають однакових ID.
+    # Рядки генеруються ледачо і йдуть у сервер через COPY ... FROM STDIN порціями по BULK_CHUNK_ROWS,
+    # тому пам'ять клієнта не залежить від кількості рядків. Швидкість пишемо в self.load_stats.
+    def copy_in(self, table: str, columns: List[str], rows: Iterable[tuple]) -> Tuple[bool, Optional[str]]:
+        """Завантажити кортежі через COPY ... FROM STDIN порціями; швидкість — у self.load_stats[table]."""
+        try:
+            with self._conn() as conn:
+                stats = bulk_loader.copy_rows(conn, table, columns, rows, BULK_CHUNK_ROWS, COPY_BUFFER_SIZE)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        finally:
+            # частина порцій могла вже зафіксуватися — інвалідуємо в будь-якому разі
+            self.result_cache.invalidate(table)
+        self.load_stats[table] = stats
+        return True, None
+
+    def next_id(self, table: str) -> int:
+        """Один новий ID таблиці з блоку аллокатора в пам'яті."""
+        return self.ids.next_id(table)
+
+    def reserve_ids(self, table: str, count: int) -> List[Tuple[int, int]]:
+        """Зарезервувати count нових ID одним зверненням: [(перший, кількість)], зазвичай один діапазон."""
+        return self.ids.reserve(table, count)
+
+    def _copy_with_ids(self, table: str, count: int, course_ids: Optional[List[int]] = None):
+        try:
+            ranges = self.reserve_ids(table, count)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        except ValueError as e:
+            return False, str(e)
+        rows = itertools.chain.from_iterable(generated_rows(table, lo, n, course_ids) for lo, n in ranges)
+        return self.copy_in(table, GENERATED_COLUMNS[table][1], rows)
+
     def generate_students(self, count: int):
         """Генерація студентів з числовими групами (integer)"""
-        first_names = [
-            "Олександр", "Марія", "Дмитро", "Ірина", "Максим",
-            "Катерина", "Андрій", "Ольга", "Сергій", "Наталія"
-        ]
-        last_names = [
-            "Попов", "Шевченко", "Коваленко", "Бойко", "Мельник",
-            "Ткаченко", "Кравченко", "Поліщук", "Лисенко", "Савченко"
-        ]
-
-        with self.conn.cursor() as cur:
-            try:
-                # Отримуємо стартовий ID (якщо стовпець Student_ID не GENERATED ALWAYS)
-                cur.execute('SELECT COALESCE(MAX("Student_ID"), 0) + 1 FROM "Student";')
-                start_id = cur.fetchone()[0]
-
-                for i in range(count):
-                    name = f"{random.choice(first_names)} {random.choice(last_names)}"
-                    group = random.randint(31, 35)  # числові групи
-                    cur.execute(
-                        'INSERT INTO "Student"("Student_Name", "Group") VALUES (%s, %s)',
-                        (name, group)
-                    )
-
-                self.conn.commit()
-                return True, None
-            except psycopg2.Error as e:
-                self.conn.rollback()
-                return False, e.pgerror or str(e)
-
-        with self.conn.cursor() as cur:
-            try:
-                for _ in range(count):
-                    name = f"{random.choice(first_names)} {random.choice(last_names)}"
-                    group = random.choice(groups)
-                    cur.execute(
-                        'INSERT INTO "Student"("Student_Name", "Group") VALUES (%s, %s)',
-                        (name, group)
-                    )
-                return True, None
-            except psycopg2.Error as e:
-                return False, e.pgerror or str(e)
+        return self.copy_in("Student", ["Student_Name", "Group"], _student_rows(count))
 
     def generate_professors(self, count: int):
-        first_names = ["Іван", "Людмила", "Володимир", "Оксана", "Юрій", "Світлана", "Петро", "Галина"]
-        last_names = ["Сидоренко", "Петренко", "Гончаренко", "Клименко", "Романенко", "Федоренко"]
-        with self.conn.cursor() as cur:
-            try:
-                cur.execute('SELECT COALESCE(MAX("Professor_ID"),0) + 1 FROM "Professor";')
-                start_id = cur.fetchone()[0]
-                for i in range(count):
-                    name = f"{random.choice(first_names)} {random.choice(last_names)}"
-                    exp = random.randint(1, 40)
-                    cur.execute(
-                        'INSERT INTO "Professor"("Professor_ID","Professor_Name","Experience") VALUES (%s,%s,%s)',
-                        (start_id + i, name, exp)
-                    )
-                return True, None
-            except psycopg2.Error as e:
-                return False, e.pgerror or str(e)
+        return self._copy_with_ids("Professor", count)
 
     def generate_courses(self, count: int):
-        subjects = ["Математика", "Програмування", "Фізика", "Моделювання", "Бази даних", "Комп’ютерні мережі", "Операційні системи", "Штучний інтелект"]
-        with self.conn.cursor() as cur:
-            try:
-                cur.execute('SELECT COALESCE(MAX("Course_ID"),0) + 1 FROM "Course";')
-                start_id = cur.fetchone()[0]
-                for i in range(count):
-                    subj = random.choice(subjects)
-                    name = f"{subj} {random.randint(1,5)}"
-                    desc = f"Курс із дисципліни {subj}"
-                    cur.execute(
-                        'INSERT INTO "Course"("Course_ID","Name","describe") VALUES (%s,%s,%s)',
-                        (start_id + i, name, desc)
-                    )
-                return True, None
-            except psycopg2.Error as e:
-                return False, e.pgerror or str(e)
+        return self._copy_with_ids("Course", count)
 
     def generate_tasks(self, count: int):
-        titles = ["Лабораторна", "Контрольна", "Домашнє завдання", "Проєкт", "Тест"]
-        complexities = ["Low", "Medium", "High"]
-        with self.conn.cursor() as cur:
-            try:
-                cur.execute('SELECT COALESCE(MAX("Task_ID"),0) + 1 FROM "Task";')
-                start_id = cur.fetchone()[0]
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
                 cur.execute('SELECT array_agg("Course_ID") FROM "Course";')
                 course_ids = cur.fetchone()[0] or [1]
-                for i in range(count):
-                    task_name = f"{random.choice(titles)} №{random.randint(1,10)}"
-                    complexity = random.choice(complexities)
-                    course_id = random.choice(course_ids)
-                    cur.execute(
-                        'INSERT INTO "Task"("Task_ID","Task_Name","Complexity","Course_ID") VALUES (%s,%s,%s,%s)',
-                        (start_id + i, task_name, complexity, course_id)
-                    )
-                return True, None
-            except psycopg2.Error as e:
-                return False, e.pgerror or str(e)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        return self._copy_with_ids("Task", count, course_ids)
 
     def generate_registrations(self, count: int) -> Tuple[bool, Optional[str]]:
-        q = """
-        WITH start AS (
-          SELECT COALESCE(MAX("Registration_ID"),0) + 1 AS s,
-                 COALESCE((SELECT MAX("Course_ID") FROM "Course"),0) AS max_course,
-                 COALESCE((SELECT MAX("Professor_ID") FROM "Professor"),0) AS max_prof,
-                 COALESCE((SELECT MAX("Student_ID") FROM "Student"),0) AS max_student
-          FROM "Registration"
-        )
-        INSERT INTO "Registration"("Registration_ID","Course_ID","Professor_ID","Student_ID","Date")
-        SELECT s + gs - 1,
-               (floor(random()*G.max_course)+1)::int,
-               (floor(random()*G.max_prof)+1)::int,
-               (floor(random()*G.max_student)+1)::int,
-               (now() - (floor(random()*1000))::int * interval '1 day')::date
-        FROM start G, generate_series(1, %s) gs
-        WHERE G.max_course > 0 AND G.max_prof > 0 AND G.max_student > 0;
-        """
-        with self.conn.cursor() as cur:
+        with self._conn() as conn, conn.cursor() as cur:
             try:
-                cur.execute(q, (count,))
+                # для секціонованої таблиці — секції на весь діапазон дат, які генеруються нижче
+                today = datetime.date.today()
+                self.partitions.ensure_range(today - datetime.timedelta(days=1000), today)
+                started = time.perf_counter()
+                ranges = self.reserve_ids("Registration", count)
+                # велике завантаження — без тригерів агрегатів (звіти читатимуть базові таблиці до rebuild)
+                inserted, offset, seed = 0, 0, generation_seed()
+                with self.summaries.bulk_load(count) as deferred:
+                    for lo, n in ranges:
+                        cur.execute(REGISTRATIONS_SQL, registration_params(lo, n, seed, offset))
+                        inserted += cur.rowcount
+                        offset += n
+                self.result_cache.invalidate("Registration")
+                stats = bulk_loader.make_stats("Registration", inserted, time.perf_counter() - started)
+                stats["summaries_deferred"] = deferred
+                self.load_stats["Registration"] = stats
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
+            except ValueError as e:
+                return False, str(e)
+
+
+    # --- Складні запити (JOIN, WHERE, GROUP BY) ---
+    # Повертають (rows, timing, plan, err): запит виконується один раз, час міряється на клієнті.
+    # explain=True додатково знімає EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) — це ще одне виконання запиту.
+    def query_student_tasks_by_name(self, student_name_pattern: str, explain: bool = False):
+        return self._run_timed_query("student_tasks_by_name", STUDENT_TASKS_SQL, (f"%{student_name_pattern}%",), explain)
 
+    def query_professor_course_counts(self, min_experience: int, explain: bool = False):
+        return self._report("professor_course_counts", PROFESSOR_COURSES_SQL, PROFESSOR_COURSES_SUMMARY_SQL,
+                            (min_experience,), explain)
 
-    # --- Складні запити (JOIN, WHERE, GROUP BY) з EXPLAIN ANALYZE для часу виконання ---
-    # Повертають (rows, exec_time_ms, explain_text)
-    def query_student_tasks_by_name(self, student_name_pattern: str):
-        sql_text = """
-        SELECT s."Student_Name" AS student, c."Name" AS course, COUNT(t."Task_ID") AS tasks_count
-        FROM "Student" s
-        JOIN "Registration" r ON s."Student_ID" = r."Student_ID"
-        JOIN "Course" c ON r."Course_ID" = c."Course_ID"
-        LEFT JOIN "Task" t ON c."Course_ID" = t."Course_ID"
-        WHERE s."Student_Name" ILIKE %s
-        GROUP BY s."Student_Name", c."Name"
-        ORDER BY tasks_count DESC
-        LIMIT 100;
-        """
-        return self._run_timed_query(sql_text, (f"%{student_name_pattern}%",))
-
-    def query_professor_course_counts(self, min_experience: int):
-        sql_text = """
-        SELECT p."Professor_Name" AS professor, p."Experience", COUNT(DISTINCT r."Course_ID") AS courses_count
-        FROM "Professor" p
-        LEFT JOIN "Registration" r ON p."Professor_ID" = r."Professor_ID"
-        WHERE p."Experience" >= %s
-        GROUP BY p."Professor_Name", p."Experience"
-        ORDER BY courses_count DESC
-        LIMIT 100;
-        """
-        return self._run_timed_query(sql_text, (min_experience,))
-
-    def query_course_regs_in_period(self, start_date: str, end_date: str):
+    def query_course_regs_in_period(self, start_date: str, end_date: str, explain: bool = False):
         # Expect dates in 'YYYY-MM-DD' or parseable format
         # We'll pass dates as strings and let psycopg2 cast
-        sql_text = """
-        SELECT c."Name" AS course, COUNT(r."Registration_ID") AS regs_count
-        FROM "Course" c
-        JOIN "Registration" r ON c."Course_ID" = r."Course_ID"
-        WHERE r."Date" BETWEEN %s AND %s
-        GROUP BY c."Name"
-        ORDER BY regs_count DESC
-        LIMIT 100;
-        """
-        return self._run_timed_query(sql_text, (start_date, end_date))
-
-    def _run_timed_query(self, sql_text: str, params: tuple):
-        # Get EXPLAIN ANALYZE text
-        explain_text = ""
-        exec_time_ms = None
-        with self.conn.cursor() as cur:
-            try:
-                cur.execute("EXPLAIN ANALYZE " + sql_text, params)
-                lines = [r[0] for r in cur.fetchall()]  # text rows
-                explain_text = "\n".join(lines)
-                # find "Execution Time: X ms"
-                for line in reversed(lines):
-                    if "Execution Time" in line:
-                        try:
-                            # line like: "Execution Time: 12.345 ms"
-                            exec_time_ms = float(line.strip().split(":")[1].strip().split()[0])
-                        except Exception:
-                            exec_time_ms = None
-                        break
-            except psycopg2.Error:
-                # не показуємо помилку тут; продовжимо — нижче ми виконаємо сам SELECT і вернемо помилку якщо буде
-                exec_time_ms = None
-        # Виконати реальний запит і повернути результати
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        return self._report("course_regs_in_period", COURSE_REGS_SQL, COURSE_REGS_SUMMARY_SQL,
+                            (start_date, end_date), explain)
+
+    def _report(self, name: str, base_sql: str, summary_sql: str, params: tuple, explain: bool = False):
+        """
+        Звіт з агрегатних таблиць, якщо вони свіжі (timing["summary"] = True), інакше — з базових таблиць.
+        Обидва варіанти кешуються під одним ключем (name, params) разом з ознакою джерела, тож звіт —
+        це один пошук у кеші, а влучання не звертається до бази навіть за свіжістю агрегатів
+        (rebuild/drop агрегатів очищують кеш, записи в базові таблиці — інвалідують).
+        """
+        tables = QUERY_TABLES.get(name, ())
+        cache_key = (name, tuple(params))
+        if not explain:
+            hit = self._cached_query(cache_key)
+            if hit is not None:
+                (rows, summary), timing = hit
+                timing.update(rows=len(rows), summary=summary)
+                return list(rows), timing, None, None
+        seen = self.result_cache.generations(tables)
+        if self.summaries.is_fresh():
+            rows, timing, plan, err = self._run_timed_query(name + "_summary", summary_sql, params, explain,
+                                                            use_cache=False)
+            timing["summary"] = err is None
+        else:
+            rows, timing, plan, err = self._run_timed_query(name, base_sql, params, explain, use_cache=False)
+        if err is None:
+            self.result_cache.put(cache_key, (rows, timing["summary"]), tables, seen)
+        return rows, timing, plan, err
+
+    def _cached_query(self, cache_key: tuple) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """(значення, timing) з кешу результатів або None, якщо ключа там немає."""
+        t0 = time.perf_counter()
+        cached = self.result_cache.get(cache_key)
+        if self.result_cache.is_miss(cached):
+            return None
+        timing: Dict[str, Any] = {"wall_ms": (time.perf_counter() - t0) * 1000, "execute_ms": 0.0, "fetch_ms": 0.0,
+                                  "rows": len(cached), "cached": True, "summary": False}
+        return cached, timing
+
+    def _run_timed_query(self, name: str, sql_text: str, params: tuple, explain: bool = False,
+                         use_cache: bool = True):
+        """
+        Виконати підготовлений запит (реєстр statements, ключ — name) один раз і зміряти час на клієнті:
+        timing = {"wall_ms", "execute_ms", "fetch_ms", "rows", "cached"}; execute_ms — до відповіді сервера,
+        fetch_ms — перетворення результату на рядки Python. Без explain результат спершу шукається
+        в кеші (cached=True — запит до сервера не виконувався); use_cache=False — кеш веде викликач (_report).
+        """
+        timing: Dict[str, Any] = {"wall_ms": None, "execute_ms": None, "fetch_ms": None, "rows": 0,
+                                  "cached": False, "summary": False}
+        tables = QUERY_TABLES.get(name, ())
+        cache_key = (name, tuple(params))
+        if use_cache and not explain:
+            hit = self._cached_query(cache_key)
+            if hit is not None:
+                return list(hit[0]), hit[1], None, None
+        seen = self.result_cache.generations(tables)
+        with self._conn() as conn, conn.cursor(cursor_factory=self.row_cursor) as cur:
             try:
-                cur.execute(sql_text, params)
+                t0 = time.perf_counter()
+                self.statements.execute(cur, ("query", name), lambda: sql_text, params)
+                t1 = time.perf_counter()
                 rows = cur.fetchall()
-                return rows, exec_time_ms, explain_text, None
+                t2 = time.perf_counter()
             except psycopg2.Error as e:
-                return [], exec_time_ms, explain_text, e.pgerror or str(e)
+                self._note_error(e)
+                return [], timing, None, e.pgerror or str(e)
+        timing.update(wall_ms=(t2 - t0) * 1000, execute_ms=(t1 - t0) * 1000,
+                      fetch_ms=(t2 - t1) * 1000, rows=len(rows))
+        if use_cache:
+            self.result_cache.put(cache_key, rows, tables, seen)
+        plan = self._explain_prepared(name, sql_text, params) if explain else None
+        return rows, timing, plan, None
+
+    def _explain_prepared(self, name: str, sql_text: str, params: tuple) -> Optional[Dict[str, Any]]:
+        """План того самого підготовленого оператора, яким виконується запит (EXPLAIN ... EXECUTE)."""
+        with self._conn() as conn, conn.cursor() as cur:
+            try:
+                self.statements.execute(cur, ("query", name), lambda: sql_text, params,
+                                        prefix="EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ")
+                return plans.parse_explain_json(cur.fetchone()[0])
+            except psycopg2.Error:
+                return None
+
+    def explain_plan(self, sql_text: str, params: tuple) -> Optional[Dict[str, Any]]:
+        """
+        EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) у вигляді дерева вузлів:
+        {"root": PlanNode, "planning_ms", "execution_ms"}. Якщо не вдалося — None.
+        """
+        with self._conn() as conn, conn.cursor() as cur:
+            try:
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql_text, params)
+                return plans.parse_explain_json(cur.fetchone()[0])
+            except psycopg2.Error:
+                return None
 
     # --- Утиліти для конвертації введення ---
     @staticmethod
@@ -362,3 +977,27 @@ class DBModel:
             return d.date().isoformat()
         except Exception:
             return None
+
+    @staticmethod
+    def coerce_value(dtype: str, raw: str) -> Any:
+        """
+        Перетворити введений рядок на значення за типом стовпця (правила консольного вводу та імпорту).
+        Кидає ValueError з поясненням, якщо формат не підходить.
+        """
+        if 'integer' in dtype or dtype in ('smallint', 'bigint'):
+            try:
+                return int(raw)
+            except Exception:
+                raise ValueError("очікується ціле число") from None
+        if dtype in ('real', 'double precision', 'numeric', 'decimal'):
+            try:
+                return float(raw)
+            except Exception:
+                raise ValueError("очікується число") from None
+        if dtype == 'date':
+            parsed = DBModel.parse_date(raw)
+            if parsed is None:
+                raise ValueError("очікується дата, використайте YYYY-MM-DD")
+            return parsed
+        # рядки, текст, timestamps — зберігаємо як є
+        return raw
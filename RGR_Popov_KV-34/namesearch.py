@@ -0,0 +1,310 @@
+# namesearch.py
+"""
+Пошук студентів за іменем: ранжовані збіги за префіксом і підрядком, автодоповнення.
+
+Серверний шлях: install() створює pg_trgm і два індекси на "Student":
+  - GIN (gin_trgm_ops) — ILIKE '%...%' (і звіт query_student_tasks_by_name) без Seq Scan;
+  - btree на lower("Student_Name") COLLATE "C" — префікс іде діапазоном індексу в потрібному порядку,
+    а автодоповнення обходить лише різні імена ("loose index scan" рекурсивним CTE).
+Локальний шлях (NAME_SEARCH["in_process"]): NameIndex у пам'яті будується з "Student" при першому
+пошуку. Індексуються різні імена (у згенерованих даних їх небагато), а не рядки: n-грами (1..3 символи)
+імені у нижньому регістрі -> множина імен, ім'я -> ID студентів, відсортований список для префіксів.
+Модель повідомляє про insert/update/delete одного рядка Student — індекс оновлюється на місці.
+Будь-який інший запис (пакетні операції, COPY, генерація) видно за лічильником змін таблиці
+в кеші результатів — тоді індекс перебудовується при наступному пошуку.
+Ранг збігу однаковий для обох шляхів: 0 — ім'я починається з запиту, 1 — з нього починається
+друге чи наступне слово, 2 — інший підрядок; далі — за lower(ім'я) і ID.
+"""
+import bisect
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+
+import rows as compact_rows
+
+TABLE = "Student"
+NAME = "Student_Name"
+TRGM_INDEX = "student_name_trgm_idx"
+PREFIX_INDEX = "student_name_lower_c_idx"
+MAX_GRAM = 3
+
+INSTALL_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {TRGM_INDEX} ON "{TABLE}" USING gin ("{NAME}" gin_trgm_ops)',
+    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {PREFIX_INDEX} ON "{TABLE}" ((lower("{NAME}") COLLATE "C"))',
+)
+
+# %(prefix)s — 'запит%', %(word)s — '% запит%', %(substr)s — '%запит%' (спецсимволи LIKE екрановані)
+SEARCH_SQL = """
+SELECT "Student_ID", "Student_Name", rank FROM (
+(SELECT "Student_ID", "Student_Name", 0 AS rank, lower("Student_Name") COLLATE "C" AS key
+ FROM "Student"
+ WHERE lower("Student_Name") COLLATE "C" LIKE lower(%(prefix)s)
+ ORDER BY lower("Student_Name") COLLATE "C", "Student_ID"
+ LIMIT %(limit)s)
+UNION ALL
+(SELECT "Student_ID", "Student_Name",
+        CASE WHEN lower("Student_Name") LIKE lower(%(word)s) THEN 1 ELSE 2 END,
+        lower("Student_Name") COLLATE "C"
+ FROM "Student"
+ WHERE "Student_Name" ILIKE %(substr)s AND lower("Student_Name") COLLATE "C" NOT LIKE lower(%(prefix)s)
+ ORDER BY 3, 4, 1
+ LIMIT %(limit)s)
+) m
+ORDER BY rank, key, "Student_ID"
+LIMIT %(limit)s
+"""
+
+# Різні імена з префіксом: кожен крок — наступний ключ індексу після попереднього
+COMPLETE_SQL = """
+WITH RECURSIVE t(key, name) AS (
+  (SELECT lower("Student_Name") COLLATE "C", "Student_Name" FROM "Student"
+   WHERE lower("Student_Name") COLLATE "C" LIKE lower(%(prefix)s)
+   ORDER BY 1 LIMIT 1)
+  UNION ALL
+  SELECT s.key, s.name FROM t, LATERAL (
+    SELECT lower("Student_Name") COLLATE "C" AS key, "Student_Name" AS name FROM "Student"
+    WHERE lower("Student_Name") COLLATE "C" > t.key AND lower("Student_Name") COLLATE "C" LIKE lower(%(prefix)s)
+    ORDER BY 1 LIMIT 1) s
+)
+SELECT name FROM t LIMIT %(limit)s
+"""
+
+RESULT_FIELDS = ["Student_ID", "Student_Name", "rank"]
+
+
+def like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def match_rank(lower_name: str, query: str) -> Optional[int]:
+    """Ранг збігу імені (у нижньому регістрі) із запитом (у нижньому регістрі) або None, якщо збігу немає."""
+    if lower_name.startswith(query):
+        return 0
+    if " " + query in lower_name:
+        return 1
+    if query in lower_name:
+        return 2
+    return None
+
+
+class NameIndex:
+    """N-грамний індекс різних імен у пам'яті (не потокобезпечний — блокування робить NameSearch)."""
+
+    def __init__(self):
+        self.name_of: Dict[int, str] = {}              # ID студента -> ім'я
+        self.ids_by_name: Dict[str, List[int]] = {}     # ім'я -> відсортовані ID студентів
+        self.grams: Dict[str, Set[str]] = {}            # n-грама (нижній регістр) -> імена
+        self.sorted_names: List[Tuple[str, str]] = []   # (lower, ім'я), відсортовано — для префіксів
+
+    @staticmethod
+    def ngrams(lower_name: str) -> Set[str]:
+        return {lower_name[i:i + n] for n in range(1, MAX_GRAM + 1) for i in range(len(lower_name) - n + 1)}
+
+    def add(self, student_id: int, name: Optional[str]):
+        self.remove(student_id)
+        if name is None:
+            return
+        self.name_of[student_id] = name
+        ids = self.ids_by_name.get(name)
+        if ids is None:
+            ids = self.ids_by_name[name] = []
+            lower = name.lower()
+            for gram in self.ngrams(lower):
+                self.grams.setdefault(gram, set()).add(name)
+            bisect.insort(self.sorted_names, (lower, name))
+        bisect.insort(ids, student_id)
+
+    def remove(self, student_id: int):
+        name = self.name_of.pop(student_id, None)
+        if name is None:
+            return
+        ids = self.ids_by_name[name]
+        i = bisect.bisect_left(ids, student_id)
+        if i < len(ids) and ids[i] == student_id:
+            del ids[i]
+        if ids:
+            return
+        del self.ids_by_name[name]
+        lower = name.lower()
+        for gram in self.ngrams(lower):
+            names = self.grams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.grams[gram]
+        i = bisect.bisect_left(self.sorted_names, (lower, name))
+        if i < len(self.sorted_names) and self.sorted_names[i] == (lower, name):
+            del self.sorted_names[i]
+
+    def _candidates(self, query: str) -> Set[str]:
+        if len(query) <= MAX_GRAM:
+            return self.grams.get(query, set())
+        # перетин списків триграм, починаючи з найкоротшого; потім перевірка підрядка
+        postings = sorted((self.grams.get(query[i:i + MAX_GRAM], set()) for i in range(len(query) - MAX_GRAM + 1)),
+                          key=len)
+        result = set(postings[0])
+        for p in postings[1:]:
+            result &= p
+            if not result:
+                break
+        return result
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, str, int]]:
+        query = query.lower()
+        if not query:
+            return []
+        ranked = []
+        for name in self._candidates(query):
+            lower = name.lower()
+            rank = match_rank(lower, query)
+            if rank is not None:
+                ranked.append((rank, lower, name))
+        ranked.sort()
+        result: List[Tuple[int, str, int]] = []
+        for rank, _, name in ranked:
+            for student_id in self.ids_by_name[name][:limit - len(result)]:
+                result.append((student_id, name, rank))
+            if len(result) >= limit:
+                break
+        return result
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        prefix = prefix.lower()
+        i = bisect.bisect_left(self.sorted_names, (prefix, ""))
+        result = []
+        while i < len(self.sorted_names) and len(result) < limit and self.sorted_names[i][0].startswith(prefix):
+            result.append(self.sorted_names[i][1])
+            i += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"students": len(self.name_of), "names": len(self.ids_by_name), "grams": len(self.grams)}
+
+
+class NameSearch:
+    def __init__(self, model, in_process: bool = True):
+        self.model = model
+        self.in_process = in_process
+        self._lock = threading.Lock()
+        self._index: Optional[NameIndex] = None
+        self._generation: Optional[int] = None   # лічильник змін "Student", з яким узгоджений індекс
+        self.rebuilds = 0
+        self.last_build_seconds = 0.0
+
+    # --- Серверні індекси ---
+    def install(self) -> Tuple[bool, Optional[str]]:
+        """pg_trgm і індекси для пошуку (CREATE INDEX CONCURRENTLY — поза транзакцією)."""
+        try:
+            with self.model.connection() as conn, conn.cursor() as cur:
+                for statement in INSTALL_SQL:
+                    cur.execute(statement)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        return True, None
+
+    def installed(self) -> bool:
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM pg_class WHERE relname IN (%s, %s) AND relkind = 'i'",
+                        (TRGM_INDEX, PREFIX_INDEX))
+            return cur.fetchone()[0] == 2
+
+    # --- Індекс у пам'яті ---
+    def _current_generation(self) -> int:
+        return self.model.result_cache.generations((TABLE,))[0]
+
+    def _ensure_index(self) -> NameIndex:
+        """Викликається під self._lock: перебудувати індекс, якщо в "Student" писали в обхід повідомлень."""
+        generation = self._current_generation()
+        if self._index is not None and self._generation == generation:
+            return self._index
+        started = time.perf_counter()
+        index = NameIndex()
+        pk = self.model.catalog.primary_key(TABLE)
+        with closing(self.model.iter_rows(TABLE)) as rows:
+            for row in rows:
+                index.add(row[pk], row[NAME])
+        self._index, self._generation = index, generation
+        self.rebuilds += 1
+        self.last_build_seconds = time.perf_counter() - started
+        return index
+
+    def _apply(self, table: str, change):
+        """
+        Застосувати зміну одного рядка, якщо індекс був актуальним до неї (модель уже збільшила
+        лічильник змін таблиці рівно на 1). Інакше нічого не робимо — індекс перебудується при пошуку.
+        """
+        if table != TABLE or self._index is None:
+            return
+        with self._lock:
+            generation = self._current_generation()
+            if self._index is not None and self._generation == generation - 1:
+                if change(self._index) is not False:
+                    self._generation = generation
+
+    def note_insert(self, table: str, data: Dict[str, Any]):
+        pk = self.model.catalog.primary_key(table)
+
+        def change(index: NameIndex):
+            if data.get(pk) is None:
+                return False   # ID видав serial — невідомий, потрібна перебудова
+            index.add(data[pk], data.get(NAME))
+        self._apply(table, change)
+
+    def note_update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]):
+        def change(index: NameIndex):
+            if pk in data and data[pk] != pk_value:
+                return False   # змінився сам ID
+            if NAME in data:
+                index.add(pk_value, data[NAME])
+        self._apply(table, change)
+
+    def note_delete(self, table: str, pk: str, pk_value: Any):
+        self._apply(table, lambda index: index.remove(pk_value))
+
+    # --- Пошук ---
+    def search(self, query: str, limit: int = 20, use_index: Optional[bool] = None) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Студенти, ім'я яких містить query, за рангом збігу. Повертає (рядки, timing), рядки —
+        Student_ID, Student_Name, rank; timing = {"wall_ms", "source": "index" | "server"}.
+        """
+        use_index = self.in_process if use_index is None else use_index
+        timing: Dict[str, Any] = {"wall_ms": None, "source": "index" if use_index else "server", "rebuilt": False}
+        if use_index:
+            with self._lock:
+                rebuilds = self.rebuilds
+                index = self._ensure_index()
+                # час перебудови показуємо окремо — сам пошук міряємо по готовому індексу
+                timing["rebuilt"] = self.rebuilds != rebuilds
+                started = time.perf_counter()
+                found = index.search(query, limit)
+            cls = compact_rows.row_class(RESULT_FIELDS)
+            result = [tuple.__new__(cls, r) for r in found]
+        else:
+            q = like_escape(query)
+            started = time.perf_counter()
+            with self.model.connection() as conn, conn.cursor(cursor_factory=self.model.row_cursor) as cur:
+                cur.execute(SEARCH_SQL, {"prefix": q + "%", "word": "% " + q + "%", "substr": "%" + q + "%",
+                                         "limit": limit})
+                result = cur.fetchall()
+        timing["wall_ms"] = (time.perf_counter() - started) * 1000
+        return result, timing
+
+    def complete(self, prefix: str, limit: int = 10, use_index: Optional[bool] = None) -> List[str]:
+        """Різні імена, що починаються з prefix (без урахування регістру), за абеткою."""
+        use_index = self.in_process if use_index is None else use_index
+        if use_index:
+            with self._lock:
+                return self._ensure_index().complete(prefix, limit)
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute(COMPLETE_SQL, {"prefix": like_escape(prefix) + "%", "limit": limit})
+            return [r[0] for r in cur.fetchall()]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._index.stats() if self._index is not None else None
+        return {"in_process": self.in_process, "index": index, "rebuilds": self.rebuilds,
+                "last_build_seconds": self.last_build_seconds}
@@ -0,0 +1,207 @@
+# partitions.py
+"""
+Секціонування Registration за діапазонами "Date" (одна секція на місяць).
+
+convert() в одній транзакції перетворює звичайну таблицю на секціоновану: стара таблиця
+перейменовується, створюється нова PARTITION BY RANGE ("Date") з тими самими стовпцями,
+секції на весь діапазон наявних дат і на months_ahead місяців уперед, дані переносяться,
+FK та індекси відтворюються. Первинний ключ секціонованої таблиці мусить містити ключ секціонування,
+тому він стає ("Registration_ID", "Date"); перший стовпець PK лишається "Registration_ID".
+ensure_range() / maintain() заздалегідь створюють відсутні секції (генерація даних викликає їх сама),
+archive_before() від'єднує старі секції і переносить їх у схему архіву (або видаляє).
+Звіти з умовою на "Date" читають лише потрібні секції (partition pruning) — видно в EXPLAIN.
+"""
+import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+
+TABLE = "Registration"
+KEY = "Date"
+ARCHIVE_SCHEMA = "archive"
+
+PARTITIONS_Q = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_class p ON p.oid = i.inhparent
+WHERE p.relname = %s AND p.relnamespace = 'public'::regnamespace
+ORDER BY c.relname;
+"""
+
+BOUND_RE = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+def month_start(d: datetime.date) -> datetime.date:
+    return d.replace(day=1)
+
+
+def add_months(d: datetime.date, n: int) -> datetime.date:
+    months = d.year * 12 + d.month - 1 + n
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+class PartitionManager:
+    def __init__(self, model):
+        self.model = model
+
+    # --- Стан ---
+    def is_partitioned(self) -> bool:
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", (f'public."{TABLE}"',))
+            row = cur.fetchone()
+            return bool(row and row[0])
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """[{"name", "from", "to", "rows" (оцінка з pg_class)}] у порядку дат."""
+        result = []
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute(PARTITIONS_Q, (TABLE,))
+            for name, bound, rows in cur.fetchall():
+                m = BOUND_RE.search(bound or "")
+                result.append({
+                    "name": name,
+                    "from": datetime.date.fromisoformat(m.group(1)) if m else None,
+                    "to": datetime.date.fromisoformat(m.group(2)) if m else None,
+                    "rows": max(rows, 0),
+                })
+        return sorted(result, key=lambda p: p["from"] or datetime.date.min)
+
+    # --- Створення секцій ---
+    def _create_partitions(self, cur, first: datetime.date, last: datetime.date,
+                           existing: Optional[set] = None) -> List[str]:
+        """Місячні секції від місяця first до місяця last включно; повертає імена створених."""
+        created = []
+        month = month_start(first)
+        while month <= last:
+            name = partition_name(month)
+            if existing is None or name not in existing:
+                cur.execute(sql.SQL('CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)').format(
+                    sql.Identifier(name), sql.Identifier(TABLE)), (month, add_months(month, 1)))
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def ensure_range(self, first: datetime.date, last: datetime.date) -> List[str]:
+        """Переконатися, що секції покривають дати [first, last]. Для звичайної таблиці — нічого."""
+        if not self.is_partitioned():
+            return []
+        existing = {p["name"] for p in self.partitions()}
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            created = self._create_partitions(cur, first, last, existing)
+        if created:
+            self.model.invalidate_schema()
+        return created
+
+    def maintain(self, months_ahead: int = 3) -> List[str]:
+        """Створити секції від поточного місяця на months_ahead місяців уперед."""
+        today = datetime.date.today()
+        return self.ensure_range(today, add_months(month_start(today), months_ahead))
+
+    # --- Перетворення ---
+    def convert(self, months_ahead: int = 3) -> Tuple[bool, Optional[str]]:
+        if self.is_partitioned():
+            return False, f"Таблиця {TABLE} уже секціонована"
+        if self.model.catalog.referencing(TABLE):
+            # PK стане складеним — зовнішні ключі інших таблиць на нього не зможуть посилатися
+            return False, f"На таблицю {TABLE} посилаються інші таблиці — перетворення неможливе"
+        old = f"{TABLE}_old"
+        pk_cols = list(self.model.catalog.primary_key_columns(TABLE))
+        pk_cols += [KEY] if KEY not in pk_cols else []
+        try:
+            with self.model.transaction() as conn, conn.cursor() as cur:
+                cur.execute(sql.SQL('LOCK TABLE {} IN ACCESS EXCLUSIVE MODE').format(sql.Identifier(TABLE)))
+                cur.execute(sql.SQL('SELECT min({k}), max({k}), count(*) FILTER (WHERE {k} IS NULL) FROM {t}').format(
+                    k=sql.Identifier(KEY), t=sql.Identifier(TABLE)))
+                min_date, max_date, null_dates = cur.fetchone()
+                if null_dates:
+                    raise ValueError(f"{null_dates} рядків мають порожнє {KEY} — їх неможливо розмістити в секціях")
+                cur.execute(
+                    "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')", (f'public."{TABLE}"',))
+                constraints = cur.fetchall()
+                cur.execute(
+                    "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                    "WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary", (f'public."{TABLE}"',))
+                index_defs = [r[0] for r in cur.fetchall()]
+                cur.execute(sql.SQL('ALTER TABLE {} RENAME TO {}').format(sql.Identifier(TABLE), sql.Identifier(old)))
+                for conname, contype, _ in constraints:
+                    if contype == 'p':
+                        # ім'я індексу PK зайняте в схемі — звільняємо його для нової таблиці
+                        cur.execute(sql.SQL('ALTER TABLE {} RENAME CONSTRAINT {} TO {}').format(
+                            sql.Identifier(old), sql.Identifier(conname), sql.Identifier(f"{conname}_old")))
+                cur.execute(sql.SQL(
+                    'CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED) '
+                    'PARTITION BY RANGE ({})').format(sql.Identifier(TABLE), sql.Identifier(old), sql.Identifier(KEY)))
+                cur.execute(sql.SQL('ALTER TABLE {} ADD PRIMARY KEY ({})').format(
+                    sql.Identifier(TABLE), sql.SQL(', ').join(map(sql.Identifier, pk_cols))))
+                today = datetime.date.today()
+                first = min_date or today
+                last = max(max_date or today, add_months(month_start(today), months_ahead))
+                self._create_partitions(cur, first, last)
+                cur.execute(sql.SQL('INSERT INTO {} SELECT * FROM {}').format(sql.Identifier(TABLE), sql.Identifier(old)))
+                for conname, contype, definition in constraints:
+                    if contype == 'f':
+                        # NOT VALID FK на секціонованій таблиці не підтримується — перевіряємо одразу
+                        definition = definition.replace(" NOT VALID", "")
+                        cur.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} ').format(
+                            sql.Identifier(TABLE), sql.Identifier(conname)) + sql.SQL(definition))
+                self._move_sequences(cur, old)
+                cur.execute(sql.SQL('DROP TABLE {}').format(sql.Identifier(old)))
+                for definition in index_defs:
+                    cur.execute(definition.replace(f' ON public."{old}" ', f' ON public."{TABLE}" '))
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, getattr(e, "pgerror", None) or str(e)
+        finally:
+            self.model.invalidate_schema()
+            self.model.result_cache.clear()
+        return True, None
+
+    def _move_sequences(self, cur, old: str):
+        """Послідовності serial-стовпців належать старій таблиці — передаємо їх новій, щоб DROP їх не зачепив."""
+        cur.execute(
+            "SELECT a.attname, pg_get_serial_sequence(%s, a.attname), a.attidentity <> '' "
+            "FROM pg_attribute a WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped",
+            (f'public."{old}"', f'public."{old}"'))
+        for col, seq, is_identity in cur.fetchall():
+            if not seq:
+                continue
+            if is_identity:
+                # identity нової таблиці має власну послідовність — доводимо її до поточного максимуму
+                cur.execute(sql.SQL('SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(max({}), 0) + 1, false) '
+                                    'FROM {}').format(sql.Identifier(col), sql.Identifier(TABLE)),
+                            (f'public."{TABLE}"', col))
+            else:
+                cur.execute(sql.SQL('ALTER SEQUENCE {} OWNED BY {}.{}').format(
+                    sql.SQL(seq), sql.Identifier(TABLE), sql.Identifier(col)))
+
+    # --- Архівування ---
+    def archive_before(self, cutoff: datetime.date, drop: bool = False) -> List[str]:
+        """
+        Від'єднати секції, що повністю лежать до cutoff, і перенести їх у схему ARCHIVE_SCHEMA
+        (drop=True — видалити). Повертає імена оброблених секцій.
+        """
+        old = [p for p in self.partitions() if p["to"] is not None and p["to"] <= cutoff]
+        if not old:
+            return []
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            if not drop:
+                cur.execute(sql.SQL('CREATE SCHEMA IF NOT EXISTS {}').format(sql.Identifier(ARCHIVE_SCHEMA)))
+            for p in old:
+                cur.execute(sql.SQL('ALTER TABLE {} DETACH PARTITION {}').format(
+                    sql.Identifier(TABLE), sql.Identifier(p["name"])))
+                if drop:
+                    cur.execute(sql.SQL('DROP TABLE {}').format(sql.Identifier(p["name"])))
+                else:
+                    cur.execute(sql.SQL('ALTER TABLE {} SET SCHEMA {}').format(
+                        sql.Identifier(p["name"]), sql.Identifier(ARCHIVE_SCHEMA)))
+        self.model.invalidate_schema()
+        self.model.result_cache.invalidate(TABLE)
+        return [p["name"] for p in old]
@@ -0,0 +1,82 @@
+# plans.py
+"""
+Розбір EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) у дерево вузлів плану.
+
+Для кожного вузла рахуємо повний час (з дітьми) і власний час (без дітей),
+кількість рядків та прочитані буфери — щоб показати найдорожчі вузли запиту.
+Буфери EXPLAIN, як і час, включають дочірні вузли; власні (self_hit, self_read) — різниця з дітьми.
+"""
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class PlanNode:
+    def __init__(self, node_type: str, relation: Optional[str], total_ms: float, rows: int,
+                 loops: int, plan_rows: int, shared_hit: int, shared_read: int,
+                 children: List["PlanNode"], alias: Optional[str] = None, filter: Optional[str] = None,
+                 subplans_removed: int = 0):
+        self.node_type = node_type
+        self.relation = relation
+        self.alias = alias
+        self.filter = filter          # умова Filter вузла (для сканувань), як її друкує EXPLAIN
+        self.subplans_removed = subplans_removed  # Append: секції, відкинуті під час виконання (pruning)
+        self.total_ms = total_ms      # час вузла разом з дітьми, за всі цикли
+        self.rows = rows              # фактично повернуто рядків, за всі цикли
+        self.loops = loops
+        self.plan_rows = plan_rows    # оцінка планувальника (на один цикл)
+        self.shared_hit = shared_hit  # буфери вузла разом з дітьми, як їх друкує EXPLAIN
+        self.shared_read = shared_read
+        self.children = children
+        self.self_ms = max(0.0, total_ms - sum(c.total_ms for c in children))
+        self.self_hit = max(0, shared_hit - sum(c.shared_hit for c in children))
+        self.self_read = max(0, shared_read - sum(c.shared_read for c in children))
+
+    def walk(self) -> Iterator["PlanNode"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def label(self) -> str:
+        return f"{self.node_type} on {self.relation}" if self.relation else self.node_type
+
+    def __repr__(self):
+        return f"PlanNode({self.label()!r}, self_ms={self.self_ms:.3f}, rows={self.rows})"
+
+
+def _build(node: Dict[str, Any]) -> PlanNode:
+    loops = int(node.get("Actual Loops", 1) or 1)
+    children = [_build(child) for child in node.get("Plans", [])]
+    return PlanNode(
+        node_type=node.get("Node Type", "?"),
+        relation=node.get("Relation Name"),
+        total_ms=float(node.get("Actual Total Time", 0.0)) * loops,
+        rows=int(node.get("Actual Rows", 0)) * loops,
+        loops=loops,
+        plan_rows=int(node.get("Plan Rows", 0)),
+        shared_hit=int(node.get("Shared Hit Blocks", 0)),
+        shared_read=int(node.get("Shared Read Blocks", 0)),
+        children=children,
+        alias=node.get("Alias"),
+        filter=node.get("Filter"),
+        subplans_removed=int(node.get("Subplans Removed", 0)),
+    )
+
+
+def parse_explain_json(raw: Any) -> Dict[str, Any]:
+    """
+    raw — вміст єдиного рядка результату EXPLAIN (FORMAT JSON): рядок або вже розібраний список.
+    Повертає {"root": PlanNode, "planning_ms": float, "execution_ms": float}.
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    doc = raw[0] if isinstance(raw, list) else raw
+    return {
+        "root": _build(doc["Plan"]),
+        "planning_ms": doc.get("Planning Time"),
+        "execution_ms": doc.get("Execution Time"),
+    }
+
+
+def hottest_nodes(root: PlanNode, limit: int = 8) -> List[PlanNode]:
+    """Вузли з найбільшим власним часом."""
+    return sorted(root.walk(), key=lambda n: n.self_ms, reverse=True)[:limit]
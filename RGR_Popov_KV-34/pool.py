@@ -0,0 +1,118 @@
+# pool.py
+"""
+Потокобезпечний пул підключень поверх psycopg2.pool.ThreadedConnectionPool.
+
+Стандартний пул psycopg2 не чекає вільного підключення (одразу кидає PoolError),
+тому місця в пулі обмежуємо семафором: потік чекає, поки хтось поверне підключення,
+а час очікування потрапляє в статистику. Перед видачею підключення перевіряється,
+чи воно живе; зламані підключення закриваються і замінюються новими.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Не вдалося отримати підключення з пулу за відведений час."""
+
+
+class ConnectionPool:
+    def __init__(self, minconn: int, maxconn: int, dsn: Dict[str, Any],
+                 acquire_timeout: Optional[float] = None, health_check_idle: float = 30.0,
+                 connection_factory=None):
+        if connection_factory is not None:
+            dsn = dict(dsn, connection_factory=connection_factory)
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._acquire_timeout = acquire_timeout
+        self._health_check_idle = health_check_idle
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.broken = 0
+
+    def getconn(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            raise PoolTimeout("Вичерпано пул підключень: немає вільного підключення")
+        waited = time.perf_counter() - started
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        close = broken or conn.closed != 0
+        if not close and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # незавершена транзакція не повинна "перетекти" до наступного користувача
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+        if close:
+            with self._lock:
+                self.broken += 1
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=close)
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def _checkout_healthy(self):
+        while True:
+            conn = self._pool.getconn()
+            if conn.closed == 0 and self._is_alive(conn):
+                return conn
+            with self._lock:
+                self.broken += 1
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+
+    def _is_alive(self, conn) -> bool:
+        # Підключення, що довго простоювало, пінгуємо; свіже — вважаємо живим без зайвого запиту
+        last = self._last_used.get(id(conn))
+        try:
+            conn.autocommit = True
+            if last is not None and time.monotonic() - last < self._health_check_idle:
+                return True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "wait_total_ms": self.wait_total * 1000,
+                "wait_avg_ms": (self.wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "broken": self.broken,
+            }
@@ -0,0 +1,186 @@
+# prepared.py
+"""
+Реєстр підготовлених операторів (PREPARE / EXECUTE).
+
+Кожен різний оператор (ключ — вид операції, таблиця і набір стовпців) збирається з sql.SQL один раз,
+а на кожному підключенні готується один раз командою PREPARE; далі йде лише EXECUTE з параметрами,
+тож сервер не розбирає і не планує текст запиту щоразу.
+Підключення (PreparedConnection) пам'ятає, які оператори на ньому підготовлено і для якої версії схеми:
+нове підключення (після розриву) готує їх заново, а після зміни схеми (версія каталогу зросла)
+оператор перепідготовлюється. Якщо сервер "забув" оператор (DISCARD ALL) або план став несумісним
+зі схемою, оператор готується повторно і запит виконується ще раз.
+"""
+import hashlib
+import itertools
+import re
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+import psycopg2
+import psycopg2.errorcodes
+import psycopg2.extensions
+from psycopg2 import sql
+
+NAME_PREFIX = "dbm_"
+
+# Помилки, після яких оператор треба підготувати заново
+REPREPARE_CODES = (
+    psycopg2.errorcodes.INVALID_SQL_STATEMENT_NAME,   # 26000: оператора на сервері вже немає
+    psycopg2.errorcodes.FEATURE_NOT_SUPPORTED,        # 0A000: cached plan must not change result type
+)
+
+PLAN_USAGE_Q = """
+SELECT name, generic_plans, custom_plans
+FROM pg_prepared_statements
+WHERE name LIKE 'dbm\\_%'
+"""
+
+# Лексеми, всередині яких %s — не плейсхолдер: рядкові константи ('...', E'...', $тег$...$тег$),
+# ідентифікатори в лапках і коментарі. Поза ними — %% і %s.
+_TOKEN_RE = re.compile(r"""
+    (?P<quoted>
+        (?<![A-Za-z0-9_$])[eE]'(?:[^'\\]|\\.|'')*'
+      | '(?:[^']|'')*'
+      | "(?:[^"]|"")*"
+      | (?<![A-Za-z0-9_$])(?P<dollar>\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$).*?(?P=dollar)
+      | --[^\n]*
+      | /\*.*?\*/
+    )
+  | (?P<percent>%%)
+  | (?P<param>%s)
+""", re.VERBOSE | re.DOTALL)
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Підключення, що пам'ятає свої підготовлені оператори: {ім'я: версія схеми}."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, int] = {}
+
+
+def to_dollar_params(text: str) -> Tuple[str, int]:
+    """
+    Плейсхолдери psycopg2 (%s) -> $1, $2, ...; "%%" -> "%" (за правилами psycopg2 — і в константах).
+    %s усередині рядкової константи, ідентифікатора в лапках чи коментаря параметром не є
+    і лишається як є. Повертає (текст, кількість параметрів).
+    """
+    counter = itertools.count(1)
+    n = 0
+
+    def repl(m):
+        nonlocal n
+        if m.group("quoted") is not None:
+            return m.group("quoted").replace("%%", "%")
+        if m.group("percent") is not None:
+            return "%"
+        n = next(counter)
+        return f"${n}"
+    return _TOKEN_RE.sub(repl, text), n
+
+
+class StatementRegistry:
+    def __init__(self, schema_version: Callable[[], int]):
+        self._schema_version = schema_version
+        self._lock = threading.Lock()
+        # ключ -> (ім'я оператора, текст з $n, кількість параметрів)
+        self._statements: Dict[Hashable, Tuple[str, str, int]] = {}
+        self._labels: Dict[str, str] = {}
+        self.prepares = 0
+        self.reprepares = 0
+        self.executes = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _name(key: Hashable) -> str:
+        return NAME_PREFIX + hashlib.md5(repr(key).encode("utf-8")).hexdigest()[:16]
+
+    def _statement(self, key: Hashable, build: Callable[[], sql.Composable], conn) -> Tuple[str, str, int]:
+        with self._lock:
+            stmt = self._statements.get(key)
+        if stmt is None:
+            query = build()
+            text = query.as_string(conn) if isinstance(query, sql.Composable) else query
+            text, nparams = to_dollar_params(text.strip().rstrip(";"))
+            stmt = (self._name(key), text, nparams)
+            with self._lock:
+                self._statements[key] = stmt
+                self._labels[stmt[0]] = " ".join(map(str, key)) if isinstance(key, tuple) else str(key)
+        return stmt
+
+    def _prepare(self, cur, name: str, text: str):
+        conn = cur.connection
+        if name in conn.prepared:
+            conn.prepared.pop(name)
+            cur.execute(f"DEALLOCATE {name}")
+            with self._lock:
+                self.reprepares += 1
+        cur.execute(f"PREPARE {name} AS {text}")
+        conn.prepared[name] = self._schema_version()
+        with self._lock:
+            self.prepares += 1
+
+    def execute(self, cur, key: Hashable, build: Callable[[], sql.Composable], params: Sequence[Any],
+                prefix: str = ""):
+        """
+        Виконати оператор через EXECUTE на курсорі cur. build() повертає запит з плейсхолдерами %s
+        і викликається лише при першому зверненні до ключа. prefix — напр. "EXPLAIN (...) ".
+        Підключення не PreparedConnection — звичайне виконання тексту.
+        """
+        conn = cur.connection
+        if not isinstance(conn, PreparedConnection):
+            with self._lock:
+                self.fallbacks += 1
+            query = build()
+            if prefix:
+                query = sql.Composed([sql.SQL(prefix), query]) if isinstance(query, sql.Composable) else prefix + query
+            cur.execute(query, params)
+            return
+        name, text, nparams = self._statement(key, build, conn)
+        if conn.prepared.get(name) != self._schema_version():
+            self._prepare(cur, name, text)
+        execute_sql = prefix + f"EXECUTE {name}" + (" (" + ", ".join(["%s"] * nparams) + ")" if nparams else "")
+        try:
+            cur.execute(execute_sql, params)
+        except psycopg2.Error as e:
+            if e.pgcode not in REPREPARE_CODES:
+                raise
+            if e.pgcode == psycopg2.errorcodes.INVALID_SQL_STATEMENT_NAME:
+                conn.prepared.pop(name, None)   # DEALLOCATE не потрібен — оператора вже немає
+            else:
+                conn.prepared[name] = -1        # застарів: наступна підготовка зробить DEALLOCATE
+            if not conn.autocommit:
+                # транзакцію вже перервано — перепідготуємо при наступному виклику
+                raise
+            self._prepare(cur, name, text)
+            cur.execute(execute_sql, params)
+        with self._lock:
+            self.executes += 1
+
+    def plan_usage(self, conn) -> List[Dict[str, Any]]:
+        """
+        Скільки разів кожен оператор виконувався з загальним (generic) і окремим (custom) планом —
+        з pg_prepared_statements цього підключення (PostgreSQL 14+; на старших версіях — порожньо).
+        """
+        if not isinstance(conn, PreparedConnection):
+            return []
+        try:
+            with conn.cursor() as cur:
+                cur.execute(PLAN_USAGE_Q)
+                rows = cur.fetchall()
+        except psycopg2.Error:
+            return []
+        return [
+            {"statement": self._labels.get(name, name), "generic_plans": generic, "custom_plans": custom}
+            for name, generic, custom in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "statements": len(self._statements),
+                "prepares": self.prepares,
+                "reprepares": self.reprepares,
+                "executes": self.executes,
+                "fallbacks": self.fallbacks,
+            }
@@ -0,0 +1,46 @@
+# queries.py
+"""
+Реєстр аналітичних запитів для вимірювань: назва -> (метод DBModel, генератор параметрів),
+і перцентиль латентностей. Спільний для бенчмарку (benchmark.py) і порадника індексів
+(index_advisor.py), тож консольний застосунок не завантажує сам бенчмарк.
+"""
+import datetime
+import random
+from typing import Callable, Dict, List, Tuple
+
+from models import STUDENT_FIRST_NAMES, STUDENT_LAST_NAMES
+
+
+def name_param(rnd: random.Random) -> tuple:
+    name = rnd.choice(STUDENT_FIRST_NAMES + STUDENT_LAST_NAMES)
+    start = rnd.randint(0, max(0, len(name) - 3))
+    return (name[start:start + rnd.randint(3, 6)],)
+
+
+def experience_param(rnd: random.Random) -> tuple:
+    return (rnd.randint(1, 40),)
+
+
+def period_param(rnd: random.Random) -> tuple:
+    # generate_registrations дає дати за останні ~1000 днів
+    end = datetime.date.today() - datetime.timedelta(days=rnd.randint(0, 900))
+    start = end - datetime.timedelta(days=rnd.randint(30, 180))
+    return start.isoformat(), end.isoformat()
+
+
+# Назва запиту -> (метод DBModel, генератор параметрів)
+QUERIES: Dict[str, Tuple[str, Callable[[random.Random], tuple]]] = {
+    "student_tasks_by_name": ("query_student_tasks_by_name", name_param),
+    "professor_course_counts": ("query_professor_course_counts", experience_param),
+    "course_regs_in_period": ("query_course_regs_in_period", period_param),
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Перцентиль з лінійною інтерполяцією (як numpy.percentile за замовчуванням)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
@@ -0,0 +1,82 @@
+# render.py
+"""
+Потоковий вивід таблиць фіксованої ширини (у вигляді tablefmt="psql" з tabulate).
+
+tabulate спершу перетворює на рядки всі клітинки всіх рядків і лише тоді друкує — для великих
+результатів це і пам'ять, і затримка до першого рядка. write_table() бере ітератор рядків-словників,
+ширини стовпців визначає за обмеженою вибіркою (перші sample рядків), задовгі клітинки обрізає
+і пише вивід порціями: перший рядок з'являється одразу, пам'ять не залежить від кількості рядків.
+Клітинки, ширші за стовпець, вибраний за вибіркою, обрізаються так само, як і задовгі у вибірці.
+"""
+import decimal
+import itertools
+import sys
+from typing import Any, Iterable, List, Mapping, Optional, TextIO
+
+ELLIPSIS = "…"
+FLUSH_LINES = 256   # скільки рядків тексту накопичувати перед записом у потік
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).replace("\r", " ").replace("\n", " ").replace("\t", " ")
+
+
+def _fit(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + ELLIPSIS
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool)
+
+
+def write_table(rows: Iterable[Mapping[str, Any]], out: Optional[TextIO] = None, sample: int = 100,
+                max_width: int = 40, limit: Optional[int] = None) -> int:
+    """
+    Вивести рядки таблицею. Заголовки — ключі першого рядка; числові стовпці (за вибіркою)
+    вирівнюються праворуч. limit — не більше стількох рядків. Повертає кількість виведених рядків.
+    """
+    out = out or sys.stdout
+    it = iter(rows) if limit is None else itertools.islice(rows, limit)
+    head = list(itertools.islice(it, max(sample, 1)))
+    if not head:
+        return 0
+    columns = list(head[0].keys())
+    widths = [min(max(len(str(c)), 1), max_width) for c in columns]
+    numeric = [True] * len(columns)
+    seen = [False] * len(columns)
+    for row in head:
+        for i, c in enumerate(columns):
+            value = row.get(c)
+            if value is None:
+                continue
+            seen[i] = True
+            numeric[i] = numeric[i] and _is_number(value)
+            widths[i] = max(widths[i], min(len(_cell(value)), max_width))
+    numeric = [n and s for n, s in zip(numeric, seen)]
+
+    border = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+    separator = "|" + "+".join("-" * (w + 2) for w in widths) + "|"
+
+    def line(cells: List[str], align_numbers: bool = True) -> str:
+        parts = []
+        for text, w, num in zip(cells, widths, numeric):
+            text = _fit(text, w)
+            parts.append(text.rjust(w) if num and align_numbers else text.ljust(w))
+        return "| " + " | ".join(parts) + " |"
+
+    buffer = [border, line([str(c) for c in columns], align_numbers=False), separator]
+    count = 0
+    for row in itertools.chain(head, it):
+        buffer.append(line([_cell(row.get(c)) for c in columns]))
+        count += 1
+        if len(buffer) >= FLUSH_LINES:
+            out.write("\n".join(buffer) + "\n")
+            buffer.clear()
+    buffer.append(border)
+    out.write("\n".join(buffer) + "\n")
+    out.flush()
+    return count
@@ -0,0 +1,168 @@
+# result_cache.py
+"""
+Кеш результатів аналітичних запитів DBModel.
+
+Ключ — (назва запиту, параметри). Записи витісняються за LRU, коли перевищено кількість записів
+або оцінку зайнятої пам'яті, і стають недійсними через ttl секунд. Кожен запис пам'ятає,
+з яких таблиць він прочитаний; запис у таблицю (insert/update/delete, пакетні операції, генерація)
+викидає всі записи, що від неї залежать.
+Щоб не зберегти результат, прочитаний до паралельного запису, для кожної таблиці ведеться лічильник
+змін: якщо він змінився, поки запит виконувався, результат у кеш не потрапляє.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from rows import CompactRow
+
+_MISSING = object()
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Груба оцінка пам'яті (байти) результату: списки рядків-словників зі скалярами."""
+    size = sys.getsizeof(obj)
+    if _depth > 3:
+        return size
+    if isinstance(obj, CompactRow):
+        # імена стовпців спільні для всіх рядків класу — рахуємо лише значення
+        size += sum(estimate_size(v, _depth + 1) for v in obj.values())
+    elif isinstance(obj, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(estimate_size(v, _depth + 1) for v in obj)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "tables", "expires", "size")
+
+    def __init__(self, value: Any, tables: Tuple[str, ...], expires: float, size: int):
+        self.value = value
+        self.tables = tables
+        self.expires = expires
+        self.size = size
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 60.0,
+                 enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_table: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # --- Читання / запис ---
+    def get(self, key: Hashable) -> Any:
+        """Значення або _MISSING (див. is_miss)."""
+        if not self.enabled:
+            return _MISSING
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    @staticmethod
+    def is_miss(value: Any) -> bool:
+        return value is _MISSING
+
+    def generations(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Знімок лічильників змін таблиць — взяти ДО виконання запиту і передати в put."""
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tables)
+
+    def put(self, key: Hashable, value: Any, tables: Tuple[str, ...], seen: Optional[Tuple[int, ...]] = None):
+        if not self.enabled:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if seen is not None and seen != tuple(self._generations.get(t, 0) for t in tables):
+                return  # поки запит виконувався, в одну з таблиць писали — результат міг застаріти
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, tables, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        for t in entry.tables:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+
+    # --- Інвалідація ---
+    def invalidate(self, *tables: str):
+        """Викинути записи, що залежать від будь-якої з таблиць."""
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+                for key in list(self._by_table.get(t, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            # лічильники всіх відомих таблиць — на них покладаються й інші кеші (namesearch.py)
+            for t in set(self._by_table) | set(self._generations):
+                self._generations[t] = self._generations.get(t, 0) + 1
+            self._entries.clear()
+            self._by_table.clear()
+            self.bytes = 0
+
+    @contextmanager
+    def disabled(self):
+        """Тимчасово вимкнути кеш (бенчмарк і порадник індексів мають міряти справжні запити)."""
+        was = self.enabled
+        self.enabled = False
+        try:
+            yield
+        finally:
+            self.enabled = was
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
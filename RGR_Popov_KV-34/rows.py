@@ -0,0 +1,135 @@
+# rows.py
+"""
+Компактні рядки результатів замість словників RealDictCursor.
+
+Рядок — кортеж значень (підклас tuple з __slots__ = ()), а імена стовпців і їхні позиції
+зберігаються один раз у класі. Клас створюється на набір стовпців (для таблиці — з метаданих
+каталогу) і кешується, тож мільйон рядків однієї таблиці — мільйон кортежів без окремого dict на рядок.
+Доступ як до словника: row["Student_ID"], row.get(), keys() / values() / items(), "col" in row,
+ітерація за іменами стовпців, dict(row) — тому views і контролер працюють з ними без змін.
+"""
+import collections.abc
+import threading
+from typing import Any, Dict, Iterator, Sequence, Tuple
+
+import psycopg2.extensions
+
+_classes: Dict[Tuple[str, ...], type] = {}
+_lock = threading.Lock()
+
+
+class CompactRow(tuple):
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            try:
+                return tuple.__getitem__(self, self._index[key])
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(tuple.__iter__(self))
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self._fields, tuple.__iter__(self))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, collections.abc.Mapping) and not isinstance(other, CompactRow):
+            return dict(self.items()) == dict(other)
+        return tuple.__eq__(self, other)
+
+    __hash__ = tuple.__hash__
+
+    def __reduce__(self):
+        # клас створюється динамічно — передаємо (стовпці, значення), а не посилання на клас
+        return _rebuild, (self._fields, self.__class__.__name__, self.values())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+collections.abc.Mapping.register(CompactRow)
+
+
+def row_class(columns: Sequence[str], name: str = "Row") -> type:
+    """Клас рядка для набору стовпців (кешується за іменами стовпців; name — лише для repr)."""
+    key = tuple(columns)
+    cls = _classes.get(key)
+    if cls is None:
+        with _lock:
+            cls = _classes.get(key)
+            if cls is None:
+                cls = type(name, (CompactRow,), {
+                    "__slots__": (),
+                    "_fields": key,
+                    "_index": {c: i for i, c in enumerate(key)},
+                })
+                _classes[key] = cls
+    return cls
+
+
+def _rebuild(columns, name, values):
+    return tuple.__new__(row_class(columns, name), values)
+
+
+class CompactRowCursor(psycopg2.extensions.cursor):
+    """Курсор, що повертає CompactRow; клас рядка визначається за cursor.description."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._row_cls = None
+
+    def execute(self, query, vars=None):
+        self._row_cls = None
+        return super().execute(query, vars)
+
+    def _make(self):
+        if self._row_cls is None:
+            self._row_cls = row_class([d[0] for d in self.description])
+        new, cls = tuple.__new__, self._row_cls
+        return lambda t: new(cls, t)
+
+    def fetchone(self):
+        t = super().fetchone()
+        return None if t is None else self._make()(t)
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        if not rows:
+            return rows
+        make = self._make()
+        return [make(t) for t in rows]
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if not rows:
+            return rows
+        make = self._make()
+        return [make(t) for t in rows]
+
+    def __iter__(self):
+        make = None
+        for t in super().__iter__():
+            if make is None:
+                make = self._make()
+            yield make(t)
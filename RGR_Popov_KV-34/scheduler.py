@@ -0,0 +1,204 @@
+# scheduler.py
+"""
+Паралельна генерація даних у порядку графа FK.
+
+GenerationScheduler будує з каталогу DAG "батьківська таблиця -> дочірня" і запускає кожну таблицю
+у власному потоці (з власним підключенням з пулу), щойно всі її батьки згенеровані й зафіксовані:
+Student, Professor і Course — одночасно, Task — одразу після Course, Registration — після всіх трьох.
+Велика таблиця ділиться на неперетинні діапазони ID, зарезервовані одним зверненням до IdAllocator
+(id_alloc.py), — кілька одночасних завантажень не отримають однакових ID:
+  - рядки, які генерує клієнт (Student, Professor, Course, Task), готують і завантажують через COPY
+    процеси-працівники (ProcessPoolExecutor) — генерація в Python займає ядро CPU на частину;
+  - Registration генерує сам сервер (INSERT ... SELECT generate_series) — частини виконуються
+    паралельними операторами на різних підключеннях.
+Якщо батьківська таблиця не згенерувалась, дочірні пропускаються з помилкою.
+"""
+import concurrent.futures
+import datetime
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+
+import bulk_loader
+from models import (DBModel, GENERATED_COLUMNS, REGISTRATIONS_SQL, copy_generated_range, generation_seed,
+                    registration_params)
+
+Result = Tuple[bool, Optional[str]]
+
+
+def dependency_graph(model: DBModel, tables: List[str]) -> Dict[str, Set[str]]:
+    """{таблиця: множина батьківських таблиць серед tables} за FK з каталогу."""
+    return {
+        t: {parent for _, _, _, parent, _ in model.catalog.foreign_keys(t) if parent in tables and parent != t}
+        for t in tables
+    }
+
+
+def split_ranges(ranges: List[Tuple[int, int]], parts: int) -> List[Tuple[int, int]]:
+    """Розбити зарезервовані діапазони [(start, кількість)] приблизно на parts частин пропорційно розміру."""
+    total = sum(n for _, n in ranges) or 1
+    return [piece for lo, n in ranges for piece in split_range(lo, n, max(1, round(parts * n / total)))]
+
+
+def split_range(start_id: int, count: int, parts: int) -> List[Tuple[int, int]]:
+    """Розбити [start_id, start_id+count) на parts неперетинних діапазонів (start, кількість)."""
+    parts = max(1, min(parts, count))
+    base, extra = divmod(count, parts)
+    ranges = []
+    for i in range(parts):
+        n = base + (1 if i < extra else 0)
+        ranges.append((start_id, n))
+        start_id += n
+    return ranges
+
+
+class GenerationScheduler:
+    def __init__(self, model: DBModel, processes: Optional[int] = None, min_rows_per_worker: int = 50_000):
+        self.model = model
+        self.processes = processes or os.cpu_count() or 1
+        self.min_rows_per_worker = min_rows_per_worker
+
+    def _parts(self, count: int) -> int:
+        return max(1, min(self.processes, count // max(1, self.min_rows_per_worker)))
+
+    # --- Одна таблиця ---
+    def _generate_copy(self, table: str, count: int, executor) -> Result:
+        """Клієнтська генерація частинами в процесах-працівниках; ID частин не перетинаються."""
+        parts = self._parts(count)
+        if parts == 1 or executor is None:
+            return getattr(self.model, f"generate_{table.lower()}s")(count)
+        id_col = GENERATED_COLUMNS[table][0]
+        course_ids = None
+        try:
+            # serial (Student) сам видає неперетинні ID — діапазон потрібен лише для явних ID
+            ranges = self.model.reserve_ids(table, count) if id_col else [(0, count)]
+            if table == "Task":
+                with self.model.connection() as conn, conn.cursor() as cur:
+                    cur.execute('SELECT array_agg("Course_ID") FROM "Course";')
+                    course_ids = cur.fetchone()[0] or [1]
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        except ValueError as e:
+            return False, str(e)
+        started = time.perf_counter()
+        # seed кожної частини — з модуля random: random.seed(...) у головному процесі робить їх відтворюваними
+        futures = [executor.submit(copy_generated_range, table, lo, n, course_ids, generation_seed())
+                   for lo, n in split_ranges(ranges, parts)]
+        try:
+            loaded = sum(f.result() for f in futures)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            self.model.result_cache.invalidate(table)
+        self.model.load_stats[table] = bulk_loader.make_stats(table, loaded, time.perf_counter() - started)
+        return True, None
+
+    def _generate_registrations(self, count: int) -> Result:
+        """
+        Серверна генерація частинами на різних підключеннях. Частини — лише коли є пул (окремі
+        підключення) і агрегати не свіжі: свіжі агрегати вимагають одного завантаження з вимкненими
+        тригерами (SummaryManager.bulk_load), а паралельні дельти тригерів блокували б одна одну.
+        """
+        parts = self._parts(count)
+        if parts == 1 or self.model.pool is None or self.model.summaries.is_fresh():
+            return self.model.generate_registrations(count)
+        started = time.perf_counter()
+        try:
+            # секції на весь діапазон дат, як у generate_registrations, — до паралельних вставок
+            today = datetime.date.today()
+            self.model.partitions.ensure_range(today - datetime.timedelta(days=1000), today)
+            ranges = self.model.reserve_ids("Registration", count)
+            # offset — порядковий номер першого рядка частини: з тим самим seed рядки не залежать від поділу
+            seed, offset, jobs = generation_seed(), 0, []
+            for lo, n in split_ranges(ranges, parts):
+                jobs.append(registration_params(lo, n, seed, offset))
+                offset += n
+            with concurrent.futures.ThreadPoolExecutor(max_workers=parts) as pool:
+                inserted = sum(pool.map(self._registration_part, jobs))
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        except ValueError as e:
+            return False, str(e)
+        finally:
+            self.model.result_cache.invalidate("Registration")
+        self.model.load_stats["Registration"] = bulk_loader.make_stats(
+            "Registration", inserted, time.perf_counter() - started)
+        return True, None
+
+    def _registration_part(self, params: Dict[str, int]) -> int:
+        # кожен потік бере з пулу власне підключення (autocommit — частина фіксується одразу)
+        with self.model.connection() as conn, conn.cursor() as cur:
+            cur.execute(REGISTRATIONS_SQL, params)
+            return cur.rowcount
+
+    def _generate(self, table: str, count: int, executor) -> Result:
+        if table == "Registration":
+            return self._generate_registrations(count)
+        if table in GENERATED_COLUMNS:
+            return self._generate_copy(table, count, executor)
+        return False, f"Немає генератора для таблиці {table}"
+
+    # --- Уся схема ---
+    def run(self, counts: Dict[str, int],
+            on_done: Optional[Callable[[str, bool, Optional[str], float], None]] = None) -> Dict[str, Result]:
+        """
+        Згенерувати counts[table] рядків для кожної таблиці. Таблиця стартує, щойно завершились
+        усі її батьки. on_done(table, ok, err, seconds) викликається в міру завершення.
+        Повертає {table: (ok, err)}.
+        """
+        tables = list(counts)
+        graph = dependency_graph(self.model, tables)
+        results: Dict[str, Result] = {}
+        # без пулу всі потоки ділили б одне підключення — таблиці тоді йдуть по черзі
+        threads = len(tables) if self.model.pool is not None else 1
+        # spawn, а не fork: дочірній процес не успадковує відкритих підключень psycopg2
+        executor = (concurrent.futures.ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+                    if self.processes > 1 else None)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+                running: Dict[Any, Tuple[str, float]] = {}
+                pending = set(tables)
+
+                def submit_ready():
+                    for t in sorted(pending):
+                        parents = graph[t]
+                        failed = [p for p in parents if p in results and not results[p][0]]
+                        if failed:
+                            pending.discard(t)
+                            results[t] = (False, f"Не згенеровано батьківську таблицю {failed[0]}")
+                            if on_done:
+                                on_done(t, False, results[t][1], 0.0)
+                        elif all(p in results for p in parents):
+                            pending.discard(t)
+                            running[pool.submit(self._generate, t, counts[t], executor)] = (t, time.perf_counter())
+
+                submit_ready()
+                while running:
+                    done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for f in done:
+                        t, started = running.pop(f)
+                        try:
+                            results[t] = f.result()
+                        except Exception as e:
+                            results[t] = (False, str(e))
+                        if on_done:
+                            on_done(t, results[t][0], results[t][1], time.perf_counter() - started)
+                    submit_ready()
+                    # пропущені через батьків таблиці одразу потрапляють у results — їхні нащадки теж
+                    while pending and not running and any(
+                            any(p in results and not results[p][0] for p in graph[t]) for t in pending):
+                        submit_ready()
+                for t in pending:
+                    # батьки так і не завершились — цикл у графі FK
+                    results[t] = (False, "Цикл зовнішніх ключів — порядок генерації не визначено")
+                    if on_done:
+                        on_done(t, False, results[t][1], 0.0)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return results
@@ -0,0 +1,263 @@
+# snapshot.py
+"""
+Стовпцевий знімок даних для звітів без звернень до бази (потрібен numpy).
+
+build() читає Registration, Course, Student, Professor і Task у одній транзакції REPEATABLE READ
+через COPY (SELECT ...) TO STDOUT (FORMAT binary). Усі поля запиту — 4-байтові цілі фіксованої ширини:
+ID як int4 (NULL -> NULL_ID), дати як int4 днів від 2000-01-01 (NULL -> -infinity), рядки — коди
+словника (dense_rank за значенням), тож бінарний потік читається numpy як масив записів без розбору
+рядок за рядком. Кожен стовпець зберігається окремим .npy (ID — int32, дати — datetime64[D]),
+словники рядків — у meta.json. open() відкриває стовпці через mmap: повторні звіти читають лише
+потрібні сторінки файлів.
+Три звіти DBModel повторені векторними ядрами (searchsorted-з'єднання, unique/bincount-групування)
+з тією самою семантикою SQL: ILIKE, LEFT JOIN, COUNT(DISTINCT), BETWEEN, групування за іменами.
+Порядок рядків з однаковою кількістю SQL не визначає — у знімку вони впорядковані за ключем групи.
+"""
+import collections
+import datetime
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from psycopg2 import sql
+
+import rows as compact_rows
+
+NULL_ID = np.iinfo(np.int32).min
+PG_EPOCH = np.datetime64("2000-01-01", "D")
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+RESULT_LIMIT = 100  # як LIMIT 100 у звітах DBModel
+META_FILE = "meta.json"
+
+# Таблиця -> (PK, цілі стовпці, стовпці дат, текстові стовпці); PK — перший цілий стовпець
+TABLES = {
+    "Student": ("Student_ID", ["Student_ID"], [], ["Student_Name"]),
+    "Professor": ("Professor_ID", ["Professor_ID", "Experience"], [], ["Professor_Name"]),
+    "Course": ("Course_ID", ["Course_ID"], [], ["Name"]),
+    "Task": ("Task_ID", ["Task_ID", "Course_ID"], [], []),
+    "Registration": ("Registration_ID", ["Registration_ID", "Course_ID", "Professor_ID", "Student_ID"], ["Date"], []),
+}
+
+
+def like_to_regex(pattern: str) -> "re.Pattern":
+    """Шаблон LIKE/ILIKE (%, _, екранування \\) у регулярний вираз без урахування регістру."""
+    out, escaped = [], False
+    for ch in pattern:
+        if escaped:
+            out.append(re.escape(ch))
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == "%":
+            out.append(".*")
+        elif ch == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return re.compile("".join(out), re.IGNORECASE | re.DOTALL)
+
+
+def _lookup(sorted_ids: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """З'єднання за ключем: позиції values у відсортованих sorted_ids і маска знайдених."""
+    if len(sorted_ids) == 0:
+        return np.zeros(len(values), dtype=np.intp), np.zeros(len(values), dtype=bool)
+    idx = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return idx, sorted_ids[idx] == values
+
+
+def _top(counts: np.ndarray, *keys: np.ndarray) -> np.ndarray:
+    """Позиції перших RESULT_LIMIT груп за спаданням кількості, за рівності — за ключами групи."""
+    return np.lexsort(tuple(reversed(keys)) + (-counts,))[:RESULT_LIMIT]
+
+
+def result_key(row) -> tuple:
+    return tuple(row[k] for k in row)
+
+
+def same_result(expected: List[Any], actual: List[Any]) -> bool:
+    """
+    Чи збігаються результати звіту (останній стовпець — кількість, за нею ORDER BY ... DESC LIMIT).
+    Кількості мають збігатися поелементно; рядки — як мультимножини, крім групи з найменшою кількістю
+    на межі LIMIT, з якої SQL може взяти будь-які рядки.
+    """
+    a, b = [result_key(r) for r in expected], [result_key(r) for r in actual]
+    if [r[-1] for r in a] != [r[-1] for r in b]:
+        return False
+    if len(a) < RESULT_LIMIT:
+        return collections.Counter(a) == collections.Counter(b)
+    boundary = a[-1][-1]
+    return (collections.Counter(r for r in a if r[-1] != boundary) ==
+            collections.Counter(r for r in b if r[-1] != boundary))
+
+
+class Snapshot:
+    def __init__(self, path: str, columns: Dict[str, np.ndarray], dictionaries: Dict[str, List[Optional[str]]],
+                 meta: Dict[str, Any]):
+        self.path = path
+        self.columns = columns            # "Таблиця.Стовпець" -> масив
+        self.dictionaries = dictionaries  # "Таблиця.Стовпець" -> значення за кодом
+        self.meta = meta
+
+    # --- Побудова ---
+    @staticmethod
+    def _copy_query(table: str, pk: str, ints: List[str], dates: List[str], texts: List[str]) -> sql.Composed:
+        fields = [sql.SQL("COALESCE({}::int4, {})").format(sql.Identifier(c), sql.Literal(int(NULL_ID))) for c in ints]
+        fields += [sql.SQL("COALESCE({}, '-infinity'::date)").format(sql.Identifier(c)) for c in dates]
+        fields += [sql.SQL("(dense_rank() OVER (ORDER BY {}) - 1)::int4").format(sql.Identifier(c)) for c in texts]
+        return sql.SQL("COPY (SELECT {} FROM {} ORDER BY {}) TO STDOUT (FORMAT binary)").format(
+            sql.SQL(", ").join(fields), sql.Identifier(table), sql.Identifier(pk))
+
+    @staticmethod
+    def _read_binary(raw_path: str, n_fields: int) -> np.ndarray:
+        """Записи бінарного COPY з n_fields полями int4 (без NULL) як структурований масив numpy."""
+        with open(raw_path, "rb") as f:
+            header = f.read(19)
+        if header[:11] != COPY_SIGNATURE:
+            raise ValueError("Неочікуваний формат бінарного COPY")
+        offset = 19 + int.from_bytes(header[15:19], "big")
+        dtype = np.dtype([("n", ">i2")] + [x for i in range(n_fields) for x in ((f"l{i}", ">i4"), (f"f{i}", ">i4"))])
+        count = (os.path.getsize(raw_path) - offset - 2) // dtype.itemsize
+        if count <= 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(raw_path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    @classmethod
+    def build(cls, model, path: str) -> "Snapshot":
+        """Зняти знімок п'яти таблиць в один момент часу і зберегти в каталог path (старий замінюється)."""
+        started = time.perf_counter()
+        tmp = path.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        dictionaries: Dict[str, List[Optional[str]]] = {}
+        counts: Dict[str, int] = {}
+        with model.transaction() as conn, conn.cursor() as cur:
+            # усі таблиці — з одного знімка MVCC, словники — узгоджені з кодами
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            for table, (pk, ints, dates, texts) in TABLES.items():
+                raw_path = os.path.join(tmp, f"{table}.copy")
+                with open(raw_path, "wb") as f:
+                    cur.copy_expert(cls._copy_query(table, pk, ints, dates, texts), f)
+                records = cls._read_binary(raw_path, len(ints) + len(dates) + len(texts))
+                for i, col in enumerate(ints + dates + texts):
+                    values = records[f"f{i}"].astype(np.int32)
+                    if col in dates:
+                        days = values
+                        values = PG_EPOCH + days.astype("timedelta64[D]")
+                        values[days == NULL_ID] = np.datetime64("NaT")
+                    np.save(os.path.join(tmp, f"{table}.{col}.npy"), values)
+                counts[table] = len(records)
+                del records
+                os.remove(raw_path)
+                for col in texts:
+                    cur.execute(sql.SQL("SELECT DISTINCT {c} FROM {t} ORDER BY {c}").format(
+                        c=sql.Identifier(col), t=sql.Identifier(table)))
+                    dictionaries[f"{table}.{col}"] = [r[0] for r in cur.fetchall()]
+        meta = {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "rows": counts,
+            "build_seconds": time.perf_counter() - started,
+            "dictionaries": dictionaries,
+        }
+        with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot":
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {}
+        for table, (_, ints, dates, texts) in TABLES.items():
+            for col in ints + dates + texts:
+                columns[f"{table}.{col}"] = np.load(os.path.join(path, f"{table}.{col}.npy"), mmap_mode="r")
+        return cls(path, columns, meta.pop("dictionaries"), meta)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    def info(self) -> Dict[str, Any]:
+        return dict(self.meta, path=self.path)
+
+    # --- Звіти (ті самі сигнатури й результат, що в DBModel) ---
+    def _result(self, fields: List[str], kernel) -> tuple:
+        timing: Dict[str, Any] = {"wall_ms": None, "execute_ms": None, "fetch_ms": None, "rows": 0,
+                                  "cached": False, "summary": False, "snapshot": True}
+        t0 = time.perf_counter()
+        values = kernel()
+        t1 = time.perf_counter()
+        cls = compact_rows.row_class(fields)
+        result = [tuple.__new__(cls, v) for v in values]
+        t2 = time.perf_counter()
+        timing.update(wall_ms=(t2 - t0) * 1000, execute_ms=(t1 - t0) * 1000,
+                      fetch_ms=(t2 - t1) * 1000, rows=len(result))
+        return result, timing, None, None
+
+    def query_student_tasks_by_name(self, student_name_pattern: str, explain: bool = False):
+        c = self.columns
+        names = self.dictionaries["Student.Student_Name"]
+        courses = self.dictionaries["Course.Name"]
+
+        def kernel():
+            rx = like_to_regex(f"%{student_name_pattern}%")
+            matched = np.array([i for i, n in enumerate(names) if n is not None and rx.fullmatch(n)], dtype=np.int32)
+            student_ok = np.isin(c["Student.Student_Name"], matched)
+            s_idx, s_found = _lookup(c["Student.Student_ID"], c["Registration.Student_ID"])
+            c_idx, c_found = _lookup(c["Course.Course_ID"], c["Registration.Course_ID"])
+            keep = s_found & c_found
+            keep[keep] = student_ok[s_idx[keep]]
+            # LEFT JOIN Task + COUNT(Task_ID): кожна реєстрація додає кількість завдань свого курсу (0, якщо немає)
+            t_idx, t_found = _lookup(c["Course.Course_ID"], c["Task.Course_ID"])
+            tasks_per_course = np.bincount(t_idx[t_found], minlength=len(c["Course.Course_ID"]))
+            s_code = c["Student.Student_Name"][s_idx[keep]].astype(np.int64)
+            c_code = c["Course.Name"][c_idx[keep]].astype(np.int64)
+            groups, inverse = np.unique(s_code * len(courses) + c_code, return_inverse=True)
+            sums = np.bincount(inverse, weights=tasks_per_course[c_idx[keep]], minlength=len(groups)).astype(np.int64)
+            top = _top(sums, groups)
+            return [(names[g // len(courses)], courses[g % len(courses)], int(n))
+                    for g, n in zip(groups[top], sums[top])]
+        return self._result(["student", "course", "tasks_count"], kernel)
+
+    def query_professor_course_counts(self, min_experience: int, explain: bool = False):
+        c = self.columns
+        names = self.dictionaries["Professor.Professor_Name"]
+
+        def kernel():
+            exp = c["Professor.Experience"]
+            prof_ok = (exp != NULL_ID) & (exp >= min_experience)
+            # групи — (ім'я, досвід) відібраних викладачів; для кожного викладача — номер його групи
+            pairs = np.stack([c["Professor.Professor_Name"][prof_ok].astype(np.int64), exp[prof_ok].astype(np.int64)], 1)
+            groups, prof_group = np.unique(pairs.reshape(-1, 2), axis=0, return_inverse=True)
+            group_of = np.full(len(exp), -1, dtype=np.int64)
+            group_of[prof_ok] = prof_group.reshape(-1)
+            p_idx, p_found = _lookup(c["Professor.Professor_ID"], c["Registration.Professor_ID"])
+            course = c["Registration.Course_ID"]
+            keep = p_found & (course != NULL_ID)
+            keep[keep] = group_of[p_idx[keep]] >= 0
+            # COUNT(DISTINCT Course_ID) на групу: унікальні пари (група, курс)
+            pair_key = (group_of[p_idx[keep]] << 32) | (course[keep].astype(np.int64) - int(NULL_ID))
+            counts = np.bincount(np.unique(pair_key) >> 32, minlength=len(groups)).astype(np.int64)
+            top = _top(counts, groups[:, 0], groups[:, 1])
+            return [(names[g[0]], int(g[1]), int(n)) for g, n in zip(groups[top], counts[top])]
+        return self._result(["professor", "Experience", "courses_count"], kernel)
+
+    def query_course_regs_in_period(self, start_date: str, end_date: str, explain: bool = False):
+        c = self.columns
+        courses = self.dictionaries["Course.Name"]
+
+        def kernel():
+            dates = c["Registration.Date"]
+            in_period = (dates >= np.datetime64(start_date, "D")) & (dates <= np.datetime64(end_date, "D"))
+            c_idx, c_found = _lookup(c["Course.Course_ID"], c["Registration.Course_ID"])
+            keep = c_found & in_period
+            counts = np.bincount(c["Course.Name"][c_idx[keep]], minlength=len(courses)).astype(np.int64)
+            codes = np.flatnonzero(counts)
+            top = _top(counts[codes], codes)
+            return [(courses[g], int(n)) for g, n in zip(codes[top], counts[codes][top])]
+        return self._result(["course", "regs_count"], kernel)
@@ -0,0 +1,249 @@
+# summaries.py
+"""
+Агрегатні таблиці для звітів за реєстраціями.
+
+summary_course_day    — кількість реєстрацій на (день, курс): звіт за період підсумовує дні;
+summary_professor_course — кількість реєстрацій на (викладач, курс): множина курсів викладача.
+Обидві підтримуються інкрементно тригерами рівня оператора на "Registration" з таблицями переходів
+(REFERENCING NEW/OLD TABLE): один INSERT ... SELECT чи COPY на мільйон рядків — одне застосування
+дельти, згрупованої по ключах, а не мільйон тригерів на рядок.
+summary_state.fresh позначає, чи агрегати відповідають даним. Для великих завантажень тригери
+на час оператора вимикаються і прапорець скидається — звіти тоді читають базові таблиці,
+доки rebuild() не перерахує агрегати з нуля.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import psycopg2
+import psycopg2.errors
+from psycopg2 import sql
+
+TABLE = "Registration"
+STATE_NAME = "registration"
+STATE_TABLE = "summary_state"
+TRIGGERS = ("summary_registration_ins", "summary_registration_del", "summary_registration_upd",
+            "summary_registration_trunc")
+
+INSTALL_SQL = """
+CREATE TABLE IF NOT EXISTS summary_state (
+    name text PRIMARY KEY,
+    fresh boolean NOT NULL DEFAULT false,
+    rebuilt_at timestamptz
+);
+CREATE TABLE IF NOT EXISTS summary_course_day (
+    "Date" date NOT NULL,
+    "Course_ID" integer NOT NULL,
+    regs bigint NOT NULL,
+    PRIMARY KEY ("Date", "Course_ID")
+);
+CREATE TABLE IF NOT EXISTS summary_professor_course (
+    "Professor_ID" integer NOT NULL,
+    "Course_ID" integer NOT NULL,
+    regs bigint NOT NULL,
+    PRIMARY KEY ("Professor_ID", "Course_ID")
+);
+
+CREATE OR REPLACE FUNCTION summary_registration_delta() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE summary_course_day s SET regs = s.regs - d.n
+        FROM (SELECT "Date", "Course_ID", count(*) AS n FROM old_rows
+              WHERE "Date" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2) d
+        WHERE s."Date" = d."Date" AND s."Course_ID" = d."Course_ID";
+        DELETE FROM summary_course_day s
+        USING (SELECT DISTINCT "Date", "Course_ID" FROM old_rows) d
+        WHERE s."Date" = d."Date" AND s."Course_ID" = d."Course_ID" AND s.regs <= 0;
+
+        UPDATE summary_professor_course s SET regs = s.regs - d.n
+        FROM (SELECT "Professor_ID", "Course_ID", count(*) AS n FROM old_rows
+              WHERE "Professor_ID" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2) d
+        WHERE s."Professor_ID" = d."Professor_ID" AND s."Course_ID" = d."Course_ID";
+        DELETE FROM summary_professor_course s
+        USING (SELECT DISTINCT "Professor_ID", "Course_ID" FROM old_rows) d
+        WHERE s."Professor_ID" = d."Professor_ID" AND s."Course_ID" = d."Course_ID" AND s.regs <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO summary_course_day ("Date", "Course_ID", regs)
+        SELECT "Date", "Course_ID", count(*) FROM new_rows
+        WHERE "Date" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2
+        ON CONFLICT ("Date", "Course_ID") DO UPDATE SET regs = summary_course_day.regs + EXCLUDED.regs;
+
+        INSERT INTO summary_professor_course ("Professor_ID", "Course_ID", regs)
+        SELECT "Professor_ID", "Course_ID", count(*) FROM new_rows
+        WHERE "Professor_ID" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2
+        ON CONFLICT ("Professor_ID", "Course_ID") DO UPDATE SET regs = summary_professor_course.regs + EXCLUDED.regs;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION summary_registration_truncate() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    TRUNCATE summary_course_day, summary_professor_course;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS summary_registration_ins ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_del ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_upd ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_trunc ON "Registration";
+CREATE TRIGGER summary_registration_ins AFTER INSERT ON "Registration"
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION summary_registration_delta();
+CREATE TRIGGER summary_registration_del AFTER DELETE ON "Registration"
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION summary_registration_delta();
+CREATE TRIGGER summary_registration_upd AFTER UPDATE ON "Registration"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION summary_registration_delta();
+CREATE TRIGGER summary_registration_trunc AFTER TRUNCATE ON "Registration"
+    FOR EACH STATEMENT EXECUTE FUNCTION summary_registration_truncate();
+"""
+
+UNINSTALL_SQL = """
+DROP TRIGGER IF EXISTS summary_registration_ins ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_del ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_upd ON "Registration";
+DROP TRIGGER IF EXISTS summary_registration_trunc ON "Registration";
+DROP FUNCTION IF EXISTS summary_registration_delta();
+DROP FUNCTION IF EXISTS summary_registration_truncate();
+DROP TABLE IF EXISTS summary_course_day, summary_professor_course, summary_state;
+"""
+
+REBUILD_SQL = """
+LOCK TABLE "Registration" IN SHARE MODE;
+TRUNCATE summary_course_day, summary_professor_course;
+INSERT INTO summary_course_day ("Date", "Course_ID", regs)
+SELECT "Date", "Course_ID", count(*) FROM "Registration"
+WHERE "Date" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2;
+INSERT INTO summary_professor_course ("Professor_ID", "Course_ID", regs)
+SELECT "Professor_ID", "Course_ID", count(*) FROM "Registration"
+WHERE "Professor_ID" IS NOT NULL AND "Course_ID" IS NOT NULL GROUP BY 1, 2;
+INSERT INTO summary_state (name, fresh, rebuilt_at) VALUES ('registration', true, now())
+ON CONFLICT (name) DO UPDATE SET fresh = true, rebuilt_at = now();
+ANALYZE summary_course_day;
+ANALYZE summary_professor_course;
+"""
+
+# Свіжі: прапорець стоїть і всі тригери на місці та ввімкнені (після перестворення таблиці,
+# напр. секціонування, тригерів немає — агрегати вже не відстежують зміни)
+FRESH_Q = """
+SELECT COALESCE((SELECT fresh FROM summary_state WHERE name = %s), false)
+   AND (SELECT count(*) FROM pg_trigger
+        WHERE tgrelid = to_regclass('public."Registration"') AND tgname = ANY(%s) AND tgenabled <> 'D') = %s
+"""
+
+STATUS_Q = """
+SELECT s.fresh, s.rebuilt_at,
+       (SELECT count(*) FROM summary_course_day),
+       (SELECT count(*) FROM summary_professor_course)
+FROM summary_state s WHERE s.name = %s
+"""
+
+# Звіти з агрегатів: ті самі стовпці й порядок, що в COURSE_REGS_SQL / PROFESSOR_COURSES_SQL (models.py)
+COURSE_REGS_SUMMARY_SQL = """
+SELECT c."Name" AS course, SUM(d.regs)::bigint AS regs_count
+FROM "Course" c
+JOIN summary_course_day d ON c."Course_ID" = d."Course_ID"
+WHERE d."Date" BETWEEN %s AND %s
+GROUP BY c."Name"
+ORDER BY regs_count DESC
+LIMIT 100;
+"""
+PROFESSOR_COURSES_SUMMARY_SQL = """
+SELECT p."Professor_Name" AS professor, p."Experience", COUNT(DISTINCT pc."Course_ID") AS courses_count
+FROM "Professor" p
+LEFT JOIN summary_professor_course pc ON p."Professor_ID" = pc."Professor_ID"
+WHERE p."Experience" >= %s
+GROUP BY p."Professor_Name", p."Experience"
+ORDER BY courses_count DESC
+LIMIT 100;
+"""
+
+
+class SummaryManager:
+    def __init__(self, model, defer_rows: int):
+        self.model = model
+        self.defer_rows = defer_rows   # від скількох рядків завантаження вимикати тригери
+
+    # --- Стан ---
+    def installed(self) -> bool:
+        """
+        Чи є таблиця стану — за кешем каталогу, без звернення до бази: звіти питають is_fresh
+        на кожному промаху кешу, і без агрегатів FRESH_Q щоразу падав би з помилкою на сервері.
+        """
+        return STATE_TABLE in self.model.catalog.tables()
+
+    def is_fresh(self) -> bool:
+        if not self.installed():
+            return False
+        try:
+            with self.model.connection() as conn, conn.cursor() as cur:
+                cur.execute(FRESH_Q, (STATE_NAME, list(TRIGGERS), len(TRIGGERS)))
+                return bool(cur.fetchone()[0])
+        except psycopg2.errors.UndefinedTable:
+            # агрегати видалили в обхід моделі, а каталог ще не помітив — перечитати
+            self.model.catalog.invalidate()
+            return False
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """{"fresh", "rebuilt_at", "course_day_rows", "professor_course_rows"} або None, якщо не встановлено."""
+        if not self.installed():
+            return None
+        try:
+            with self.model.connection() as conn, conn.cursor() as cur:
+                cur.execute(STATUS_Q, (STATE_NAME,))
+                row = cur.fetchone()
+        except psycopg2.errors.UndefinedTable:
+            return None
+        if row is None:
+            return None
+        return {
+            "fresh": self.is_fresh(),
+            "rebuilt_at": row[1],
+            "course_day_rows": row[2],
+            "professor_course_rows": row[3],
+        }
+
+    # --- Керування ---
+    def install(self) -> Tuple[bool, Optional[str]]:
+        """Створити таблиці, функції й тригери (повторний виклик їх оновлює) і заповнити агрегати."""
+        try:
+            with self.model.transaction() as conn, conn.cursor() as cur:
+                cur.execute(INSTALL_SQL)
+                cur.execute(REBUILD_SQL)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        self.model.catalog.invalidate()
+        self.model.result_cache.clear()
+        return True, None
+
+    def rebuild(self) -> Tuple[bool, Optional[str]]:
+        """Перерахувати агрегати з нуля (після завантажень із вимкненими тригерами); тригери — перевстановити."""
+        return self.install()
+
+    def uninstall(self) -> Tuple[bool, Optional[str]]:
+        try:
+            with self.model.transaction() as conn, conn.cursor() as cur:
+                cur.execute(UNINSTALL_SQL)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        self.model.catalog.invalidate()
+        self.model.result_cache.clear()
+        return True, None
+
+    @contextmanager
+    def bulk_load(self, rows: int):
+        """
+        Обгортка великого завантаження в Registration. Якщо агрегати свіжі й рядків не менше defer_rows,
+        у тій самій транзакції прапорець скидається і тригери вимикаються на час завантаження:
+        завантаження йде без накладних витрат на дельти, а звіти читають базові таблиці до rebuild().
+        """
+        if rows < self.defer_rows or not self.is_fresh():
+            yield False
+            return
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            cur.execute("UPDATE summary_state SET fresh = false WHERE name = %s", (STATE_NAME,))
+            for name in TRIGGERS:
+                cur.execute(sql.SQL('ALTER TABLE {} DISABLE TRIGGER {}').format(sql.Identifier(TABLE), sql.Identifier(name)))
+            yield True
+            for name in TRIGGERS:
+                cur.execute(sql.SQL('ALTER TABLE {} ENABLE TRIGGER {}').format(sql.Identifier(TABLE), sql.Identifier(name)))
@@ -0,0 +1,5 @@
+# Модулі застосунку лежать плоско в каталозі RGR_Popov_KV-34 (main.py імпортує їх за іменем)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import pytest
+
+from prepared import to_dollar_params
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("SELECT * FROM t WHERE a = %s AND b = %s", ("SELECT * FROM t WHERE a = $1 AND b = $2", 2)),
+    ("SELECT 1", ("SELECT 1", 0)),
+    ("SELECT 7 %% 3, %s", ("SELECT 7 % 3, $1", 1)),
+    # %%s — екранований відсоток і літера s, а не плейсхолдер
+    ("SELECT '%%s', %s", ("SELECT '%s', $1", 1)),
+    # у константах %% -> % (правило psycopg2), %s — не параметр
+    ("SELECT a FROM t WHERE b LIKE '%%x%%' AND c = %s", ("SELECT a FROM t WHERE b LIKE '%x%' AND c = $1", 1)),
+    ("SELECT '%s', %s", ("SELECT '%s', $1", 1)),
+    ("SELECT 'it''s %s', %s", ("SELECT 'it''s %s', $1", 1)),
+    ("SELECT E'it\\'s %s', %s", ("SELECT E'it\\'s %s', $1", 1)),
+    ("SELECT $$ %s $$, $f$ %s $f$, %s", ("SELECT $$ %s $$, $f$ %s $f$, $1", 1)),
+    ('SELECT "col%s" FROM t WHERE x = %s', ('SELECT "col%s" FROM t WHERE x = $1', 1)),
+    ("SELECT %s -- %s\n, /* %s */ %s", ("SELECT $1 -- %s\n, /* %s */ $2", 2)),
+    ("SELECT date'2024-01-01', %s", ("SELECT date'2024-01-01', $1", 1)),
+])
+def test_to_dollar_params(text, expected):
+    assert to_dollar_params(text) == expected
@@ -0,0 +1,124 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", c)
+    return c
+
+
+def get(cache, key):
+    value = cache.get(key)
+    return None if cache.is_miss(value) else value
+
+
+def test_hit_and_miss_counters():
+    cache = ResultCache()
+    assert get(cache, "a") is None
+    cache.put("a", [1], ("T",))
+    assert get(cache, "a") == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", [1], ("T",))
+    cache.put("b", [2], ("T",))
+    assert get(cache, "a") == [1]      # "a" стає найсвіжішим
+    cache.put("c", [3], ("T",))
+    assert get(cache, "b") is None
+    assert get(cache, "a") == [1] and get(cache, "c") == [3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_byte_budget():
+    one = result_cache.estimate_size(["x" * 1000])
+    cache = ResultCache(max_bytes=2 * one + one // 2)
+    for key in "abc":
+        cache.put(key, [key * 1000], ("T",))
+    assert get(cache, "a") is None
+    assert get(cache, "b") is not None and get(cache, "c") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_value_larger_than_budget_is_not_stored():
+    cache = ResultCache(max_bytes=100)
+    cache.put("big", ["x" * 1000], ("T",))
+    assert get(cache, "big") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_ttl_expiry(clock):
+    cache = ResultCache(ttl=10)
+    cache.put("a", [1], ("T",))
+    clock.now += 9.9
+    assert get(cache, "a") == [1]
+    clock.now += 0.2
+    assert get(cache, "a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_drops_only_dependent_entries():
+    cache = ResultCache()
+    cache.put("ab", [1], ("A", "B"))
+    cache.put("b", [2], ("B",))
+    cache.put("c", [3], ("C",))
+    cache.invalidate("A")
+    assert get(cache, "ab") is None
+    assert get(cache, "b") == [2] and get(cache, "c") == [3]
+    cache.invalidate("B")
+    assert get(cache, "b") is None and get(cache, "c") == [3]
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_result_read_before_concurrent_write_is_not_stored():
+    cache = ResultCache()
+    seen = cache.generations(("A", "B"))
+    cache.invalidate("B")                  # запис у таблицю, поки запит виконувався
+    cache.put("q", [1], ("A", "B"), seen)
+    assert get(cache, "q") is None
+    seen = cache.generations(("A", "B"))
+    cache.put("q", [1], ("A", "B"), seen)
+    assert get(cache, "q") == [1]
+
+
+def test_clear_bumps_generations_of_known_tables():
+    cache = ResultCache()
+    cache.put("a", [1], ("A",))
+    cache.invalidate("B")
+    before = cache.generations(("A", "B"))
+    cache.clear()
+    after = cache.generations(("A", "B"))
+    assert all(x > y for x, y in zip(after, before))
+    assert get(cache, "a") is None and cache.stats()["bytes"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache()
+    with cache.disabled():
+        cache.put("a", [1], ("T",))
+        assert get(cache, "a") is None
+    assert cache.enabled
+    assert get(cache, "a") is None
+
+
+def test_replacing_a_key_keeps_byte_count_consistent():
+    cache = ResultCache()
+    cache.put("a", ["x" * 100], ("T",))
+    cache.put("a", ["y"], ("U",))
+    assert cache.stats()["bytes"] == result_cache.estimate_size(["y"])
+    cache.invalidate("T")
+    assert get(cache, "a") == ["y"]
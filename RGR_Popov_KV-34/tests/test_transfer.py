@@ -0,0 +1,83 @@
+import io
+
+import psycopg2
+import pytest
+
+import transfer
+from config import DB
+from models import DBModel
+
+# Те, що пише COPY (SELECT ...) TO STDOUT WITH (FORMAT csv, HEADER true, NULL '\N') для рядків
+# ('', NULL, '\N'): значення, що збігається з NULL-рядком, COPY бере в лапки.
+EXPORTED = 'id,note\n1,\n2,\\N\n3,"\\N"\n4,""\n'
+EXPECTED = [(1, ""), (2, None), (3, "\\N"), (4, "")]
+
+
+class _Model:
+    """Мінімум DBModel, який потрібен import_table без перевірки FK."""
+    coerce_value = staticmethod(DBModel.coerce_value)
+
+    def __init__(self):
+        self.loaded = []
+
+    def columns_info(self, table):
+        return [{"name": "id", "type": "integer", "nullable": False},
+                {"name": "note", "type": "text", "nullable": True}]
+
+    def copy_in(self, table, columns, rows):
+        self.loaded.extend(rows)
+        return True, None
+
+
+def test_quoted_fields():
+    assert transfer._quoted_fields('1,"\\N",\\N\n') == [False, True, False]
+    assert transfer._quoted_fields('"a,""b""\nc",\\N\r\n') == [True, False]
+    assert transfer._quoted_fields('') == [False]
+
+
+def test_csv_keeps_empty_null_and_literal_marker_apart(tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text(EXPORTED, encoding="utf-8")
+    model = _Model()
+    stats = transfer.import_table(model, "T", str(path), check_fk=False)
+    assert stats["ok"] and stats["rejected"] == 0
+    assert model.loaded == EXPECTED
+
+
+def test_multiline_quoted_field_next_to_null():
+    header, records = transfer._read_records(io.StringIO('a,b\n"x\n\\N",\\N\n', newline=""), "csv")
+    assert header == ["a", "b"]
+    assert [values for _, values in records] == [["x\n\\N", None]]
+
+
+def _connect():
+    try:
+        return psycopg2.connect(connect_timeout=2, **DB)
+    except psycopg2.OperationalError:
+        pytest.skip("PostgreSQL недоступний")
+
+
+def test_round_trip_through_postgres(tmp_path):
+    conn = _connect()
+    conn.autocommit = True
+    model = DBModel(pooled=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute('DROP TABLE IF EXISTS "transfer_rt"')
+            cur.execute('CREATE TABLE "transfer_rt" (id integer PRIMARY KEY, note text)')
+            cur.execute('INSERT INTO "transfer_rt" VALUES (1, %s), (2, NULL), (3, %s)', ("", "\\N"))
+        model.catalog.invalidate()
+        path = str(tmp_path / "rt.csv")
+        transfer.export_table(model, "transfer_rt", path)
+        with conn.cursor() as cur:
+            cur.execute('TRUNCATE "transfer_rt"')
+        stats = transfer.import_table(model, "transfer_rt", path, check_fk=False)
+        assert stats["ok"], stats["error"]
+        with conn.cursor() as cur:
+            cur.execute('SELECT id, note FROM "transfer_rt" ORDER BY id')
+            assert cur.fetchall() == [(1, ""), (2, None), (3, "\\N")]
+    finally:
+        with conn.cursor() as cur:
+            cur.execute('DROP TABLE IF EXISTS "transfer_rt"')
+        conn.close()
+        model.close()
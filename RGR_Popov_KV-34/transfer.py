@@ -0,0 +1,285 @@
+# transfer.py
+"""
+Потоковий імпорт і експорт таблиць у CSV / JSONL (можна з gzip) через COPY.
+
+Експорт: COPY ... TO STDOUT пише дані прямо у файл блоками, як вони приходять із сервера,
+тому навіть багатогігабайтна таблиця не потрапляє у списки Python.
+Імпорт: файл читається по рядку, значення перетворюються за правилами DBModel.coerce_value,
+за потреби пачками перевіряються FK, і все йде в COPY ... FROM STDIN (bulk_loader).
+Погані рядки не зупиняють імпорт — вони відкидаються і потрапляють у звіт.
+NULL у CSV записується як \\N, тому порожній рядок '' переживає експорт і імпорт без змін;
+рядок, що дорівнює \\N, COPY бере в лапки ("\\N"), і імпорт відрізняє його від NULL.
+"""
+import csv
+import gzip
+import itertools
+import json
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+FORMATS = ("csv", "jsonl")
+CSV_NULL = "\\N"            # NULL у CSV (типовий для COPY порожній рядок не відрізнити від '')
+TEXT_TYPES = ("text", "character varying", "character")
+FK_CHECK_BATCH = 10_000      # скільки рядків імпорту перевіряти на FK одним запитом
+PROGRESS_INTERVAL = 1.0      # як часто (с) повідомляти про прогрес
+
+
+class Progress:
+    """Лічильник рядків, що раз на interval секунд викликає callback(rows, seconds, rows_per_sec)."""
+
+    def __init__(self, callback: Optional[Callable[[int, float, float], None]], interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._next_report = self.started + interval
+
+    def tick(self, n: int = 1):
+        self.rows += n
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now >= self._next_report:
+                self._next_report = now + self.interval
+                self.callback(self.rows, now - self.started, self.rows / (now - self.started))
+
+    def stats(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.started
+        return {"rows": self.rows, "seconds": seconds, "rows_per_sec": self.rows / seconds if seconds > 0 else 0.0}
+
+
+def detect_format(path: str, fmt: Optional[str] = None, compress: Optional[bool] = None) -> Tuple[str, bool]:
+    """Формат і стиснення з явних параметрів або з розширення: table.csv, table.jsonl.gz тощо."""
+    name = path.lower()
+    if compress is None:
+        compress = name.endswith(".gz")
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if fmt is None:
+        fmt = "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Невідомий формат {fmt}; підтримуються: {', '.join(FORMATS)}")
+    return fmt, compress
+
+
+# --- Експорт ---
+class _CountingWriter:
+    """Обгортка файлу для copy_expert: пише байти як є і рахує рядки для прогресу."""
+
+    def __init__(self, f, progress: Progress):
+        self._f = f
+        self._progress = progress
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._f.write(data)
+        self._progress.tick(data.count(b"\n"))
+        return len(data)
+
+
+def export_table(model, table: str, path: str, fmt: Optional[str] = None, compress: Optional[bool] = None,
+                 progress: Optional[Callable[[int, float, float], None]] = None) -> Dict[str, Any]:
+    fmt, compress = detect_format(path, fmt, compress)
+    pk = model.primary_key(table)
+    order = sql.SQL(' ORDER BY {}').format(sql.Identifier(pk)) if pk else sql.SQL('')
+    if fmt == "csv":
+        query = sql.SQL('COPY (SELECT * FROM {}{}) TO STDOUT WITH (FORMAT csv, HEADER true, NULL {})').format(
+            sql.Identifier(table), order, sql.Literal(CSV_NULL))
+    else:
+        # Один стовпець JSON на рядок. CSV-режим з "неможливими" QUOTE/DELIMITER, щоб COPY
+        # не екранував зворотні слеші всередині JSON (як зробив би текстовий формат).
+        query = sql.SQL(
+            "COPY (SELECT row_to_json(t)::text FROM {} t{}) TO STDOUT "
+            "WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+        ).format(sql.Identifier(table), order)
+    meter = Progress(progress)
+    opener = gzip.open if compress else open
+    with opener(path, "wb") as f, model.connection() as conn, conn.cursor() as cur:
+        cur.copy_expert(query, _CountingWriter(f, meter))
+    if fmt == "csv":
+        meter.rows = max(0, meter.rows - 1)  # рядок заголовка
+    return dict(meter.stats(), table=table, path=path, format=fmt)
+
+
+# --- Імпорт ---
+class _Rejects:
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.count = 0
+        self.samples: List[Tuple[int, str]] = []
+
+    def add(self, line_no: int, message: str):
+        self.count += 1
+        if len(self.samples) < self.keep:
+            self.samples.append((line_no, message))
+
+
+def _quoted_fields(record: str, delimiter: str = ",", quote: str = '"') -> List[bool]:
+    """Для сирого запису CSV (може займати кілька рядків) — чи було кожне поле в лапках."""
+    flags: List[bool] = []
+    i, n = 0, len(record.rstrip("\r\n"))
+    while True:
+        quoted = i < n and record[i] == quote
+        if quoted:
+            i += 1
+            while i < n:
+                if record[i] == quote:
+                    if i + 1 < n and record[i + 1] == quote:
+                        i += 2
+                        continue
+                    break
+                i += 1
+        while i < n and record[i] != delimiter:
+            i += 1
+        flags.append(quoted)
+        if i >= n:
+            return flags
+        i += 1
+
+
+def _csv_records(f) -> Tuple[List[str], Iterator[Tuple[int, List[Any]]]]:
+    """
+    CSV з NULL = \\N. csv.reader знімає лапки, тож "\\N" (рядок) і \\N (NULL) стають однаковими —
+    для рідкісних записів зі значенням \\N сирий текст запису перевіряється на лапки.
+    """
+    raw: List[str] = []
+
+    def lines():
+        for line in f:
+            raw.append(line)
+            yield line
+    reader = csv.reader(lines())
+    header = next(reader, None)
+    if not header:
+        return [], iter(())
+
+    def records():
+        for values in reader:
+            text = "".join(raw)
+            raw.clear()
+            if not values:
+                continue
+            if CSV_NULL in values:
+                quoted = _quoted_fields(text)
+                values = [None if v == CSV_NULL and not quoted[i] else v for i, v in enumerate(values)]
+            yield reader.line_num, values
+    raw.clear()
+    return header, records()
+
+
+def _read_records(f, fmt: str) -> Tuple[List[str], Iterator[Tuple[int, List[Any]]]]:
+    """Повертає (стовпці, ітератор (номер_рядка_файлу, значення у порядку стовпців))."""
+    if fmt == "csv":
+        return _csv_records(f)
+
+    first_line = ""
+    line_no = 0
+    for first_line in f:
+        line_no += 1
+        if first_line.strip():
+            break
+    if not first_line.strip():
+        return [], iter(())
+    first = json.loads(first_line)
+    columns = list(first)
+
+    def jsonl_records():
+        yield line_no, [first.get(c) for c in columns]
+        for n, line in enumerate(f, start=line_no + 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield n, e
+                continue
+            yield n, [obj.get(c) for c in columns]
+    return columns, jsonl_records()
+
+
+def _coerced_rows(model, records, columns: Sequence[str], meta: Dict[str, Dict[str, Any]],
+                  rejects: _Rejects) -> Iterator[Tuple[int, tuple]]:
+    for line_no, values in records:
+        if isinstance(values, Exception):
+            rejects.add(line_no, f"некоректний JSON: {values}")
+            continue
+        if len(values) != len(columns):
+            rejects.add(line_no, f"очікується {len(columns)} полів, отримано {len(values)}")
+            continue
+        row = []
+        try:
+            for col, raw in zip(columns, values):
+                # порожнє поле нетекстового стовпця (CSV з інших програм) — теж NULL
+                if raw is None or (raw == "" and meta[col]["type"] not in TEXT_TYPES):
+                    if not meta[col]["nullable"]:
+                        raise ValueError(f"{col}: значення не може бути порожнім")
+                    row.append(None)
+                    continue
+                try:
+                    row.append(model.coerce_value(meta[col]["type"], raw))
+                except ValueError as e:
+                    raise ValueError(f"{col}: {e}") from None
+        except ValueError as e:
+            rejects.add(line_no, str(e))
+            continue
+        yield line_no, tuple(row)
+
+
+def _fk_checked_batches(model, table: str, columns: Sequence[str], rows: Iterator[Tuple[int, tuple]],
+                        rejects: _Rejects) -> Iterator[List[tuple]]:
+    """
+    Перевірка FK пачками по FK_CHECK_BATCH рядків — один запит на пачку замість запиту на рядок.
+    Пачка перевіряється до того, як піде в COPY: під час COPY підключення зайняте іншими запитами.
+    """
+    while True:
+        batch = list(itertools.islice(rows, FK_CHECK_BATCH))
+        if not batch:
+            return
+        violations = model.validate_parents(table, [dict(zip(columns, row)) for _, row in batch])
+        good = []
+        for i, (line_no, row) in enumerate(batch):
+            if i in violations:
+                col, val, parent = violations[i][0]
+                rejects.add(line_no, f"{col}={val} не знайдено у таблиці {parent}")
+            else:
+                good.append(row)
+        yield good
+
+
+def import_table(model, table: str, path: str, fmt: Optional[str] = None, compress: Optional[bool] = None,
+                 progress: Optional[Callable[[int, float, float], None]] = None, check_fk: bool = True,
+                 max_error_samples: int = 20) -> Dict[str, Any]:
+    """
+    Імпортувати файл у таблицю. Повертає статистику:
+    {"rows" (завантажено), "rejected", "errors": [(рядок_файлу, причина)], "seconds", "rows_per_sec", "ok", "error"}.
+    """
+    fmt, compress = detect_format(path, fmt, compress)
+    meta = {c["name"]: c for c in model.columns_info(table)}
+    if not meta:
+        raise ValueError(f"Таблицю {table} не знайдено")
+    opener = gzip.open if compress else open
+    rejects = _Rejects(max_error_samples)
+    meter = Progress(progress)
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        columns, records = _read_records(f, fmt)
+        unknown = [c for c in columns if c not in meta]
+        if unknown:
+            raise ValueError(f"У таблиці {table} немає стовпців: {', '.join(unknown)}")
+        rows = _coerced_rows(model, records, columns, meta, rejects)
+
+        def counted(items):
+            for row in items:
+                meter.tick()
+                yield row
+        ok, err = True, None
+        if columns and check_fk:
+            for batch in _fk_checked_batches(model, table, columns, rows, rejects):
+                ok, err = model.copy_in(table, columns, counted(batch))
+                if not ok:
+                    break
+        elif columns:
+            ok, err = model.copy_in(table, columns, counted(row for _, row in rows))
+    return dict(meter.stats(), table=table, path=path, format=fmt, ok=ok, error=err,
+                rejected=rejects.count, errors=rejects.samples)
@@ -1,6 +1,9 @@
 # views.py
 from tabulate import tabulate
-from typing import Any, List, Dict, Optional
+import plans
+import render
+from config import RENDER_SAMPLE_ROWS, RENDER_MAX_WIDTH
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 
 def print_banner():
     print("="*70)
@@ -11,14 +14,21 @@ def show_menu():
     print("""
 Меню:
 1) Показати таблиці
-2) Показати перші записи таблиці
+2) Переглянути таблицю посторінково
 3) Показати запис за PK
 4) Додати запис
 5) Редагувати запис
 6) Видалити запис
-7) Згенерувати дані SQL-на-сервері (generate_series)
+7) Згенерувати дані (COPY / generate_series)
 8) Виконати складні запити (3 варіанти)
 9) Перевірити наявність дітей перед видаленням (демо)
+10) Порадник індексів (кандидати, побудова, вимірювання)
+11) Імпорт / експорт таблиці (CSV, JSONL)
+12) Секціонування Registration за місяцями
+13) Агрегатні таблиці звітів (стан, перебудова)
+14) Метрики операцій (найповільніші, експорт)
+15) Знімок даних (NumPy): звіти без звернень до бази
+16) Пошук студента за іменем (префікс, підрядок, Tab — автодоповнення)
 0) Вийти
 """)
 
@@ -27,13 +37,87 @@ def print_tables(tables: List[str]):
     for t in tables:
         print(" -", t)
 
-def print_rows(rows: List[Dict[str, Any]], max_rows: int = 50):
+def show_catalog_stats(stats: Dict[str, Any]):
+    print(f"Кеш схеми: звернень з кешу {stats['hits']}, промахів {stats['misses']}, "
+          f"завантажень {stats['loads']}, перевірок DDL {stats['checks']}")
+
+def show_pool_stats(stats: Dict[str, Any]):
+    print(f"Пул підключень: зайнято {stats['in_use']}/{stats['maxconn']} (пік {stats['max_in_use']}), "
+          f"видач {stats['checkouts']}, очікування сер. {stats['wait_avg_ms']:.2f} мс / макс. {stats['wait_max_ms']:.2f} мс, "
+          f"зламаних {stats['broken']}")
+
+def show_prepared_stats(stats: Dict[str, Any]):
+    print(f"Підготовлені оператори: {stats['statements']} різних, PREPARE {stats['prepares']} "
+          f"(повторно {stats['reprepares']}), EXECUTE {stats['executes']}, без підготовки {stats['fallbacks']}")
+    if stats["plans"]:
+        print(tabulate(stats["plans"], headers="keys", tablefmt="psql"))
+
+def show_cache_stats(stats: Dict[str, Any]):
+    state = "увімкнено" if stats["enabled"] else "вимкнено"
+    print(f"Кеш результатів ({state}): записів {stats['entries']}/{stats['max_entries']}, "
+          f"~{stats['bytes'] / 1024:.1f} КБ, влучань {stats['hits']}, промахів {stats['misses']} "
+          f"({stats['hit_rate'] * 100:.1f}%), витіснено {stats['evictions']}, прострочено {stats['expirations']}, "
+          f"інвалідовано {stats['invalidations']}")
+
+def show_metrics_top(top: List[Dict[str, Any]]):
+    if not top:
+        print("Метрик ще немає (або їх вимкнено в config.py).")
+        return
+    print(tabulate([
+        {
+            "операція": r["operation"],
+            "викликів": r["calls"],
+            "помилок": r["errors"],
+            "сер., ms": round(r["mean_ms"], 3),
+            "p95, ms": round(r["p95_ms"], 3),
+            "макс., ms": round(r["max_ms"], 3),
+            "рядків": r["rows"],
+            "звернень": r["round_trips"],
+        }
+        for r in top
+    ], headers="keys", tablefmt="psql"))
+
+def print_rows(rows: Iterable[Dict[str, Any]], max_rows: Optional[int] = 50):
+    """Рядки друкуються потоково (render.py); rows може бути списком або ітератором. max_rows=None — усі."""
+    it = iter(rows)
+    shown = render.write_table(it, sample=RENDER_SAMPLE_ROWS, max_width=RENDER_MAX_WIDTH, limit=max_rows)
+    if not shown:
+        print("Немає рядків для відображення.")
+        return
+    if max_rows is None or shown < max_rows:
+        return
+    if isinstance(rows, list):
+        if len(rows) > max_rows:
+            print(f"... показано {max_rows} з {len(rows)} рядків")
+    elif next(it, None) is not None:
+        print(f"... показано перші {max_rows} рядків")
+
+def print_page(rows: List[Dict[str, Any]], page_no: int):
     if not rows:
         print("Немає рядків для відображення.")
         return
-    print(tabulate(rows[:max_rows], headers="keys", tablefmt="psql"))
-    if len(rows) > max_rows:
-        print(f"... показано {max_rows} з {len(rows)} рядків")
+    print(f"-- Сторінка {page_no} ({len(rows)} рядків) --")
+    print_rows(rows, max_rows=None)
+
+def show_cascade_counts(counts: List[Tuple[str, int]], title: str):
+    print(f"{title}:")
+    print(tabulate(counts, headers=["Таблиця", "Рядків"], tablefmt="psql"))
+
+def show_index_advice(results: List[Dict[str, Any]]):
+    if not results:
+        print("Нових кандидатів в індекси немає — потрібні індекси вже існують.")
+        return
+    table = []
+    for r in results:
+        if r["error"]:
+            verdict = f"помилка: {r['error']}"
+        else:
+            verdict = "залишено" if r["kept"] else "видалено (не допоміг)"
+        changes = ", ".join(
+            f"{q}: {r['before_ms'][q]} -> {r['after_ms'][q]}" for q in r["before_ms"]
+        ) if r["after_ms"] else ""
+        table.append({"індекс": r["index"], "причина": r["reason"], "час, ms": changes, "рішення": verdict})
+    print(tabulate(table, headers="keys", tablefmt="psql"))
 
 def print_row(row: Optional[Dict[str, Any]]):
     if not row:
@@ -60,14 +144,83 @@ def show_error(msg: str):
 def show_success(msg: str):
     print("Успіх:", msg)
 
-def show_query_result(rows, exec_time_ms, explain_text=None):
+def show_load_stats(stats: Dict[str, Any]):
+    print(f"  {stats['table']}: {stats['rows']} рядків за {stats['seconds']:.2f} с "
+          f"({stats['rows_per_sec']:.0f} рядків/с)")
+
+def show_progress(rows: int, seconds: float, rows_per_sec: float):
+    print(f"  ... {rows} рядків за {seconds:.1f} с ({rows_per_sec:.0f} рядків/с)")
+
+def show_summary_status(status: Optional[Dict[str, Any]]):
+    if status is None:
+        print("Агрегатні таблиці не встановлено — звіти рахуються з базових таблиць.")
+        return
+    state = "свіжі" if status["fresh"] else "застарілі (звіти читають базові таблиці)"
+    print(f"Агрегати: {state}, перебудовано {status['rebuilt_at']}; "
+          f"день×курс: {status['course_day_rows']} рядків, викладач×курс: {status['professor_course_rows']} рядків")
+
+def show_name_matches(rows, timing: Dict[str, Any]):
+    labels = {0: "префікс", 1: "слово", 2: "підрядок"}
+    print_rows([{"Student_ID": r["Student_ID"], "Student_Name": r["Student_Name"], "збіг": labels[r["rank"]]}
+                for r in rows])
+    source = "індекс у пам'яті" if timing["source"] == "index" else "сервер (pg_trgm)"
+    rebuilt = ", індекс перебудовано" if timing.get("rebuilt") else ""
+    print(f"Знайдено: {len(rows)} за {timing['wall_ms']:.2f} ms ({source}{rebuilt})")
+
+def show_snapshot_info(info: Optional[Dict[str, Any]]):
+    if info is None:
+        print("Знімка ще немає.")
+        return
+    rows = ", ".join(f"{t} {n}" for t, n in info["rows"].items())
+    print(f"Знімок {info['path']}: знято {info['created_at']} за {info['build_seconds']:.1f} с; рядків: {rows}")
+
+def show_partitions(parts: List[Dict[str, Any]]):
+    if not parts:
+        print("Секцій немає.")
+        return
+    print(tabulate([{"секція": p["name"], "з": p["from"], "до": p["to"], "рядків (оцінка)": p["rows"]} for p in parts],
+                   headers="keys", tablefmt="psql"))
+
+def show_transfer_result(stats: Dict[str, Any]):
+    if stats.get("error"):
+        print("Помилка:", stats["error"])
+    print(f"{stats['table']} <-> {stats['path']} ({stats['format']}): {stats['rows']} рядків "
+          f"за {stats['seconds']:.2f} с ({stats['rows_per_sec']:.0f} рядків/с)")
+    if stats.get("rejected"):
+        print(f"Відхилено рядків: {stats['rejected']}. Перші причини:")
+        for line_no, msg in stats["errors"]:
+            print(f"  рядок {line_no}: {msg}")
+
+def show_query_result(rows, timing: Optional[Dict[str, Any]], plan: Optional[Dict[str, Any]] = None):
     print_rows(rows, max_rows=200)
-    if exec_time_ms is not None:
-        print(f"\nЧас виконання (EXPLAIN ANALYZE): {exec_time_ms} ms")
+    if timing and timing.get("cached"):
+        print(f"\nРезультат з кешу ({timing['wall_ms']:.3f} ms), рядків: {timing['rows']}")
+    elif timing and timing.get("wall_ms") is not None:
+        print(f"\nЧас виконання: {timing['wall_ms']:.2f} ms (запит {timing['execute_ms']:.2f} ms, "
+              f"отримання {timing['fetch_ms']:.2f} ms), рядків: {timing['rows']}")
     else:
         print("\nЧас виконання: недоступний")
-    # optional: show part of explain for debugging
-    if explain_text:
-        print("\n-- EXPLAIN ANALYZE (скорочено) --")
-        expl_lines = explain_text.splitlines()
-        print("\n".join(expl_lines[-8:]))
+    if timing and timing.get("summary"):
+        print("Джерело: агрегатні таблиці")
+    if timing and timing.get("snapshot"):
+        print("Джерело: стовпцевий знімок")
+    if plan:
+        show_plan(plan)
+
+def show_plan(plan: Dict[str, Any], limit: int = 8):
+    """Найгарячіші вузли плану (за власним часом) замість сирого тексту EXPLAIN."""
+    print(f"\n-- EXPLAIN ANALYZE: планування {plan['planning_ms']} ms, виконання {plan['execution_ms']} ms --")
+    table = [
+        {
+            "вузол": n.label(),
+            "власний, ms": round(n.self_ms, 3),
+            "разом, ms": round(n.total_ms, 3),
+            "рядків": n.rows,
+            "оцінка": n.plan_rows,
+            "циклів": n.loops,
+            "власні buf hit": n.self_hit,
+            "власні buf read": n.self_read,
+        }
+        for n in plans.hottest_nodes(plan["root"], limit)
+    ]
+    print(tabulate(table, headers="keys", tablefmt="psql"))
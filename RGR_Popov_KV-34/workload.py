@@ -0,0 +1,297 @@
+# workload.py
+"""
+Відтворюваний синтетичний набір даних з перекосами, як у реальній роботі:
+  - популярність курсів і "плідність" викладачів — за законом Ципфа (кілька гарячих ключів);
+  - дати реєстрацій — сплески на початку семестрів поверх рівномірного фону;
+  - кількість реєстрацій на студента (fan-out) — від min до max, зі зсувом до малих значень.
+Усі рядки генерує сервер (INSERT ... SELECT generate_series), а кожне випадкове значення —
+це хеш (hashint8extended) від порядкового номера рядка і зерна, а не random(). Тому той самий
+профіль і зерно дають ті самі дані незалежно від кількості підключень і порядку виконання;
+ID беруться з IdAllocator і можуть відрізнятися, вміст звітів — ні.
+Для повної відтворюваності дані заповнюються в порожні таблиці (benchmark.py run --profile очищає їх).
+"""
+import datetime
+import json
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg2 import sql
+
+import bulk_loader
+from config import WORKLOAD
+from models import (STUDENT_FIRST_NAMES, STUDENT_LAST_NAMES, PROFESSOR_FIRST_NAMES, PROFESSOR_LAST_NAMES,
+                    COURSE_SUBJECTS, TASK_TITLES, TASK_COMPLEXITIES)
+
+# workload_u(k, seed) — рівномірне [0, 1) з 53 біт хешу; workload_zipf(u, n, s) — ранг 1..n за оберненою
+# неперервною функцією розподілу степеневого закону (s = 0 — рівномірно, більше s — сильніший перекіс)
+FUNCTIONS_SQL = """
+CREATE OR REPLACE FUNCTION workload_u(k bigint, seed bigint) RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+$$ SELECT (hashint8extended(k, seed) & 9007199254740991)::double precision / 9007199254740992 $$;
+
+CREATE OR REPLACE FUNCTION workload_zipf(u double precision, n integer, s double precision) RETURNS integer
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+$$ SELECT least(n, greatest(1, floor(CASE WHEN abs(s - 1) < 1e-9 THEN power(n + 1, u)
+                                          ELSE power((power(n + 1, 1 - s) - 1) * u + 1, 1 / (1 - s)) END)::integer)) $$;
+"""
+
+# Курси (викладачі) у порядку популярності: ранг Ципфа 1 — перший елемент масиву.
+# Порядок перемішано хешем порядкового номера, щоб гарячі ключі не були просто найменшими ID.
+RANKED_SQL = """
+SELECT array_agg(id ORDER BY workload_u(i, %s))
+FROM (SELECT {pk} AS id, row_number() OVER (ORDER BY {pk}) AS i FROM {table}) t
+"""
+
+STUDENTS_SQL = """
+INSERT INTO "Student" ({id_col}"Student_Name", "Group")
+SELECT {id_val}
+       (%(first)s::text[])[1 + floor(workload_u(g, %(s_first)s) * cardinality(%(first)s::text[]))::int] || ' ' ||
+       (%(last)s::text[])[1 + floor(workload_u(g, %(s_last)s) * cardinality(%(last)s::text[]))::int],
+       31 + floor(workload_u(g, %(s_group)s) * 5)::int
+FROM generate_series(1, %(count)s) g
+"""
+
+PROFESSORS_SQL = """
+INSERT INTO "Professor" ({id_col}"Professor_Name", "Experience")
+SELECT {id_val}
+       (%(first)s::text[])[1 + floor(workload_u(g, %(s_first)s) * cardinality(%(first)s::text[]))::int] || ' ' ||
+       (%(last)s::text[])[1 + floor(workload_u(g, %(s_last)s) * cardinality(%(last)s::text[]))::int],
+       1 + floor(workload_u(g, %(s_exp)s) * 40)::int
+FROM generate_series(1, %(count)s) g
+"""
+
+COURSES_SQL = """
+INSERT INTO "Course" ({id_col}"Name", "describe")
+SELECT {id_val} subj || ' ' || (1 + floor(workload_u(g, %(s_level)s) * 5)::int), 'Курс із дисципліни ' || subj
+FROM (SELECT g, (%(subjects)s::text[])[1 + floor(workload_u(g, %(s_subj)s) * cardinality(%(subjects)s::text[]))::int] AS subj
+      FROM generate_series(1, %(count)s) g) s
+"""
+
+# Завдання теж тяжіють до популярних курсів (той самий ранг Ципфа)
+TASKS_SQL = """
+INSERT INTO "Task" ({id_col}"Task_Name", "Complexity", "Course_ID")
+SELECT {id_val}
+       (%(titles)s::text[])[1 + floor(workload_u(g, %(s_title)s) * cardinality(%(titles)s::text[]))::int]
+           || ' №' || (1 + floor(workload_u(g, %(s_no)s) * 10)::int),
+       (%(levels)s::text[])[1 + floor(workload_u(g, %(s_level)s) * cardinality(%(levels)s::text[]))::int],
+       (%(courses)s::int[])[workload_zipf(workload_u(g, %(s_course)s), cardinality(%(courses)s::int[]), %(zipf)s)]
+FROM generate_series(1, %(count)s) g
+"""
+
+# Fan-out студента i: min + floor((max - min + 1) * u^skew); skew > 1 зсуває до min.
+# off — скільки реєстрацій мають студенти перед i (щоб ID рядка не залежав від порядку виконання).
+FANOUT_CTE = """
+WITH st AS (
+  SELECT "Student_ID" AS id, row_number() OVER (ORDER BY "Student_ID") AS i FROM "Student"
+), fo AS (
+  SELECT id, i, %(fan_min)s + floor(%(fan_width)s * power(workload_u(i, %(s_fan)s), %(fan_skew)s))::int AS n
+  FROM st
+), fo_off AS (
+  SELECT id, i, n, sum(n) OVER (ORDER BY i) - n AS off FROM fo
+)
+"""
+
+REGISTRATIONS_COUNT_SQL = FANOUT_CTE + "SELECT COALESCE(sum(n), 0) FROM fo"
+
+# key = (i << 20) + k — порядковий ключ k-ї реєстрації студента i для хешів
+REGISTRATIONS_SQL = FANOUT_CTE + """
+INSERT INTO "Registration" ({id_col}"Course_ID", "Professor_ID", "Student_ID", "Date")
+SELECT {id_val}
+       (%(courses)s::int[])[workload_zipf(workload_u(key, %(s_course)s), cardinality(%(courses)s::int[]), %(course_zipf)s)],
+       (%(profs)s::int[])[workload_zipf(workload_u(key, %(s_prof)s), cardinality(%(profs)s::int[]), %(prof_zipf)s)],
+       student_id,
+       CASE WHEN cardinality(%(peaks)s::date[]) > 0 AND workload_u(key, %(s_peak)s) < %(peak_share)s
+            THEN least(%(end)s::date,
+                       (%(peaks)s::date[])[1 + floor(workload_u(key, %(s_which)s) * cardinality(%(peaks)s::date[]))::int]
+                       + floor(%(spike_days)s * power(workload_u(key, %(s_day)s), 2))::int)
+            ELSE %(end)s::date - floor(%(days)s * workload_u(key, %(s_day)s))::int
+       END
+FROM (SELECT fo_off.id AS student_id, fo_off.off + k AS ord, (fo_off.i << 20) + k AS key
+      FROM fo_off, generate_series(1, fo_off.n) k) r
+"""
+
+
+class WorkloadProfile:
+    """Параметри розподілів; ключі — як у config.WORKLOAD, не задані беруться звідти."""
+
+    def __init__(self, **params):
+        unknown = set(params) - set(WORKLOAD)
+        if unknown:
+            raise ValueError(f"Невідомі параметри профілю: {', '.join(sorted(unknown))}")
+        values = dict(WORKLOAD, **params)
+        self.seed = int(values["seed"])
+        self.course_zipf = float(values["course_zipf"])
+        self.professor_zipf = float(values["professor_zipf"])
+        self.fanout_min = int(values["fanout_min"])
+        self.fanout_max = int(values["fanout_max"])
+        self.fanout_skew = float(values["fanout_skew"])
+        self.days = int(values["days"])
+        end = values["end_date"]
+        self.end_date = datetime.date.fromisoformat(end) if end else datetime.date.today()
+        self.semester_starts = [(int(m), int(d)) for m, d in values["semester_starts"]]
+        self.peak_share = float(values["peak_share"])
+        self.spike_days = int(values["spike_days"])
+        if not 0 <= self.fanout_min <= self.fanout_max:
+            raise ValueError("Має бути 0 <= fanout_min <= fanout_max")
+        if self.fanout_skew <= 0 or self.days <= 0 or self.spike_days <= 0:
+            raise ValueError("fanout_skew, days і spike_days мають бути додатними")
+        if self.course_zipf < 0 or self.professor_zipf < 0 or not 0 <= self.peak_share <= 1:
+            raise ValueError("Показники Ципфа невід'ємні, peak_share — від 0 до 1")
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "WorkloadProfile":
+        """Профіль з JSON-файлу (лише змінені ключі); без файлу — config.WORKLOAD."""
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "seed": self.seed, "course_zipf": self.course_zipf, "professor_zipf": self.professor_zipf,
+            "fanout_min": self.fanout_min, "fanout_max": self.fanout_max, "fanout_skew": self.fanout_skew,
+            "days": self.days, "end_date": self.end_date.isoformat(),
+            "semester_starts": [list(p) for p in self.semester_starts],
+            "peak_share": self.peak_share, "spike_days": self.spike_days,
+        }
+
+    def salt(self, name: str) -> int:
+        """Окреме зерно для кожного випадкового атрибута (crc32 стабільний між запусками, на відміну від hash())."""
+        return zlib.crc32(f"{self.seed}:{name}".encode())
+
+    def mean_fanout(self) -> float:
+        """Точне математичне сподівання fan-out: P(floor(w * u^skew) = j) = ((j+1)/w)^(1/skew) - (j/w)^(1/skew)."""
+        w = self.fanout_max - self.fanout_min + 1
+        a = 1 / self.fanout_skew
+        return self.fanout_min + sum(j * (((j + 1) / w) ** a - (j / w) ** a) for j in range(w))
+
+    def peaks(self) -> List[datetime.date]:
+        """Дати початку семестрів у межах [end_date - days, end_date]."""
+        first = self.end_date - datetime.timedelta(days=self.days)
+        result = []
+        for year in range(first.year, self.end_date.year + 1):
+            for month, day in self.semester_starts:
+                d = datetime.date(year, month, day)
+                if first <= d <= self.end_date:
+                    result.append(d)
+        return sorted(result)
+
+
+class WorkloadGenerator:
+    def __init__(self, model, profile: WorkloadProfile):
+        self.model = model
+        self.profile = profile
+
+    def install(self):
+        """Створити (оновити) SQL-функції workload_u / workload_zipf."""
+        with self.model.transaction() as conn, conn.cursor() as cur:
+            cur.execute(FUNCTIONS_SQL)
+
+    def counts_for_scale(self, registrations: int, ratios: Dict[str, tuple]) -> Dict[str, int]:
+        """Кількості батьківських таблиць для приблизно registrations реєстрацій (студентів — за fan-out)."""
+        counts = {t: max(int(registrations * ratio), minimum) for t, (ratio, minimum) in ratios.items()
+                  if t not in ("Student", "Registration")}
+        counts["Student"] = max(1, round(registrations / max(self.profile.mean_fanout(), 1e-9)))
+        return counts
+
+    # --- Таблиці ---
+    def _insert(self, cur, table: str, template: str, count: int, params: Dict[str, Any]) -> int:
+        """
+        Виконати INSERT ... SELECT для count рядків. Якщо PK не serial, ID — суцільний діапазон з IdAllocator
+        (власна послідовність завжди дає один діапазон), рядок ord отримує start + ord - 1; інакше — DEFAULT.
+        """
+        pk = self.model.ids.needs_id(table)
+        if pk is not None and count > 0:
+            (start, _), = self.model.reserve_ids(table, count)
+            id_col, id_val = sql.SQL('{}, ').format(sql.Identifier(pk)), sql.SQL('%(start)s + {} - 1, ')
+            params = dict(params, start=start)
+        else:
+            id_col, id_val = sql.SQL(''), None
+        ord_col = "ord" if table == "Registration" else "g"
+        query = sql.SQL(template).format(id_col=id_col,
+                                         id_val=id_val.format(sql.SQL(ord_col)) if id_val else sql.SQL(''))
+        cur.execute(query, params)
+        return cur.rowcount
+
+    def _ranked(self, cur, table: str, salt: str) -> List[int]:
+        pk = self.model.catalog.primary_key(table)
+        cur.execute(sql.SQL(RANKED_SQL).format(pk=sql.Identifier(pk), table=sql.Identifier(table)),
+                    (self.profile.salt(salt),))
+        return cur.fetchone()[0] or []
+
+    def _names(self, first: List[str], last: List[str], prefix: str) -> Dict[str, Any]:
+        return {"first": first, "last": last,
+                "s_first": self.profile.salt(prefix + ".first"), "s_last": self.profile.salt(prefix + ".last")}
+
+    def _generate(self, cur, table: str, count: int) -> int:
+        p = self.profile
+        if table == "Student":
+            params = dict(self._names(STUDENT_FIRST_NAMES, STUDENT_LAST_NAMES, "student"),
+                          s_group=p.salt("student.group"), count=count)
+            return self._insert(cur, table, STUDENTS_SQL, count, params)
+        if table == "Professor":
+            params = dict(self._names(PROFESSOR_FIRST_NAMES, PROFESSOR_LAST_NAMES, "professor"),
+                          s_exp=p.salt("professor.experience"), count=count)
+            return self._insert(cur, table, PROFESSORS_SQL, count, params)
+        if table == "Course":
+            params = {"subjects": COURSE_SUBJECTS, "s_subj": p.salt("course.subject"),
+                      "s_level": p.salt("course.level"), "count": count}
+            return self._insert(cur, table, COURSES_SQL, count, params)
+        if table == "Task":
+            courses = self._ranked(cur, "Course", "course.rank")
+            if not courses:
+                raise ValueError("Немає курсів для завдань")
+            params = {"titles": TASK_TITLES, "levels": TASK_COMPLEXITIES, "courses": courses,
+                      "zipf": p.course_zipf, "s_title": p.salt("task.title"), "s_no": p.salt("task.no"),
+                      "s_level": p.salt("task.level"), "s_course": p.salt("task.course"), "count": count}
+            return self._insert(cur, table, TASKS_SQL, count, params)
+        raise ValueError(f"Немає генератора профілю для таблиці {table}")
+
+    def _registrations(self, cur) -> int:
+        p = self.profile
+        courses = self._ranked(cur, "Course", "course.rank")
+        profs = self._ranked(cur, "Professor", "professor.rank")
+        if not courses or not profs:
+            raise ValueError("Для реєстрацій потрібні курси й викладачі")
+        params = {
+            "fan_min": p.fanout_min, "fan_width": p.fanout_max - p.fanout_min + 1, "fan_skew": p.fanout_skew,
+            "s_fan": p.salt("student.fanout"),
+            "courses": courses, "course_zipf": p.course_zipf, "s_course": p.salt("registration.course"),
+            "profs": profs, "prof_zipf": p.professor_zipf, "s_prof": p.salt("registration.professor"),
+            "peaks": p.peaks(), "peak_share": p.peak_share, "spike_days": p.spike_days,
+            "end": p.end_date, "days": p.days,
+            "s_peak": p.salt("registration.peak"), "s_which": p.salt("registration.semester"),
+            "s_day": p.salt("registration.day"),
+        }
+        cur.execute(REGISTRATIONS_COUNT_SQL, params)
+        total = cur.fetchone()[0]
+        # секції на весь діапазон дат профілю — до вставки
+        self.model.partitions.ensure_range(p.end_date - datetime.timedelta(days=p.days), p.end_date)
+        with self.model.summaries.bulk_load(total):
+            return self._insert(cur, "Registration", REGISTRATIONS_SQL, total, params)
+
+    # --- Уся схема ---
+    def populate(self, counts: Dict[str, int],
+                 log: Optional[Callable[[str], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Згенерувати counts[table] рядків Student, Professor, Course, Task (батьки перед дочірніми),
+        потім реєстрації за fan-out кожного студента. Повертає {table: статистика завантаження}.
+        """
+        self.install()
+        stats: Dict[str, Dict[str, Any]] = {}
+        with self.model.connection() as conn, conn.cursor() as cur:
+            for table in ("Student", "Professor", "Course", "Task", "Registration"):
+                if table != "Registration" and not counts.get(table):
+                    continue
+                started = time.perf_counter()
+                try:
+                    rows = (self._registrations(cur) if table == "Registration"
+                            else self._generate(cur, table, counts[table]))
+                finally:
+                    self.model.result_cache.invalidate(table)
+                stats[table] = self.model.load_stats[table] = bulk_loader.make_stats(
+                    table, rows, time.perf_counter() - started)
+                if log:
+                    log(f"  {table}: +{rows} рядків ({stats[table]['rows_per_sec']:.0f} рядків/с)")
+        return stats